@@ -1,8 +1,13 @@
 """
 Base Agent class that provides common functionality for all agents.
 """
-import google.generativeai as genai
-from typing import Optional
+from .client_pool import gemini_client_pool
+from .cassette import get_cassette
+from .prefix_cache import get_prefix_cache
+from .prompts import prompt_stats
+from ..tracing import span
+from typing import Optional, AsyncGenerator
+import time
 
 class BaseAgent:
     """Base class for all agents in the Master Agentic AI system."""
@@ -10,25 +15,87 @@ class BaseAgent:
     def __init__(self, api_key: str):
         """Initialize the base agent with API key."""
         self.api_key = api_key
+        # Optional LRUCache of prompt -> response, shared across agents in batch runs
+        self.response_cache = None
         self._configure_genai()
     
     def _configure_genai(self):
-        """Configure the Google Generative AI client."""
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
+        """Get the pooled Gemini client for this agent's API key."""
+        self.client = gemini_client_pool.get(self.api_key)
     
     def _get_gemini_model(self, model_name: str = "gemini-pro"):
-        """Get a configured Gemini model instance."""
-        return genai.GenerativeModel(model_name)
+        """Get a Gemini model handle bound to this agent's API key."""
+        return self.client.model(model_name)
     
     async def _generate_content(self, prompt: str, model_name: str = "gemini-pro") -> str:
         """Generate content using the Gemini model."""
-        try:
-            model = self._get_gemini_model(model_name)
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error generating content: {str(e)}"
+        with span("llm_call", "llm", agent=getattr(self, "agent_name", type(self).__name__),
+                  model=model_name, prompt_chars=len(prompt)) as llm_span:
+            cache_key = (model_name, prompt)
+            if self.response_cache is not None:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    llm_span.set(cache="hit", response_chars=len(cached))
+                    return cached
+            
+            cassette = get_cassette()
+            try:
+                if cassette and cassette.mode == "replay":
+                    llm_span.set(cache="replay")
+                    text = await cassette.replay(model_name, prompt)
+                else:
+                    llm_span.set(cache="miss" if self.response_cache is not None else "off")
+                    model, contents, cached_tokens = await self._prepare_prompt(prompt, model_name)
+                    llm_span.set(cached_prefix_tokens=cached_tokens)
+                    async with self.client.limit(prompt) as usage:
+                        started = time.perf_counter()
+                        response = await model.generate_content_async(contents)
+                        text = usage["response"] = response.text
+                    if cassette:
+                        cassette.record(model_name, prompt, text, time.perf_counter() - started)
+            except Exception as e:
+                llm_span.set(error=str(e))
+                return f"Error generating content: {str(e)}"
+            
+            llm_span.set(response_chars=len(text))
+            if self.response_cache is not None:
+                self.response_cache.put(cache_key, text)
+            return text
+    
+    async def _prepare_prompt(self, prompt: str, model_name: str):
+        """
+        Pick the model and contents for a call, using the prefix cache when enabled.
+        Returns (model, contents, prefix tokens served from cache) and records prompt stats.
+        """
+        model, contents, cached_tokens = None, prompt, 0
+        prefix_cache = get_prefix_cache()
+        if prefix_cache is not None:
+            model, contents, cached_tokens = await prefix_cache.prepare(self.client, model_name, prompt)
+        prompt_stats.record(prompt, cached_tokens)
+        return model or self._get_gemini_model(model_name), contents, cached_tokens
+    
+    async def _generate_content_stream(self, prompt: str, model_name: str = "gemini-pro") -> AsyncGenerator[str, None]:
+        """Stream generated content from the Gemini model as text chunks."""
+        with span("llm_stream", "llm", agent=getattr(self, "agent_name", type(self).__name__),
+                  model=model_name, prompt_chars=len(prompt)) as llm_span:
+            cassette = get_cassette()
+            if cassette and cassette.mode == "replay":
+                llm_span.set(cache="replay")
+                async for chunk in cassette.replay_stream(model_name, prompt):
+                    yield chunk
+                return
+            
+            model, contents, cached_tokens = await self._prepare_prompt(prompt, model_name)
+            llm_span.set(cached_prefix_tokens=cached_tokens)
+            async with self.client.limit(prompt) as usage:
+                started = time.perf_counter()
+                response = await model.generate_content_async(contents, stream=True)
+                async for chunk in response:
+                    usage["response"] += chunk.text
+                    yield chunk.text
+            llm_span.set(cache="off", response_chars=len(usage["response"]))
+            if cassette:
+                cassette.record(model_name, prompt, usage["response"], time.perf_counter() - started)
     
     def _format_conversation_history(self, history: list) -> str:
         """Format conversation history for context."""
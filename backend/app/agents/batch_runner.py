@@ -0,0 +1,212 @@
+"""
+Batch runner for pushing many messages through the multi-agent pipeline.
+
+Messages are processed with bounded concurrency, and all workers share one
+LLM response cache and one ethics review cache. Progress is appended to a
+JSONL file so an interrupted batch can be resumed. Progress files are kept
+per API key (by fingerprint), and a stored result is only replayed for an
+item whose message and history are unchanged. Also usable from the command
+line:
+
+    python -m app.agents.batch_runner input.jsonl output.jsonl [batch_id]
+"""
+from .master_orchestrator import MasterAgentOrchestrator
+from .client_pool import key_fingerprint
+from ..cache import LRUCache
+from .. import config
+from typing import Dict, Any, List, AsyncGenerator, Optional, Union
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+def load_batch_items(source: Union[str, List[Union[str, Dict]]]) -> List[Dict[str, Any]]:
+    """
+    Normalize batch input into a list of {"id", "message", "conversation_history"} dicts.
+    Accepts a path to a JSONL file or a list of message strings or dicts.
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            source = [json.loads(line) for line in f if line.strip()]
+    
+    items = []
+    for index, entry in enumerate(source):
+        if isinstance(entry, str):
+            entry = {"message": entry}
+        items.append({
+            "id": str(entry.get("id", index)),
+            "message": entry.get("message", ""),
+            "conversation_history": entry.get("conversation_history") or []
+        })
+    return items
+
+def item_hash(item: Dict[str, Any]) -> str:
+    """Hash of an item's input, so a stored result is only reused for the same request."""
+    payload = json.dumps([item["message"], item["conversation_history"]], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class BatchRunner:
+    """Runs a batch of messages through MasterAgentOrchestrator instances that share caches."""
+    
+    def __init__(self, api_key: str, concurrency: int = None, progress_dir: str = None):
+        """Initialize the runner and the caches shared by all of its workers."""
+        self.api_key = api_key
+        self.concurrency = max(1, min(concurrency or config.BATCH_CONCURRENCY, config.BATCH_MAX_CONCURRENCY))
+        self.progress_dir = progress_dir or config.BATCH_PROGRESS_DIR
+        self.response_cache = LRUCache(config.BATCH_RESPONSE_CACHE_SIZE)
+        self.review_cache = LRUCache(config.BATCH_RESPONSE_CACHE_SIZE)
+    
+    def _progress_path(self, batch_id: str) -> str:
+        """Get the progress file for a batch id; each API key has its own namespace of batch ids."""
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", batch_id)
+        return os.path.join(self.progress_dir, key_fingerprint(self.api_key), f"{safe_id}.jsonl")
+    
+    def _load_progress(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """Load results already completed by an earlier run of this batch."""
+        path = self._progress_path(batch_id)
+        completed = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written last line
+                    completed[result["id"]] = result
+        return completed
+    
+    async def _process_item(self, orchestrator: MasterAgentOrchestrator, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one message through the orchestrator and keep only its final event."""
+        started = time.perf_counter()
+        final_event = None
+        async for event in orchestrator.handle_message(
+            message=item["message"],
+            history=list(item["conversation_history"])
+        ):
+            if event.get("is_final"):
+                final_event = event
+        
+        final_event = final_event or {"type": "error", "message": "No final response produced"}
+        return {
+            "type": "batch_result",
+            "id": item["id"],
+            "input_hash": item_hash(item),
+            "message": item["message"],
+            "status": "error" if final_event["type"] == "error" else "completed",
+            "response": final_event.get("message", ""),
+            "metadata": final_event.get("metadata", {}),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "is_final": False
+        }
+    
+    async def run(self, source: Union[str, List[Union[str, Dict]]],
+                  batch_id: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Process a batch and yield results in completion order, followed by a summary.
+        With a batch_id, progress is persisted and results from an earlier run are replayed
+        (marked "resumed") instead of being recomputed, for items whose input is unchanged.
+        """
+        items = load_batch_items(source)
+        stored = self._load_progress(batch_id) if batch_id else {}
+        completed = {
+            item["id"]: stored[item["id"]] for item in items
+            if item["id"] in stored and stored[item["id"]].get("input_hash") == item_hash(item)
+        }
+        pending = [item for item in items if item["id"] not in completed]
+        
+        yield {
+            "type": "batch_started",
+            "batch_id": batch_id,
+            "total": len(items),
+            "resumed": len(items) - len(pending),
+            "concurrency": self.concurrency,
+            "is_final": False
+        }
+        
+        for item in items:
+            if item["id"] in completed:
+                yield {**completed[item["id"]], "resumed": True}
+        
+        progress_file = None
+        if batch_id:
+            path = self._progress_path(batch_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            progress_file = open(path, "a", encoding="utf-8")
+        
+        work = asyncio.Queue()
+        for item in pending:
+            work.put_nowait(item)
+        results = asyncio.Queue()
+        
+        async def worker():
+            """Process queued items on one warm orchestrator."""
+            orchestrator = MasterAgentOrchestrator(
+                self.api_key, response_cache=self.response_cache, review_cache=self.review_cache
+            )
+            while True:
+                try:
+                    item = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await self._process_item(orchestrator, item)
+                except Exception as e:
+                    result = {
+                        "type": "batch_result",
+                        "id": item["id"],
+                        "input_hash": item_hash(item),
+                        "message": item["message"],
+                        "status": "error",
+                        "response": f"An error occurred: {str(e)}",
+                        "metadata": {},
+                        "is_final": False
+                    }
+                await results.put(result)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(pending)))]
+        failed = 0
+        try:
+            for _ in range(len(pending)):
+                result = await results.get()
+                failed += result["status"] == "error"
+                if progress_file:
+                    progress_file.write(json.dumps(result) + "\n")
+                    progress_file.flush()
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            if progress_file:
+                progress_file.close()
+        
+        yield {
+            "type": "batch_complete",
+            "batch_id": batch_id,
+            "total": len(items),
+            "processed": len(pending),
+            "failed": failed,
+            "response_cache": self.response_cache.stats(),
+            "review_cache": self.review_cache.stats(),
+            "is_final": True
+        }
+
+async def _run_cli(input_path: str, output_path: str, batch_id: Optional[str]) -> Dict[str, Any]:
+    """Run a JSONL batch file, write results to a JSONL file and return the summary event."""
+    runner = BatchRunner(config.get_api_key())
+    summary = {}
+    with open(output_path, "a" if batch_id else "w", encoding="utf-8") as out:
+        async for event in runner.run(input_path, batch_id=batch_id):
+            if event["type"] == "batch_result" and not event.get("resumed"):
+                out.write(json.dumps(event) + "\n")
+            elif event["type"] == "batch_complete":
+                summary = event
+    return summary
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.stderr.write("Usage: python -m app.agents.batch_runner <input.jsonl> <output.jsonl> [batch_id]\n")
+        sys.exit(1)
+    print(json.dumps(asyncio.run(_run_cli(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None))))
@@ -0,0 +1,196 @@
+"""
+Record/replay of LLM calls for deterministic load tests and regression profiling.
+
+In record mode every prompt, response and observed latency is appended to a
+gzip-compressed JSONL cassette keyed by prompt hash. Calls are queued and a
+background thread writes them through one open gzip stream, so recording adds
+no file I/O to the event loop; the stream is flushed whenever the queue drains
+and closed on shutdown. In replay mode responses
+are served from the cassette with the original latency scaled by
+LLM_REPLAY_SPEED (0 replays instantly) and no API calls are made.
+
+Compare two cassettes, e.g. recorded from two releases:
+
+    python -m app.agents.cassette diff before.jsonl.gz after.jsonl.gz
+"""
+from typing import Dict, Any, List, Optional, AsyncGenerator
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from .. import config
+
+def prompt_hash(model_name: str, prompt: str) -> str:
+    """Stable key for a prompt sent to a model."""
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()[:24]
+
+def load_cassette(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Load cassette entries grouped by prompt hash, in recording order."""
+    entries: Dict[str, List[Dict[str, Any]]] = {}
+    if not os.path.exists(path):
+        return entries
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries.setdefault(entry["hash"], []).append(entry)
+        except (EOFError, ValueError):
+            pass  # Truncated tail from an interrupted recording
+    return entries
+
+class Cassette:
+    """Records LLM calls to, or replays them from, a cassette file."""
+    
+    def __init__(self, mode: str, path: str, speed: float = 1.0):
+        """Open the cassette for recording or load it for replay."""
+        self.mode = mode
+        self.path = path
+        self.speed = max(speed, 0.0)
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._positions: Dict[str, int] = {}
+        self._entries = load_cassette(path) if mode == "replay" else {}
+        self._pending: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+    
+    def record(self, model_name: str, prompt: str, response: str, latency: float):
+        """Queue one call for the writer thread; never blocks on file I/O."""
+        entry = {
+            "hash": prompt_hash(model_name, prompt),
+            "model": model_name,
+            "prompt": prompt,
+            "response": response,
+            "latency": round(latency, 4),
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="llm-cassette", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+        self._pending.put(entry)
+    
+    def _write_loop(self):
+        """Write queued entries through a single gzip stream until close() is called."""
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            while True:
+                entry = self._pending.get()
+                if entry is None:
+                    return
+                f.write(json.dumps(entry) + "\n")
+                with self._lock:
+                    self.recorded += 1
+                if self._pending.empty():
+                    # Make everything so far readable without waiting for close()
+                    f.flush()
+    
+    def close(self):
+        """Write the remaining entries and close the cassette file."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._pending.put(None)
+            writer.join()
+            atexit.unregister(self.close)
+    
+    def _next_entry(self, model_name: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Get the next recorded response for a prompt; repeats cycle through the recordings."""
+        key = prompt_hash(model_name, prompt)
+        with self._lock:
+            recordings = self._entries.get(key)
+            if not recordings:
+                self.misses += 1
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.hits += 1
+            return recordings[position % len(recordings)]
+    
+    async def replay(self, model_name: str, prompt: str) -> str:
+        """Serve a recorded response with scaled timing."""
+        entry = self._next_entry(model_name, prompt)
+        if entry is None:
+            raise LookupError(f"No cassette entry for prompt {prompt_hash(model_name, prompt)}")
+        if self.speed:
+            await asyncio.sleep(entry["latency"] * self.speed)
+        return entry["response"]
+    
+    async def replay_stream(self, model_name: str, prompt: str) -> AsyncGenerator[str, None]:
+        """Serve a recorded response line by line, spreading the scaled latency across lines."""
+        entry = self._next_entry(model_name, prompt)
+        if entry is None:
+            raise LookupError(f"No cassette entry for prompt {prompt_hash(model_name, prompt)}")
+        lines = entry["response"].splitlines(keepends=True) or [""]
+        delay = entry["latency"] * self.speed / len(lines)
+        for line in lines:
+            if delay:
+                await asyncio.sleep(delay)
+            yield line
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get record/replay counters."""
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recorded": self.recorded,
+            "pending": self._pending.qsize(),
+            "replay_hits": self.hits,
+            "replay_misses": self.misses,
+            "prompts_loaded": len(self._entries)
+        }
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the process-wide cassette, or None when LLM_CASSETTE_MODE is off."""
+    global _cassette
+    if config.LLM_CASSETTE_MODE not in ("record", "replay"):
+        return None
+    with _cassette_lock:
+        if _cassette is None or _cassette.mode != config.LLM_CASSETTE_MODE:
+            if _cassette is not None:
+                _cassette.close()
+            _cassette = Cassette(config.LLM_CASSETTE_MODE, config.LLM_CASSETTE_PATH, config.LLM_REPLAY_SPEED)
+        return _cassette
+
+def close_cassette():
+    """Finish writing the process-wide cassette, if one is recording."""
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+
+def diff_cassettes(before_path: str, after_path: str) -> Dict[str, Any]:
+    """Compare two cassettes by prompt hash: added, removed and changed responses, and latency."""
+    before, after = load_cassette(before_path), load_cassette(after_path)
+    shared = before.keys() & after.keys()
+    changed = [key for key in shared if before[key][0]["response"] != after[key][0]["response"]]
+    
+    def total_latency(entries):
+        return round(sum(e["latency"] for recordings in entries.values() for e in recordings), 3)
+    
+    return {
+        "prompts_before": len(before),
+        "prompts_after": len(after),
+        "only_before": sorted(before.keys() - after.keys()),
+        "only_after": sorted(after.keys() - before.keys()),
+        "changed_responses": sorted(changed),
+        "total_latency_before": total_latency(before),
+        "total_latency_after": total_latency(after)
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "diff":
+        print("Usage: python -m app.agents.cassette diff <before.jsonl.gz> <after.jsonl.gz>")
+        sys.exit(1)
+    print(json.dumps(diff_cassettes(sys.argv[2], sys.argv[3]), indent=2))
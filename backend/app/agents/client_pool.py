@@ -0,0 +1,164 @@
+"""
+Pool of isolated Gemini clients keyed by API key.
+
+Each API key gets its own client instances instead of going through the
+process-global genai.configure, so tenants never share credentials. Clients
+are reused across requests, evicted least-recently-used, and carry per-key
+concurrency and request-rate limits.
+
+The SDK has no public API for per-key clients, so this module uses its
+internals (client._ClientManager and GenerativeModel._client/_async_client).
+They are checked on first use against SUPPORTED_SDK_VERSION, the version
+pinned in requirements.txt, and a missing one raises UnsupportedSDKError.
+"""
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+import asyncio
+import hashlib
+import threading
+
+from .rate_limiter import KeyRateLimiter, estimate_tokens
+from ..cache import LRUCache
+from .. import config
+
+# google-generativeai release whose internals this module was written against
+SUPPORTED_SDK_VERSION = "0.3.2"
+
+class UnsupportedSDKError(RuntimeError):
+    """The installed Gemini SDK lacks the internals needed for per-key clients."""
+
+def _sdk_internal(owner, name: str, where: str):
+    """Get a private SDK attribute, or fail with an error that names the version to install."""
+    if not hasattr(owner, name):
+        genai, _ = load_sdk()
+        raise UnsupportedSDKError(
+            f"google-generativeai {getattr(genai, '__version__', 'unknown')} has no {where}.{name}; "
+            f"per-key Gemini clients need google-generativeai=={SUPPORTED_SDK_VERSION} (see requirements.txt)"
+        )
+    return getattr(owner, name)
+
+def load_sdk():
+    """
+    Import the Gemini SDK on first use. It is the heaviest import in the app,
+    so keeping it out of module import time shortens cold starts.
+    """
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+    return genai, genai_client
+
+def key_fingerprint(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key, safe to log and report."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+class GeminiClient:
+    """Gemini client instances and limits for a single API key."""
+    
+    def __init__(self, api_key: str, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float):
+        """Set up limits; the isolated SDK clients are created on first use."""
+        self._api_key = api_key
+        self._manager = None
+        self._sync_client = None
+        self._async_client = None
+        self._models = {}
+        
+        self.fingerprint = key_fingerprint(api_key)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.rate_limiter = KeyRateLimiter(
+            requests_per_minute, tokens_per_minute, config.LLM_EXPECTED_OUTPUT_TOKENS
+        )
+        self._semaphore = None
+        self.in_flight = 0
+        self.total_requests = 0
+    
+    def model(self, model_name: str):
+        """Get a reusable google.generativeai.GenerativeModel bound to this key's clients."""
+        model = self._models.get(model_name)
+        if model is None:
+            genai, _ = load_sdk()
+            if self._async_client is None:
+                manager = self._client_manager()
+                self._sync_client = manager.get_default_client("generative")
+                self._async_client = manager.get_default_client("generative_async")
+            model = genai.GenerativeModel(model_name)
+            for name, client in (("_client", self._sync_client), ("_async_client", self._async_client)):
+                _sdk_internal(model, name, "GenerativeModel")
+                setattr(model, name, client)
+            self._models[model_name] = model
+        return model
+    
+    def cache_client(self):
+        """Get this key's context-caching client (SDKs with context caching only)."""
+        return self._client_manager().get_default_client("cache")
+    
+    def _client_manager(self):
+        """Get the SDK client manager configured with this key."""
+        if self._manager is None:
+            _, genai_client = load_sdk()
+            self._manager = _sdk_internal(genai_client, "_ClientManager", "client")()
+            self._manager.configure(api_key=self._api_key)
+        return self._manager
+    
+    @asynccontextmanager
+    async def limit(self, prompt: str):
+        """
+        Hold a concurrency slot and rate-limit budget for one call.
+        The caller reports the response text through the yielded usage dict so
+        the token bucket can be reconciled with the real call size.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        estimated = self.rate_limiter.estimate_call(prompt)
+        usage = {"response": ""}
+        async with self._semaphore:
+            await self.rate_limiter.acquire(estimated)
+            self.in_flight += 1
+            self.total_requests += 1
+            try:
+                yield usage
+            finally:
+                self.in_flight -= 1
+                self.rate_limiter.record_usage(
+                    estimated, estimate_tokens(prompt) + estimate_tokens(usage["response"])
+                )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get usage counters for this key."""
+        return {
+            "key": self.fingerprint,
+            "in_flight": self.in_flight,
+            "total_requests": self.total_requests,
+            "max_concurrency": self.max_concurrency,
+            **self.rate_limiter.stats()
+        }
+
+class GeminiClientPool:
+    """LRU pool of GeminiClient instances, one per API key."""
+    
+    def __init__(self, max_size: int):
+        """Initialize an empty pool."""
+        self._clients = LRUCache(max_size)
+        self._lock = threading.Lock()
+    
+    def get(self, api_key: str) -> GeminiClient:
+        """Get the client for an API key, creating it on first use."""
+        with self._lock:
+            gemini_client = self._clients.get(api_key)
+            if gemini_client is None:
+                gemini_client = GeminiClient(
+                    api_key,
+                    max_concurrency=config.GEMINI_MAX_CONCURRENCY_PER_KEY,
+                    requests_per_minute=config.GEMINI_RPM_PER_KEY,
+                    tokens_per_minute=config.GEMINI_TPM_PER_KEY
+                )
+                self._clients.put(api_key, gemini_client)
+            return gemini_client
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics and per-key usage without exposing API keys."""
+        return {
+            **self._clients.stats(),
+            "keys": [gemini_client.stats() for gemini_client in self._clients.values()]
+        }
+
+# Shared by all agents in the process
+gemini_client_pool = GeminiClientPool(config.GEMINI_CLIENT_POOL_SIZE)
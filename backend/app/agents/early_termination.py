@@ -0,0 +1,110 @@
+"""
+Adaptive early termination of plans.
+
+After each executed step the orchestrator asks whether the goal is already
+met. Word overlap alone can't tell: results restate the plan, and the plan
+restates the goal. So the goal is only met when a one-word LLM check says so.
+Goal coverage is the cheap filter in front of that check: of the goal's
+content words that the plan does not restate, the share that appear in the
+successful step results so far. The check is skipped while coverage is below
+EARLY_TERMINATION_COVERAGE, i.e. while results visibly miss parts of the goal.
+
+Once the goal is met, the remaining steps that can be skipped are dropped:
+
+- "conservative": only steps the planner tagged as optional.
+- "adaptive": also wrap-up steps (summarize, present, double-check...) and
+  steps whose content words are already covered by earlier results. Their
+  work is left to the final synthesis.
+"""
+from typing import Dict, Any, List
+import re
+import threading
+
+from .planning_agent import OPTIONAL_TAG, strip_plan_tags
+
+# Step wording that restates or packages earlier work, which synthesis does anyway
+WRAP_UP_HINTS = (
+    "summarize", "summarise", "summary", "compile", "present", "finalize", "format",
+    "restate", "recap", "conclude", "conclusion", "double-check", "verify", "review the",
+    "deliver", "final answer", "final response", "write up"
+)
+_WRAP_UP_RE = re.compile(r"\b(?:" + "|".join(re.escape(hint) for hint in WRAP_UP_HINTS) + r")\b")
+
+_STOPWORDS = frozenset(
+    "the a an and or of to in on for with about from into by at as is are was were be been "
+    "this that these those it its what which who how why when where can could should would "
+    "please me my i you your we our they their tell give explain some any all more most "
+    "step steps using use information relevant based".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def content_words(text: str) -> set:
+    """Lowercased words of text without stopwords and very short words."""
+    return {word for word in _WORD_RE.findall(text.lower()) if len(word) > 2 and word not in _STOPWORDS}
+
+def _results_words(results: List[Dict[str, Any]]) -> set:
+    words = set()
+    for result in results:
+        if result.get("success"):
+            words |= content_words(f"{result.get('result', '')} {result.get('observation', '')}")
+    return words
+
+def goal_coverage(goal: str, results: List[Dict[str, Any]], plan: List[str]) -> float:
+    """
+    Share of the goal's content words that the plan does not restate and that appear
+    in successful step results; 1.0 when the plan restates every goal word.
+    """
+    plan_words = content_words(" ".join(strip_plan_tags(step) for step in plan))
+    goal_words = content_words(goal) - plan_words
+    if not goal_words:
+        return 1.0
+    return len(goal_words & _results_words(results)) / len(goal_words)
+
+def is_skippable(step: str, results: List[Dict[str, Any]], mode: str) -> bool:
+    """Whether a remaining step may be dropped once the goal is met, in the given mode."""
+    step_lower = step.lower()
+    if OPTIONAL_TAG in step_lower:
+        return True
+    if mode != "adaptive":
+        return False
+    if _WRAP_UP_RE.search(step_lower):
+        return True
+    step_words = content_words(strip_plan_tags(step_lower))
+    return bool(step_words) and len(step_words & _results_words(results)) / len(step_words) >= 0.8
+
+class EarlyTerminationStats:
+    """Process-wide counters of steps and LLM calls saved by early termination."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.terminated = 0
+        self.planned_steps = 0
+        self.skipped_steps = 0
+        self.llm_checks = 0
+    
+    def record(self, planned_steps: int, skipped_steps: int, llm_checks: int):
+        """Record one executed plan."""
+        with self._lock:
+            self.requests += 1
+            self.terminated += 1 if skipped_steps else 0
+            self.planned_steps += planned_steps
+            self.skipped_steps += skipped_steps
+            self.llm_checks += llm_checks
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the counters, the skip rate and the net LLM calls saved."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "terminated_early": self.terminated,
+                "planned_steps": self.planned_steps,
+                "skipped_steps": self.skipped_steps,
+                "skip_rate": round(self.skipped_steps / self.planned_steps, 4) if self.planned_steps else None,
+                "llm_checks": self.llm_checks,
+                "llm_calls_saved": self.skipped_steps - self.llm_checks
+            }
+
+# Shared across orchestrators
+early_termination_stats = EarlyTerminationStats()
@@ -3,34 +3,20 @@ Ethics Agent responsible for ethical review using Constitutional AI principles.
 """
 from .base_agent import BaseAgent
 from ..tools.tool_registry import ToolRegistry
-from typing import Dict, Any
+from .safety_screen import safety_screen
+from .review_stats import safety_screen_stats
+from .prompts import PromptTemplate
+from ..tracing import traced, current_span
+from .. import config
+from typing import Dict, Any, List
+import asyncio
+import random
 
-class EthicsAgent(BaseAgent):
-    """Agent responsible for ethical review and Constitutional AI principles."""
-    
-    def __init__(self, api_key: str):
-        """Initialize the Ethics Agent."""
-        super().__init__(api_key)
-        self.agent_name = "Ethics & Safety Review Agent"
-        self.tool_registry = ToolRegistry()
-    
-    async def review_plan_or_output(self, content: str, content_type: str = "plan") -> Dict[str, Any]:
-        """
-        Review a plan or output against constitutional AI principles.
-        Returns approval status and any suggested revisions.
-        """
-        # Retrieve relevant constitutional principles
-        constitution = self.tool_registry.execute_tool("constitution_retriever", {"query": content})
-        
-        prompt = f"""
+ETHICS_REVIEW_PROMPT = PromptTemplate(
+    role="ethics_review",
+    prefix="""
 You are the Ethics & Safety Review Agent in a Multi-Agent AI system. Your role is to review plans and outputs against Constitutional AI principles to ensure they are ethical, safe, and beneficial.
 
-Content to review ({content_type}):
-{content}
-
-Constitutional Principles to Consider:
-{constitution}
-
 Your task:
 1. Carefully analyze the content against the constitutional principles
 2. Identify any potential ethical concerns, safety issues, or harmful implications
@@ -62,7 +48,137 @@ Suggestions for improvement (if applicable):
 
 Final recommendation:
 [Your final recommendation for how to proceed]
+
+Constitutional Principles to Consider:
+{constitution}
+""",
+    body="""
+Content to review ({content_type}):
+{content}
 """
+)
+
+# Worst status wins when chunk reviews are combined
+STATUS_SEVERITY = {"approved": 0, "needs_revision": 1, "error": 2, "rejected": 3}
+
+def _split_blocks(content: str) -> List[str]:
+    """Split content into paragraphs, keeping fenced code blocks whole."""
+    blocks, current, in_code = [], [], False
+    for line in content.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        if not line.strip() and not in_code:
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+def split_review_chunks(content: str, chunk_chars: int, overlap: int) -> List[str]:
+    """
+    Split content into chunks of about chunk_chars at paragraph and code-block boundaries.
+    Each chunk repeats up to `overlap` characters from the end of the previous one (whole
+    blocks where they fit), so content that straddles a boundary is seen whole at least once. Blocks longer than
+    chunk_chars are cut by lines, then by characters.
+    """
+    blocks = []
+    for block in _split_blocks(content):
+        while len(block) > chunk_chars:
+            cut = block.rfind("\n", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            blocks.append(block[:cut])
+            block = block[cut:].lstrip("\n")
+        blocks.append(block)
+    
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        if current and size + len(block) > chunk_chars:
+            chunks.append("\n\n".join(current))
+            carried, carried_size = [], 0
+            for previous in reversed(current):
+                if carried_size + len(previous) > overlap or carried_size + len(previous) + len(block) > chunk_chars:
+                    break
+                carried.insert(0, previous)
+                carried_size += len(previous) + 2
+            if not carried and overlap > 0:
+                # The last block is longer than the overlap: carry its tail, from a word boundary
+                tail = current[-1][-overlap:]
+                tail = tail[tail.find(" ") + 1:] if " " in tail else tail
+                carried, carried_size = [tail], len(tail) + 2
+            current, size = carried, carried_size
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+class EthicsAgent(BaseAgent):
+    """Agent responsible for ethical review and Constitutional AI principles."""
+    
+    def __init__(self, api_key: str):
+        """Initialize the Ethics Agent."""
+        super().__init__(api_key)
+        self.agent_name = "Ethics & Safety Review Agent"
+        self.tool_registry = ToolRegistry()
+        # Optional LRUCache of (content_type, content) -> review, shared in batch runs
+        self.review_cache = None
+    
+    @traced("ethics_review")
+    async def review_plan_or_output(self, content: str, content_type: str = "plan") -> Dict[str, Any]:
+        """
+        Review a plan or output against constitutional AI principles.
+        Returns approval status and any suggested revisions.
+        """
+        current_span().set(content_type=content_type, content_chars=len(content))
+        if self.review_cache is not None:
+            cached = self.review_cache.get((content_type, content))
+            if cached is not None:
+                current_span().set(cache="hit")
+                return dict(cached)
+        
+        screening = None
+        if config.SAFETY_SCREEN_ENABLED:
+            screening = safety_screen.screen(content)
+            safety_screen_stats.record_screen(screening["decision"])
+            current_span().set(prescreen=screening["decision"], prescreen_risk=screening["risk"])
+            audit = screening["decision"] != "review" and random.random() < config.SAFETY_SCREEN_AUDIT_RATE
+            if screening["decision"] != "review" and not audit:
+                return self._prescreen_review(screening)
+        
+        chunks = None
+        if (config.CHUNKED_ETHICS_REVIEW and content_type == "response"
+                and len(content) > config.ETHICS_REVIEW_CHUNK_CHARS):
+            chunks = split_review_chunks(
+                content, config.ETHICS_REVIEW_CHUNK_CHARS, config.ETHICS_REVIEW_CHUNK_OVERLAP
+            )
+        
+        if chunks and len(chunks) > 1:
+            current_span().set(chunks=len(chunks))
+            reviews = await asyncio.gather(*(
+                self._review_content(chunk, f"{content_type}, part {index} of {len(chunks)}")
+                for index, chunk in enumerate(chunks, 1)
+            ))
+            review = self._combine_reviews(reviews)
+        else:
+            review = await self._review_content(content, content_type)
+        if review["status"] == "error":
+            return review
+        
+        if screening is not None:
+            safety_screen_stats.record_review(screening["decision"], review["status"], audit=audit)
+        if self.review_cache is not None:
+            self.review_cache.put((content_type, content), review)
+        return review
+    
+    async def _review_content(self, content: str, content_type: str) -> Dict[str, Any]:
+        """Review one piece of content with the LLM, against the principles retrieved for it."""
+        # Retrieve relevant constitutional principles
+        constitution = self.tool_registry.execute_tool("constitution_retriever", {"query": content})
+        
+        prompt = ETHICS_REVIEW_PROMPT.render(content_type=content_type, content=content, constitution=constitution)
 
         try:
             response = await self._generate_content(prompt)
@@ -76,6 +192,38 @@ Final recommendation:
                 "approved": False
             }
     
+    def _combine_reviews(self, reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine chunk reviews: the worst status wins and concerns from every chunk are kept."""
+        status = max((review["status"] for review in reviews), key=lambda s: STATUS_SEVERITY.get(s, 1))
+        flagged = [
+            (index, review) for index, review in enumerate(reviews, 1)
+            if review["status"] == status
+        ]
+        return {
+            "status": status,
+            "reasoning": " ".join(
+                f"Part {index}: {review['reasoning']}" for index, review in flagged
+            ) if status != "approved" else flagged[0][1]["reasoning"],
+            "concerns": list(dict.fromkeys(c for review in reviews for c in review["concerns"])),
+            "suggestions": list(dict.fromkeys(s for review in reviews for s in review["suggestions"])),
+            "approved": status == "approved",
+            "chunks": len(reviews)
+        }
+    
+    def _prescreen_review(self, screening: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a rejection from a confident local pre-screen decision."""
+        return {
+            "status": "rejected",
+            "reasoning": (
+                "The content clearly conflicts with the constitutional principles of "
+                f"{', '.join(section.title() for section in screening['sections'])}."
+            ),
+            "concerns": [f"Matched high-risk phrase: {phrase}" for phrase in screening["matched"]],
+            "suggestions": ["Rephrase the request without harmful intent"],
+            "approved": False,
+            "prescreen": screening
+        }
+    
     def _parse_ethics_review(self, response: str) -> Dict[str, Any]:
         """Parse the ethics review response into structured data."""
         result = {
@@ -2,37 +2,27 @@
 Execution Agent responsible for tool execution using ReAct framework.
 """
 from .base_agent import BaseAgent
+from .planning_agent import REASONING_ONLY_TAG
+from .prompts import PromptTemplate
 from ..tools.tool_registry import ToolRegistry
-from typing import Dict, Any, List
+from ..tracing import traced
+from .. import config
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import json
 import re
 
-class ExecutionAgent(BaseAgent):
-    """Agent responsible for executing individual steps using the ReAct framework."""
-    
-    def __init__(self, api_key: str):
-        """Initialize the Execution Agent."""
-        super().__init__(api_key)
-        self.agent_name = "Execution Agent"
-        self.tool_registry = ToolRegistry()
-    
-    async def execute_step(self, step: str, context: str = "", available_tools: List[str] = None) -> Dict[str, Any]:
-        """
-        Execute a single step from the plan using ReAct (Reason + Act) framework.
-        Returns the result of the step execution.
-        """
-        if available_tools is None:
-            available_tools = list(self.tool_registry.get_available_tools().keys())
-        
-        tools_description = self._format_tools_description(available_tools)
-        
-        prompt = f"""
-You are the Execution Agent in a Multi-Agent AI system. You use the ReAct (Reason + Act) framework to execute tasks step by step.
-
-Current Step to Execute: {step}
-Context: {context}
+# Words in a step that suggest it will need one of the registered tools
+TOOL_HINTS = (
+    "search", "look up", "lookup", "browse", "latest", "current", "news",
+    "code", "script", "program", "run ", "execute", "calculate", "compute",
+    "query", "sql", "database", "dataset", "constitution", "principle", "retrieve", "fetch"
+)
 
-Available Tools:
-{tools_description}
+EXECUTE_STEP_PROMPT = PromptTemplate(
+    role="execution",
+    prefix="""
+You are the Execution Agent in a Multi-Agent AI system. You use the ReAct (Reason + Act) framework to execute tasks step by step.
 
 Instructions:
 1. Follow the ReAct pattern: Thought → Action → Observation
@@ -53,11 +43,108 @@ Parameters: [tool parameters as JSON if using a tool, or "none"]
 Observation: [What you learned or accomplished from this step]
 
 Result: [Clear summary of what was completed in this step]
+
+Available Tools:
+{tools_description}
+""",
+    body="""
+Current Step to Execute: {step}
+Context: {context}
+"""
+)
+
+EXECUTE_REASONING_STEPS_PROMPT = PromptTemplate(
+    role="execution_batch",
+    prefix="""
+You are the Execution Agent in a Multi-Agent AI system. The consecutive steps below need no tools and can be completed with reasoning alone.
+
+Instructions:
+1. Complete each step in order; later steps may build on the results of earlier ones
+2. Think about what each step requires before giving its result
+3. Provide a clear, self-contained result for every step
+
+Use this exact format, with one block per step:
+
+Step 1:
+Thought: [Your reasoning about how to approach this step]
+Result: [Clear summary of what was completed in this step]
+
+Step 2:
+Thought: [...]
+Result: [...]
+""",
+    body="""
+Steps to Execute:
+{steps_text}
+
+Context: {context}
 """
+)
+
+class ToolCallScanner:
+    """Incrementally scans a streamed ReAct response for complete Tool/Parameters pairs."""
+    
+    def __init__(self):
+        """Initialize an empty scanner."""
+        self._pending = ""
+        self._tool_name = None
+    
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk of text; returns the (tool_name, parameters) calls whose lines it completed."""
+        self._pending += chunk
+        *lines, self._pending = self._pending.split('\n')
+        return self._scan(lines)
+    
+    def close(self) -> List[Tuple[str, str]]:
+        """Scan whatever partial line remains at the end of the stream."""
+        lines, self._pending = [self._pending], ""
+        return self._scan(lines)
+    
+    def _scan(self, lines: List[str]) -> List[Tuple[str, str]]:
+        """Collect the tool calls in a batch of complete lines."""
+        calls = []
+        for line in lines:
+            line = line.strip()
+            
+            if line.startswith("Tool:"):
+                tool_text = line.split("Tool:", 1)[1].strip()
+                self._tool_name = tool_text if tool_text.lower() != "none" else None
+            
+            elif line.startswith("Parameters:") and self._tool_name:
+                params_text = line.split("Parameters:", 1)[1].strip()
+                if params_text.lower() != "none":
+                    calls.append((self._tool_name, params_text))
+        
+        return calls
 
+class ExecutionAgent(BaseAgent):
+    """Agent responsible for executing individual steps using the ReAct framework."""
+    
+    def __init__(self, api_key: str):
+        """Initialize the Execution Agent."""
+        super().__init__(api_key)
+        self.agent_name = "Execution Agent"
+        self.tool_registry = ToolRegistry()
+    
+    @traced("execute_step")
+    async def execute_step(self, step: str, context: str = "", available_tools: List[str] = None) -> Dict[str, Any]:
+        """
+        Execute a single step from the plan using ReAct (Reason + Act) framework.
+        Returns the result of the step execution.
+        """
+        prompt = self.step_prompt(step, context, available_tools)
+        
         try:
+            if config.STREAM_EXECUTION:
+                return await self._execute_streamed(prompt, step)
             response = await self._generate_content(prompt)
-            return self._parse_execution_result(response, step)
+            # Tools can block (e.g. SQL queries), so they run off the event loop
+            scanner = ToolCallScanner()
+            tool_observations = [
+                await asyncio.to_thread(self._run_tool, *tool_call)
+                for tool_call in scanner.feed(response) + scanner.close()
+            ]
+            return self._parse_execution_result(response, step, tool_observations)
         except Exception as e:
             return {
                 "step": step,
@@ -67,6 +154,125 @@ Result: [Clear summary of what was completed in this step]
                 "observation": f"Technical error: {str(e)}"
             }
     
+    def step_prompt(self, step: str, context: str = "", available_tools: List[str] = None) -> str:
+        """Render the ReAct prompt for a step."""
+        if available_tools is None:
+            available_tools = list(self.tool_registry.get_available_tools().keys())
+        
+        tools_description = self._format_tools_description(available_tools)
+        return EXECUTE_STEP_PROMPT.render(tools_description=tools_description, step=step, context=context)
+    
+    async def _execute_streamed(self, prompt: str, step: str) -> Dict[str, Any]:
+        """
+        Stream the ReAct response and dispatch each tool call as soon as its
+        Tool/Parameters lines arrive, overlapping tool latency with generation.
+        """
+        scanner = ToolCallScanner()
+        chunks = []
+        tool_tasks = []
+        
+        def dispatch(tool_calls: List[Tuple[str, str]]):
+            for tool_call in tool_calls:
+                tool_tasks.append(asyncio.create_task(asyncio.to_thread(self._run_tool, *tool_call)))
+        
+        try:
+            async for chunk in self._generate_content_stream(prompt):
+                chunks.append(chunk)
+                dispatch(scanner.feed(chunk))
+            dispatch(scanner.close())
+            tool_observations = await asyncio.gather(*tool_tasks)
+        finally:
+            # If the stream failed, don't leave dispatched tool calls running unobserved
+            for task in tool_tasks:
+                task.cancel()
+            await asyncio.gather(*tool_tasks, return_exceptions=True)
+        return self._parse_execution_result("".join(chunks), step, list(tool_observations))
+    
+    def _run_tool(self, tool_name: str, params_text: str) -> str:
+        """Execute a parsed tool call and format its output as an observation."""
+        try:
+            params = json.loads(params_text) if params_text.startswith('{') else {"query": params_text}
+            tool_result = self.tool_registry.execute_tool(tool_name, params)
+            if self.tool_registry.artifacts is not None:
+                # Large outputs are referenced by handle instead of copied into observations
+                tool_result = self.tool_registry.artifacts.reference(str(tool_result), source=tool_name)
+            return f"Tool {tool_name} executed: {tool_result}\n"
+        except Exception as e:
+            return f"Tool execution failed: {str(e)}\n"
+    
+    def is_reasoning_only(self, step: str) -> bool:
+        """Check whether a step is tagged as, or looks like, pure reasoning without tools."""
+        step_lower = step.lower()
+        if REASONING_ONLY_TAG in step_lower:
+            return True
+        return not any(hint in step_lower for hint in TOOL_HINTS)
+    
+    @traced("execute_reasoning_steps")
+    async def execute_reasoning_steps(self, steps: List[str], context: str = "") -> List[Dict[str, Any]]:
+        """
+        Execute a run of reasoning-only steps in a single LLM call.
+        Returns one result dict per step, in the same shape as execute_step.
+        """
+        steps_text = "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+        
+        prompt = EXECUTE_REASONING_STEPS_PROMPT.render(steps_text=steps_text, context=context)
+        
+        try:
+            response = await self._generate_content(prompt)
+            return self._parse_batched_results(response, steps)
+        except Exception as e:
+            return [{
+                "step": step,
+                "success": False,
+                "result": f"Error executing step: {str(e)}",
+                "tool_used": None,
+                "observation": f"Technical error: {str(e)}"
+            } for step in steps]
+    
+    def _parse_batched_results(self, response: str, original_steps: List[str]) -> List[Dict[str, Any]]:
+        """Split a batched response back into per-step result dicts."""
+        results = [{
+            "step": step,
+            "success": True,
+            "result": "",
+            "tool_used": None,
+            "observation": "",
+            "thought": ""
+        } for step in original_steps]
+        
+        current = None
+        current_section = None
+        
+        for line in response.split('\n'):
+            line = line.strip()
+            
+            header = re.match(r'^\**Step\s+(\d+)\**\s*:?\**$', line, re.IGNORECASE)
+            if header:
+                index = int(header.group(1)) - 1
+                current = results[index] if 0 <= index < len(results) else None
+                current_section = None
+            
+            elif current is None:
+                continue
+            
+            elif line.startswith("Thought:"):
+                current_section = "thought"
+                current["thought"] = line.split("Thought:", 1)[1].strip()
+            
+            elif line.startswith("Result:"):
+                current_section = "result"
+                current["result"] = line.split("Result:", 1)[1].strip()
+            
+            elif line and current_section:
+                current[current_section] = f"{current[current_section]} {line}".strip()
+        
+        # Ensure every step has a result
+        for result in results:
+            if not result["result"]:
+                result["result"] = f"Completed step: {result['step']}"
+        
+        return results
+    
     def _format_tools_description(self, available_tools: List[str]) -> str:
         """Format the available tools for the prompt."""
         tools_info = self.tool_registry.get_available_tools()
@@ -79,8 +285,14 @@ Result: [Clear summary of what was completed in this step]
         
         return description
     
-    def _parse_execution_result(self, response: str, original_step: str) -> Dict[str, Any]:
-        """Parse the execution response into structured data."""
+    def _parse_execution_result(self, response: str, original_step: str,
+                                tool_observations: List[str] = ()) -> Dict[str, Any]:
+        """
+        Parse the execution response into structured data.
+        Tool calls are run by the caller (off the event loop); their observations are
+        passed in, in call order, and placed at their Parameters lines.
+        """
+        tool_observations = list(tool_observations)
         result = {
             "step": original_step,
             "success": True,
@@ -112,17 +324,9 @@ Result: [Clear summary of what was completed in this step]
                     result["tool_used"] = tool_text
             
             elif line.startswith("Parameters:"):
-                if result["tool_used"]:
-                    params_text = line.split("Parameters:", 1)[1].strip()
-                    if params_text.lower() != "none":
-                        try:
-                            # Try to execute the tool
-                            import json
-                            params = json.loads(params_text) if params_text.startswith('{') else {"query": params_text}
-                            tool_result = self.tool_registry.execute_tool(result["tool_used"], params)
-                            result["observation"] += f"Tool {result['tool_used']} executed: {tool_result}\n"
-                        except Exception as e:
-                            result["observation"] += f"Tool execution failed: {str(e)}\n"
+                params_text = line.split("Parameters:", 1)[1].strip()
+                if result["tool_used"] and params_text.lower() != "none" and tool_observations:
+                    result["observation"] += tool_observations.pop(0)
             
             elif line.startswith("Observation:"):
                 current_section = "observation"
@@ -148,7 +352,7 @@ Result: [Clear summary of what was completed in this step]
         if not result["result"]:
             result["result"] = f"Completed step: {original_step}"
         
-        # Clean up observation
-        result["observation"] = result["observation"].strip()
+        # Clean up observation, keeping any tool output the parser could not place
+        result["observation"] = (result["observation"] + "".join(tool_observations)).strip()
         
         return result
\ No newline at end of file
@@ -0,0 +1,357 @@
+"""
+Asynchronous job mode for long-running orchestrations.
+
+Submitting a job returns its id at once; the orchestration runs on a pool of
+background workers and every event is appended to a per-job JSONL log under
+JOB_DIR. Clients poll the job, or read and follow its events from any offset,
+so a dropped connection loses nothing. Finished jobs are kept for
+JOB_RETENTION_SECONDS. Job files are written by a background thread, in the
+order the changes were made, so persisting events adds no file I/O to the
+event loop; stop() waits for the pending writes.
+
+Jobs belong to the API key they were submitted with (by fingerprint): job
+ids are namespaced per key, and only requests with the same key can read or
+retry a job. API keys themselves are only held in memory, so jobs that were
+queued or running when the process stopped are marked "interrupted" on
+restart and can be retried.
+"""
+from .master_orchestrator import MasterAgentOrchestrator
+from .client_pool import key_fingerprint
+from .rate_limiter import Reservation
+from .. import config
+from typing import Dict, Any, List, AsyncGenerator, Optional, Tuple
+import asyncio
+import atexit
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+
+FINISHED_STATUSES = ("completed", "failed", "interrupted")
+
+def normalize_job_id(job_id: str) -> str:
+    """Make a client-chosen job id safe to use in file names."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", job_id)[:64]
+
+class Job:
+    """One submitted orchestration and its event log."""
+    
+    def __init__(self, job_id: str, owner: str, message: str, conversation_history: List[Dict],
+                 created_at: float = None):
+        """Initialize a queued job owned by an API key fingerprint."""
+        self.job_id = job_id
+        self.owner = owner
+        self.message = message
+        self.conversation_history = conversation_history or []
+        self.status = "queued"
+        self.attempts = 0
+        self.created_at = created_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self.events: List[Dict[str, Any]] = []
+        # Set and replaced whenever an event is appended, to wake followers
+        self.changed = asyncio.Event()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Job metadata, including the final event once finished."""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "message": self.message,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "event_count": len(self.events),
+            "result": self.result
+        }
+
+class JobManager:
+    """Queue, worker pool and on-disk event logs for jobs."""
+    
+    def __init__(self, job_dir: str, workers: int, retention_seconds: float):
+        """Initialize the manager; existing jobs in job_dir are loaded when it starts."""
+        self.job_dir = job_dir
+        self.workers = max(workers, 1)
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[Tuple[str, str], Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._writes: "queue.Queue[Optional[Tuple[str, str, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.write_errors = 0
+    
+    def _path(self, job: Job, suffix: str) -> str:
+        return os.path.join(self.job_dir, f"{job.owner}-{job.job_id}{suffix}")
+    
+    def _write(self, op: str, path: str, text: str = ""):
+        """Queue a file operation for the writer thread; never blocks on file I/O."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="job-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+        self._writes.put((op, path, text))
+    
+    def _write_loop(self):
+        """Apply queued file operations in order until close() is called."""
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            op, path, text = item
+            try:
+                if op == "replace":
+                    with open(path + ".tmp", "w", encoding="utf-8") as f:
+                        f.write(text)
+                    os.replace(path + ".tmp", path)
+                elif op == "append":
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(text)
+                elif op == "remove" and os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                self.write_errors += 1
+    
+    def close(self):
+        """Apply the pending file operations and stop the writer thread."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+            atexit.unregister(self.close)
+    
+    def _save(self, job: Job):
+        """Write the job's metadata atomically."""
+        metadata = job.to_dict()
+        metadata["owner"] = job.owner
+        metadata["conversation_history"] = job.conversation_history
+        self._write("replace", self._path(job, ".json"), json.dumps(metadata))
+    
+    def _append(self, job: Job, event: Dict[str, Any]):
+        """Append an event to the job's log and wake anyone following it."""
+        self._write("append", self._path(job, ".events.jsonl"), json.dumps(event) + "\n")
+        job.events.append(event)
+        job.changed.set()
+        job.changed = asyncio.Event()
+    
+    def _load(self):
+        """Load jobs persisted by earlier runs."""
+        self._loaded = True
+        os.makedirs(self.job_dir, exist_ok=True)
+        for name in os.listdir(self.job_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.job_dir, name), encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except ValueError:
+                continue
+            if not metadata.get("owner"):
+                continue
+            job = Job(
+                metadata["job_id"], metadata["owner"], metadata["message"],
+                metadata.get("conversation_history"), metadata["created_at"]
+            )
+            for field in ("status", "attempts", "started_at", "finished_at", "error", "result"):
+                setattr(job, field, metadata.get(field))
+            events_path = self._path(job, ".events.jsonl")
+            if os.path.exists(events_path):
+                with open(events_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            job.events.append(json.loads(line))
+                        except ValueError:
+                            pass  # Partially written last line
+            if job.status not in FINISHED_STATUSES:
+                job.status = "interrupted"
+                job.error = "The server restarted before the job finished. Retry it to run it again."
+                job.finished_at = time.time()
+                self._save(job)
+            self._jobs[(job.owner, job.job_id)] = job
+    
+    def _ensure_started(self):
+        """Start the workers on the running event loop (again, if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if not self._loaded:
+            self._load()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+    
+    async def start(self):
+        """Load persisted jobs and start the worker pool."""
+        self._ensure_started()
+    
+    async def stop(self):
+        """Stop the workers and finish writing job files; running jobs are marked interrupted on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        await asyncio.to_thread(self.close)
+    
+    async def submit(self, message: str, conversation_history: List[Dict], api_key: str,
+                     job_id: Optional[str] = None, reservation: Optional[Reservation] = None) -> Job:
+        """
+        Queue a job for an API key and return it without waiting; the job runs on the
+        admission reservation, if any. Resubmitting a job_id already used with the same
+        key returns that job instead of running it again.
+        """
+        self._ensure_started()
+        owner = key_fingerprint(api_key)
+        if job_id:
+            job_id = normalize_job_id(job_id)
+            if (owner, job_id) in self._jobs:
+                if reservation is not None:
+                    reservation.release()
+                return self._jobs[(owner, job_id)]
+        job = Job(job_id or uuid.uuid4().hex, owner, message, conversation_history)
+        self._jobs[(owner, job.job_id)] = job
+        self._save(job)
+        self._queue.put_nowait((job, api_key, reservation))
+        return job
+    
+    async def retry(self, job_id: str, api_key: str) -> Optional[Job]:
+        """
+        Queue a failed or interrupted job of this key again; completed jobs are returned as
+        they are. The previous attempt's result and events are discarded.
+        """
+        self._ensure_started()
+        job = self.get(job_id, api_key)
+        if job is None or job.status not in ("failed", "interrupted"):
+            return job
+        job.status = "queued"
+        job.error = None
+        job.result = None
+        job.finished_at = None
+        job.events = []
+        self._write("replace", self._path(job, ".events.jsonl"))
+        self._save(job)
+        self._queue.put_nowait((job, api_key, None))
+        return job
+    
+    def get(self, job_id: str, api_key: str) -> Optional[Job]:
+        """Get a job by id, if it was submitted with this API key."""
+        if not self._loaded:
+            self._load()
+        return self._jobs.get((key_fingerprint(api_key), normalize_job_id(job_id)))
+    
+    async def follow(self, job: Job, offset: int = 0) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield the job's events from offset, waiting for new ones until the job finishes."""
+        while True:
+            changed = job.changed
+            while offset < len(job.events):
+                yield {"offset": offset, **job.events[offset]}
+                offset += 1
+            if job.status in FINISHED_STATUSES:
+                return
+            await changed.wait()
+    
+    async def _worker(self):
+        """Run queued jobs one at a time."""
+        while True:
+            job, api_key, reservation = await self._queue.get()
+            try:
+                await self._run(job, api_key, reservation)
+            finally:
+                if reservation is not None:
+                    reservation.release()
+                self._queue.task_done()
+    
+    async def _run(self, job: Job, api_key: str, reservation: Optional[Reservation] = None):
+        """Run one job through the orchestrator, persisting every event."""
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = time.time()
+        self._save(job)
+        if job.attempts > 1:
+            self._append(job, {
+                "type": "status",
+                "agent": "System",
+                "message": f"Retrying job (attempt {job.attempts})...",
+                "is_final": False
+            })
+        
+        try:
+            orchestrator = MasterAgentOrchestrator(api_key)
+            async for event in orchestrator.handle_message(
+                message=job.message,
+                history=list(job.conversation_history),
+                reservation=reservation
+            ):
+                self._append(job, event)
+                if event.get("is_final"):
+                    job.result = event
+        except asyncio.CancelledError:
+            job.status = "interrupted"
+            job.error = "The job was stopped before it finished."
+            job.finished_at = time.time()
+            self._save(job)
+            raise
+        except Exception as e:
+            self._append(job, {
+                "type": "error",
+                "agent": "System",
+                "message": f"An error occurred: {str(e)}",
+                "is_final": True
+            })
+            job.error = str(e)
+        
+        if job.result and job.result.get("type") == "error":
+            job.error = job.error or job.result.get("message")
+        job.status = "failed" if job.error else "completed"
+        job.finished_at = time.time()
+        self._save(job)
+        job.changed.set()
+    
+    async def _cleanup_loop(self):
+        """Periodically delete finished jobs older than the retention period."""
+        while True:
+            self.cleanup()
+            await asyncio.sleep(min(max(self.retention_seconds / 10, 1), 300))
+    
+    def cleanup(self) -> int:
+        """Delete finished jobs past retention; returns how many were removed."""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job for job in self._jobs.values()
+            if job.status in FINISHED_STATUSES and job.finished_at and job.finished_at < cutoff
+        ]
+        for job in expired:
+            for suffix in (".json", ".events.jsonl"):
+                self._write("remove", self._path(job, suffix))
+            del self._jobs[(job.owner, job.job_id)]
+        return len(expired)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get job counts by status and the queue depth."""
+        statuses = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "running": self._loop is not None,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses,
+            "pending_writes": self._writes.qsize(),
+            "write_errors": self.write_errors,
+            "retention_seconds": self.retention_seconds
+        }
+
+# Shared by the /jobs endpoints
+job_manager = JobManager(config.JOB_DIR, config.JOB_WORKERS, config.JOB_RETENTION_SECONDS)
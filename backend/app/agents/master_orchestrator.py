@@ -2,11 +2,87 @@
 Master Agent Orchestrator - The Super Agent that coordinates all other agents.
 """
 from .base_agent import BaseAgent
-from .planning_agent import PlanningAgent
+from .planning_agent import PlanningAgent, strip_plan_tags
 from .execution_agent import ExecutionAgent
 from .ethics_agent import EthicsAgent
-from typing import Dict, Any, List, AsyncGenerator
+from .review_stats import fused_review_stats
+from .plan_cache import plan_cache
+from .client_pool import key_fingerprint
+from .early_termination import early_termination_stats, goal_coverage, is_skippable
+from .step_queue import get_step_queue, step_task
+from .prompts import PromptTemplate
+from ..tools.artifact_store import ArtifactStore
+from .rate_limiter import estimate_tokens, activate_reservation, Reservation
+from ..cache import LRUCache
+from ..tracing import trace, traced, span, current_span
+from ..profiler import profiler
+from .. import config
+from typing import Dict, Any, List, AsyncGenerator, Tuple
 import asyncio
+import random
+
+# Upper bound on LLM calls per orchestration: plan, plan review, plan revision,
+# up to 7 steps, synthesis and final review
+MAX_ORCHESTRATION_CALLS = 12
+# Approximate size of the fixed instructions in each agent prompt
+PROMPT_OVERHEAD_TOKENS = 600
+
+SYNTHESIZE_PROMPT = PromptTemplate(
+    role="synthesis",
+    prefix="""
+You are the Master Agent Orchestrator synthesizing a final response after coordinating multiple specialized agents.
+
+Your task:
+1. Synthesize all the work done into a coherent, helpful response
+2. Address the original user request directly
+3. Be natural and conversational, not overly technical
+4. Don't mention the internal agent workflow unless relevant
+5. Focus on providing value to the user
+""",
+    body="""
+Original User Request: {original_message}
+
+Plan that was created:
+{plan_text}
+
+Work completed by Execution Agent:
+{completed_work}
+
+Ethics Review Status: {review_status}
+
+{steering_notes}
+{history_context}
+
+Create a clear, helpful response that directly addresses the user's request:
+"""
+)
+
+GOAL_CHECK_PROMPT = PromptTemplate(
+    role="goal_check",
+    prefix="""
+You are checking whether the work done so far already fully answers a user's request.
+Answer with a single word: YES if nothing important is missing, otherwise NO.
+""",
+    body="""
+User Request: {goal}
+
+Work completed so far:
+{completed_work}
+
+Answer (YES or NO):
+"""
+)
+
+def estimate_orchestration_cost(message: str, history: List[Dict] = None) -> Tuple[int, int]:
+    """Estimate the (calls, tokens) a full orchestration of this message may consume."""
+    history_text = "".join(str(entry.get("content", "")) for entry in (history or [])[-5:])
+    per_call = (
+        PROMPT_OVERHEAD_TOKENS
+        + estimate_tokens(message)
+        + estimate_tokens(history_text)
+        + config.LLM_EXPECTED_OUTPUT_TOKENS
+    )
+    return MAX_ORCHESTRATION_CALLS, MAX_ORCHESTRATION_CALLS * per_call
 
 class MasterAgentOrchestrator(BaseAgent):
     """
@@ -14,8 +90,11 @@ class MasterAgentOrchestrator(BaseAgent):
     This is the 'Super Agent' that manages the entire multi-agent workflow.
     """
     
-    def __init__(self, api_key: str):
-        """Initialize the Master Orchestrator with all sub-agents."""
+    def __init__(self, api_key: str, response_cache: LRUCache = None, review_cache: LRUCache = None):
+        """
+        Initialize the Master Orchestrator with all sub-agents.
+        Optional caches are shared with the sub-agents, e.g. across a batch run.
+        """
         super().__init__(api_key)
         self.agent_name = "Master Agent Orchestrator"
         
@@ -24,15 +103,51 @@ class MasterAgentOrchestrator(BaseAgent):
         self.execution_agent = ExecutionAgent(api_key)
         self.ethics_agent = EthicsAgent(api_key)
         
+        for agent in (self, self.planning_agent, self.execution_agent, self.ethics_agent):
+            agent.response_cache = response_cache
+        self.ethics_agent.review_cache = review_cache
+        
         # Conversation history
         self.conversation_history = []
+        
+        # Guidance sent by the user while a request is running (WebSocket steer messages)
+        self.steering_notes = []
+    
+    def steer(self, note: str):
+        """Add user guidance that later steps and the final synthesis should follow."""
+        if note.strip():
+            self.steering_notes.append(note.strip())
     
-    async def handle_message(self, message: str, history: List[Dict] = None) -> AsyncGenerator[Dict[str, Any], None]:
+    async def handle_message(self, message: str, history: List[Dict] = None,
+                             reservation: Reservation = None) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Handle a user message through the complete multi-agent workflow.
-        Yields status updates and final response.
+        Yields status updates and final response; the request is traced as one span tree.
+        LLM calls draw down the admission reservation, if any, and the rest is released at the end.
         """
+        with trace("handle_message", message_chars=len(message)) as root, profiler.profile_request() as profiled:
+            root.set(profiled=profiled)
+            activate_reservation(reservation)
+            try:
+                async for event in self._run_workflow(message, history):
+                    if event.get("is_final"):
+                        root.set(outcome=event["type"], response_chars=len(event.get("message", "")))
+                        if root.trace_id and "metadata" in event:
+                            event["metadata"]["trace_id"] = root.trace_id
+                    yield event
+            finally:
+                # Steering notes only apply to the request they were sent during,
+                # however it ends (response, rejection, error or cancellation)
+                self.steering_notes = []
+                if reservation is not None:
+                    reservation.release()
+                activate_reservation(None)
+    
+    async def _run_workflow(self, message: str, history: List[Dict] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """Run the plan, review, execute and synthesize workflow for one message."""
         self.conversation_history = history or []
+        # The ethics agent's per-plan tool results only dedup within this request
+        self.ethics_agent.tool_registry.start_plan()
         
         try:
             # Step 1: Orchestrator thinking
@@ -43,32 +158,110 @@ class MasterAgentOrchestrator(BaseAgent):
                 "is_final": False
             }
             
-            # Step 2: Planning phase
-            yield {
-                "type": "status", 
-                "agent": "Planning Agent",
-                "message": "Creating detailed step-by-step plan...",
-                "is_final": False
-            }
-            
-            plan = await self.planning_agent.plan_task(
-                goal=message,
-                context="User request in multi-agent system",
-                conversation_history=self.conversation_history
-            )
+            # Plans depend on earlier turns, so only first messages use the plan cache;
+            # cached plans are only shared between requests made with the same API key
+            use_plan_cache = config.PLAN_CACHE_ENABLED and not self.conversation_history
+            plan_scope = key_fingerprint(self.api_key)
+            cached_plan = plan_cache.lookup(message, scope=plan_scope) if use_plan_cache else None
             
-            # Step 3: Ethics review of the plan
-            yield {
-                "type": "status",
-                "agent": "Ethics & Safety Review Agent", 
-                "message": "Reviewing plan for ethical compliance...",
-                "is_final": False
-            }
-            
-            ethics_review = await self.ethics_agent.review_plan_or_output(
-                content="\n".join(plan),
-                content_type="plan"
-            )
+            if cached_plan:
+                # Steps 2-3 (cached): reuse an approved plan for a similar request
+                yield {
+                    "type": "status",
+                    "agent": "Planning Agent",
+                    "message": "Reusing an approved plan from a similar request...",
+                    "is_final": False
+                }
+                
+                current_span().set(plan_cache_similarity=cached_plan["similarity"])
+                plan = cached_plan["plan"]
+                if cached_plan["same_entities"]:
+                    ethics_review = {
+                        "status": "approved",
+                        "reasoning": "This plan was approved for the same request.",
+                        "concerns": [],
+                        "suggestions": [],
+                        "approved": True
+                    }
+                else:
+                    # The substituted entities were never reviewed
+                    yield {
+                        "type": "status",
+                        "agent": "Ethics & Safety Review Agent",
+                        "message": "Reviewing plan for ethical compliance...",
+                        "is_final": False
+                    }
+                    
+                    ethics_review = await self.ethics_agent.review_plan_or_output(
+                        content="\n".join(plan),
+                        content_type="plan"
+                    )
+            elif config.FUSED_PLAN_REVIEW:
+                # Steps 2-3 (fused): plan and self-assess in one call
+                yield {
+                    "type": "status",
+                    "agent": "Planning Agent",
+                    "message": "Creating plan with constitutional self-review...",
+                    "is_final": False
+                }
+                
+                constitution = self.ethics_agent.tool_registry.execute_tool(
+                    "constitution_retriever", {"query": message}
+                )
+                fused_review = await self.planning_agent.plan_task_with_self_review(
+                    goal=message,
+                    constitution=constitution,
+                    context="User request in multi-agent system",
+                    conversation_history=self.conversation_history
+                )
+                fused_review_stats.record_fused_plan()
+                plan = fused_review["plan"]
+                ethics_review = fused_review
+                
+                # Escalate borderline plans, and audit a sample of confident ones
+                audit = not fused_review["borderline"] and random.random() < config.FUSED_REVIEW_AUDIT_RATE
+                if fused_review["borderline"] or audit:
+                    yield {
+                        "type": "status",
+                        "agent": "Ethics & Safety Review Agent",
+                        "message": "Reviewing plan for ethical compliance...",
+                        "is_final": False
+                    }
+                    
+                    ethics_review = await self.ethics_agent.review_plan_or_output(
+                        content="\n".join(plan),
+                        content_type="plan"
+                    )
+                    fused_review_stats.record_comparison(
+                        fused_review["status"], ethics_review["status"], audit=audit
+                    )
+            else:
+                # Step 2: Planning phase
+                yield {
+                    "type": "status", 
+                    "agent": "Planning Agent",
+                    "message": "Creating detailed step-by-step plan...",
+                    "is_final": False
+                }
+                
+                plan = await self.planning_agent.plan_task(
+                    goal=message,
+                    context="User request in multi-agent system",
+                    conversation_history=self.conversation_history
+                )
+                
+                # Step 3: Ethics review of the plan
+                yield {
+                    "type": "status",
+                    "agent": "Ethics & Safety Review Agent", 
+                    "message": "Reviewing plan for ethical compliance...",
+                    "is_final": False
+                }
+                
+                ethics_review = await self.ethics_agent.review_plan_or_output(
+                    content="\n".join(plan),
+                    content_type="plan"
+                )
             
             # Handle ethics review results
             if not ethics_review["approved"]:
@@ -95,11 +288,52 @@ class MasterAgentOrchestrator(BaseAgent):
                         context=revised_context,
                         conversation_history=self.conversation_history
                     )
+            elif use_plan_cache and not cached_plan and not any(step.startswith("Error") for step in plan):
+                plan_cache.store(message, plan, scope=plan_scope)
             
             # Step 4: Execute the plan
+            self.execution_agent.tool_registry.start_plan(
+                artifacts=ArtifactStore.from_config() if config.ARTIFACT_STORE_ENABLED else None
+            )
             execution_results = []
+            planned_steps = len(plan)
+            early_stop = {"skipped": 0, "llm_checks": 0}
+            i = 0
             
-            for i, step in enumerate(plan, 1):
+            while i < len(plan):
+                if i and config.EARLY_TERMINATION in ("conservative", "adaptive"):
+                    skipped = await self._skip_satisfied_steps(message, plan, i, execution_results, early_stop)
+                    if skipped:
+                        plan = plan[:i] + [step for index, step in enumerate(plan[i:], i) if index not in skipped]
+                        yield {
+                            "type": "status",
+                            "agent": "Master Orchestrator",
+                            "message": f"Goal already met after step {i}; skipping {len(skipped)} remaining step(s)...",
+                            "is_final": False
+                        }
+                        continue
+                
+                # Planner tags steer execution but are not part of the step itself
+                batch = [strip_plan_tags(step) for step in self._next_reasoning_batch(plan, i)]
+                if len(batch) > 1:
+                    # Consecutive reasoning-only steps share one LLM call
+                    yield {
+                        "type": "status",
+                        "agent": "Execution Agent",
+                        "message": f"Executing steps {i + 1}-{i + len(batch)}/{len(plan)} (reasoning only): {batch[0][:50]}...",
+                        "is_final": False
+                    }
+                    
+                    context = self._build_execution_context(execution_results)
+                    execution_results.extend(
+                        await self.execution_agent.execute_reasoning_steps(steps=batch, context=context)
+                    )
+                    i += len(batch)
+                    await asyncio.sleep(0.5)
+                    continue
+                
+                step = strip_plan_tags(plan[i])
+                i += 1
                 yield {
                     "type": "status",
                     "agent": "Execution Agent",
@@ -110,10 +344,7 @@ class MasterAgentOrchestrator(BaseAgent):
                 # Build context from previous steps
                 context = self._build_execution_context(execution_results)
                 
-                step_result = await self.execution_agent.execute_step(
-                    step=step,
-                    context=context
-                )
+                step_result = await self._execute_step(step, context)
                 
                 execution_results.append(step_result)
                 
@@ -130,7 +361,7 @@ class MasterAgentOrchestrator(BaseAgent):
             
             final_response = await self._synthesize_response(
                 original_message=message,
-                plan=plan,
+                plan=[strip_plan_tags(step) for step in plan],
                 execution_results=execution_results,
                 ethics_review=ethics_review
             )
@@ -148,19 +379,29 @@ class MasterAgentOrchestrator(BaseAgent):
             self.conversation_history.append({"role": "user", "content": message})
             self.conversation_history.append({"role": "assistant", "content": final_response})
             
+            metadata = {
+                "plan_steps": planned_steps,
+                "executed_steps": len(execution_results),
+                "plan_cached": bool(cached_plan),
+                "ethics_approved": final_ethics_review["approved"]
+            }
+            if config.EARLY_TERMINATION in ("conservative", "adaptive"):
+                early_termination_stats.record(planned_steps, early_stop["skipped"], early_stop["llm_checks"])
+                metadata["steps_skipped"] = early_stop["skipped"]
+                metadata["llm_calls_saved"] = early_stop["skipped"] - early_stop["llm_checks"]
+            artifacts = self.execution_agent.tool_registry.artifacts
+            if artifacts is not None:
+                metadata["artifacts"] = artifacts.stats()
+            
             # Final response
             yield {
                 "type": "response",
                 "agent": "Master Orchestrator",
                 "message": final_response,
                 "is_final": True,
-                "metadata": {
-                    "plan_steps": len(plan),
-                    "executed_steps": len(execution_results),
-                    "ethics_approved": final_ethics_review["approved"]
-                }
+                "metadata": metadata
             }
-            
+        
         except Exception as e:
             yield {
                 "type": "error",
@@ -169,17 +410,111 @@ class MasterAgentOrchestrator(BaseAgent):
                 "is_final": True
             }
     
+    def _next_reasoning_batch(self, plan: List[str], start: int) -> List[str]:
+        """Collect the run of reasoning-only steps starting at the given index."""
+        if not config.BATCH_REASONING_STEPS:
+            return plan[start:start + 1]
+        
+        batch = []
+        for step in plan[start:start + max(config.REASONING_BATCH_SIZE, 1)]:
+            if not self.execution_agent.is_reasoning_only(step):
+                break
+            batch.append(step)
+        return batch or plan[start:start + 1]
+    
+    async def _skip_satisfied_steps(self, goal: str, plan: List[str], start: int,
+                                    execution_results: List[Dict], early_stop: Dict[str, int]) -> List[int]:
+        """
+        Once the goal is met, pick the indices of remaining steps that can be skipped
+        (EARLY_TERMINATION mode). The goal is only judged when some step is skippable,
+        and only the LLM check can decide it is met; coverage just rules the check out.
+        """
+        skippable = [
+            index for index in range(start, len(plan))
+            if is_skippable(plan[index], execution_results, config.EARLY_TERMINATION)
+        ]
+        if not skippable or not execution_results or not execution_results[-1]["success"]:
+            return []
+        
+        coverage = goal_coverage(goal, execution_results, plan)
+        current_span().set(goal_coverage=round(coverage, 4))
+        if coverage < config.EARLY_TERMINATION_COVERAGE:
+            return []
+        
+        early_stop["llm_checks"] += 1
+        prompt = GOAL_CHECK_PROMPT.render(
+            goal=goal,
+            completed_work="\n".join(f"- {result['result']}" for result in execution_results if result["success"])
+        )
+        try:
+            met = (await self._generate_content(prompt)).strip().upper().startswith("YES")
+        except Exception:
+            met = False
+        
+        if not met:
+            return []
+        early_stop["skipped"] += len(skippable)
+        return skippable
+    
+    async def _execute_step(self, step: str, context: str) -> Dict[str, Any]:
+        """Execute a plan step in this process, or on an execution worker when STEP_QUEUE is set."""
+        step_queue = get_step_queue()
+        if step_queue is None:
+            return await self.execution_agent.execute_step(step=step, context=context)
+        
+        registry = self.execution_agent.tool_registry
+        artifacts = registry.artifacts
+        task = step_task(
+            self.api_key, step, context, plan_id=registry.plan_id,
+            artifacts=artifacts.shared_settings() if artifacts is not None else None
+        )
+        with span("execute_step", "phase", step_queue=step_queue.name):
+            try:
+                # The key's rate limits are enforced here, so workers don't multiply them
+                async with self.client.limit(self.execution_agent.step_prompt(step, context)) as usage:
+                    result = await step_queue.submit(task)
+                    usage["response"] = " ".join(
+                        str(result.get(field, "")) for field in ("thought", "observation", "result")
+                    )
+                if artifacts is not None:
+                    artifacts.adopt(result.pop("artifacts", []))
+                return result
+            except Exception as e:
+                return {
+                    "step": step,
+                    "success": False,
+                    "result": f"Error executing step: {str(e)}",
+                    "tool_used": None,
+                    "observation": f"Step worker error: {str(e)}"
+                }
+    
     def _build_execution_context(self, previous_results: List[Dict]) -> str:
         """Build context string from previous execution results."""
+        context = self._format_steering_notes()
         if not previous_results:
-            return ""
+            return context
         
-        context = "Previous steps completed:\n"
+        context += "Previous steps completed:\n"
         for i, result in enumerate(previous_results, 1):
             context += f"{i}. {result['result']}\n"
         
+        artifacts = self.execution_agent.tool_registry.artifacts
+        if artifacts is not None and artifacts.describe():
+            context += "Stored tool outputs (read slices with artifact_reader):\n" + "".join(
+                f"- {line}\n" for line in artifacts.describe()
+            )
+        
         return context
     
+    def _format_steering_notes(self) -> str:
+        """Format user guidance received while the request was running."""
+        if not self.steering_notes:
+            return ""
+        return "User guidance received during execution (follow it):\n" + "".join(
+            f"- {note}\n" for note in self.steering_notes
+        )
+    
+    @traced("synthesize")
     async def _synthesize_response(self, original_message: str, plan: List[str], 
                                    execution_results: List[Dict], ethics_review: Dict) -> str:
         """Synthesize a final response based on all the work done."""
@@ -192,31 +527,15 @@ class MasterAgentOrchestrator(BaseAgent):
         
         history_context = self._format_conversation_history(self.conversation_history)
         
-        prompt = f"""
-You are the Master Agent Orchestrator synthesizing a final response after coordinating multiple specialized agents.
-
-Original User Request: {original_message}
-
-Plan that was created:
-{chr(10).join(f"{i+1}. {step}" for i, step in enumerate(plan))}
-
-Work completed by Execution Agent:
-{chr(10).join(f"- {work}" for work in completed_work)}
-
-Ethics Review Status: {"Approved" if ethics_review["approved"] else "Required revisions"}
-
-{history_context}
-
-Your task:
-1. Synthesize all the work done into a coherent, helpful response
-2. Address the original user request directly
-3. Be natural and conversational, not overly technical
-4. Don't mention the internal agent workflow unless relevant
-5. Focus on providing value to the user
-
-Create a clear, helpful response that directly addresses the user's request:
-"""
-
+        prompt = SYNTHESIZE_PROMPT.render(
+            original_message=original_message,
+            plan_text="\n".join(f"{i+1}. {step}" for i, step in enumerate(plan)),
+            completed_work="\n".join(f"- {work}" for work in completed_work),
+            review_status="Approved" if ethics_review["approved"] else "Required revisions",
+            steering_notes=self._format_steering_notes(),
+            history_context=history_context
+        )
+        
         try:
             response = await self._generate_content(prompt)
             return response.strip()
@@ -0,0 +1,195 @@
+"""
+Plan template cache: reuse approved plans for goals that only differ in their entities.
+
+Goals are normalized into templates by masking entities (URLs, numbers and
+capitalized names), e.g. 'Compare Python and Rust' becomes
+'compare <E0> and <E1>'. Quoted text is not masked: it usually carries what
+the request is about, so it stays part of the template. Templates are
+embedded as hashed word and bigram vectors, and a lookup returns the most
+similar cached plan above the similarity threshold, with the new goal's
+entities substituted back in.
+
+Only plans that passed the ethics review are stored, and only when every
+entity of the goal was found and masked in the plan, so a reused plan never
+carries the entities of the goal it was made for. Entries are scoped (by API
+key fingerprint), so plans are never shared between tenants. Reused plans
+whose entities differ from the stored goal's are reviewed again.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
+import math
+import re
+import threading
+
+from ..cache import LRUCache
+from .. import config
+
+EMBEDDING_DIMENSIONS = 1 << 16
+
+_ENTITY_RE = re.compile(
+    r"https?://[^\s\"'<>]+"                     # URLs
+    r"|\b\d+(?:[.,]\d+)*\b"                     # numbers
+    r"|\b[A-Z][\w+#.-]*(?:\s+[A-Z][\w+#.-]*)*"  # capitalized names, e.g. 'New York'
+)
+_WORD_RE = re.compile(r"<e\d+>|[a-z0-9]+")
+
+def _placeholder(index: int) -> str:
+    return f"<E{index}>"
+
+def extract_template(goal: str) -> Tuple[str, List[str]]:
+    """Mask the entities in a goal, returning the normalized template and the entities in order."""
+    entities: List[str] = []
+    
+    def mask(match: re.Match) -> str:
+        text = match.group(0).rstrip(".,;:!?)")
+        prefix = ""
+        # A capitalized word at the start is usually just the sentence's first word
+        if match.start() == 0 and text[0].isupper():
+            prefix, _, text = text.partition(" ")
+            if not text:
+                return match.group(0)
+            prefix += " "
+        if text not in entities:
+            entities.append(text)
+        return prefix + _placeholder(entities.index(text)) + match.group(0)[len(prefix) + len(text):]
+    
+    template = _ENTITY_RE.sub(mask, goal.strip())
+    return " ".join(template.lower().split()), entities
+
+def embed(template: str) -> Dict[int, float]:
+    """Embed a template as an L2-normalized sparse vector of hashed words and bigrams."""
+    words = _WORD_RE.findall(template)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector: Dict[int, float] = {}
+    for feature in features:
+        bucket = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "big")
+        bucket %= EMBEDDING_DIMENSIONS
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {bucket: value / norm for bucket, value in vector.items()} if norm else {}
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(bucket, 0.0) for bucket, value in a.items())
+
+class PlanCache:
+    """LRU cache of approved plan templates with similarity lookup."""
+    
+    def __init__(self, max_size: int, threshold: float):
+        """Initialize an empty cache; lookups need at least `threshold` cosine similarity."""
+        self._entries = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self.threshold = threshold
+        self.misses = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.rejected = 0
+        self.not_stored = 0
+    
+    def lookup(self, goal: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Find a cached plan for a similar goal within a scope (e.g. an API key fingerprint).
+        Returns the plan with this goal's entities substituted, the match similarity,
+        and whether the goal's entities are the ones the plan was approved with.
+        """
+        template, entities = extract_template(goal)
+        entry = self._entries.get((scope, template))
+        similarity = 1.0
+        
+        if entry is None:
+            vector = embed(template)
+            best, best_similarity = None, 0.0
+            for candidate in self._entries.values():
+                if candidate["scope"] != scope or len(candidate["entities"]) != len(entities):
+                    continue
+                candidate_similarity = cosine_similarity(vector, candidate["vector"])
+                if candidate_similarity > best_similarity:
+                    best, best_similarity = candidate, candidate_similarity
+            
+            if best is None or best_similarity < self.threshold:
+                with self._lock:
+                    self.misses += 1
+                    if best is not None:
+                        self.rejected += 1
+                return None
+            entry, similarity = best, best_similarity
+            # Mark the similar match as recently used
+            self._entries.put((scope, entry["template"]), entry)
+        
+        with self._lock:
+            if similarity == 1.0:
+                self.exact_hits += 1
+            else:
+                self.similar_hits += 1
+        
+        plan = []
+        for step in entry["plan"]:
+            for index, entity in enumerate(entities):
+                step = step.replace(_placeholder(index), entity)
+            plan.append(step)
+        return {
+            "plan": plan,
+            "similarity": round(similarity, 4),
+            "template": entry["template"],
+            "same_entities": template == entry["template"] and entities == entry["entities"]
+        }
+    
+    def store(self, goal: str, plan: List[str], scope: str = "") -> bool:
+        """
+        Store an approved plan for a goal within a scope, masking the goal's entities in its steps.
+        Plans that don't mention every entity of the goal are not stored; returns whether it was.
+        """
+        template, entities = extract_template(goal)
+        # Substitute longer entities first so 'New York City' wins over 'New York'
+        order = sorted(range(len(entities)), key=lambda index: len(entities[index]), reverse=True)
+        plan_template = []
+        for step in plan:
+            for index in order:
+                step = step.replace(entities[index], _placeholder(index))
+            plan_template.append(step)
+        
+        # An entity left in the plan would be reused verbatim for other goals
+        masked = "\n".join(plan_template)
+        if any(_placeholder(index) not in masked for index in range(len(entities))):
+            with self._lock:
+                self.not_stored += 1
+            return False
+        
+        self._entries.put((scope, template), {
+            "scope": scope,
+            "template": template,
+            "entities": entities,
+            "vector": embed(template),
+            "plan": plan_template
+        })
+        return True
+    
+    def clear(self):
+        """Remove all cached plans."""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get size, hit-rate and match-type counters."""
+        # The LRU's own counters only see exact template lookups
+        entries = self._entries.stats()
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "size": entries["size"],
+                "max_size": entries["max_size"],
+                "evictions": entries["evictions"],
+                "hits": hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "threshold": self.threshold,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "below_threshold": self.rejected,
+                "not_stored": self.not_stored
+            }
+
+# Shared across orchestrator instances, which are created per request
+plan_cache = PlanCache(config.PLAN_CACHE_SIZE, config.PLAN_CACHE_SIMILARITY)
@@ -2,30 +2,21 @@
 Planning Agent responsible for task decomposition and planning using Chain-of-Thought reasoning.
 """
 from .base_agent import BaseAgent
+from .prompts import PromptTemplate
+from ..tracing import traced
+from .. import config
 from typing import List, Dict, Any
+import re
 
-class PlanningAgent(BaseAgent):
-    """Agent responsible for breaking down complex tasks into step-by-step plans."""
-    
-    def __init__(self, api_key: str):
-        """Initialize the Planning Agent."""
-        super().__init__(api_key)
-        self.agent_name = "Planning Agent"
-    
-    async def plan_task(self, goal: str, context: str = "", conversation_history: List[Dict] = None) -> List[str]:
-        """
-        Create a detailed step-by-step plan for achieving the given goal.
-        Uses Chain-of-Thought reasoning to break down complex tasks.
-        """
-        history_context = self._format_conversation_history(conversation_history or [])
-        
-        prompt = f"""
-You are the Planning Agent in a Multi-Agent AI system. Your role is to break down complex goals into clear, actionable steps using Chain-of-Thought reasoning.
+# Marker the planner appends to steps that can be completed without tools
+REASONING_ONLY_TAG = "[reasoning-only]"
+# Marker for steps that only refine or double-check earlier ones and may be skipped
+OPTIONAL_TAG = "[optional]"
 
-Goal to plan for: {goal}
-
-Additional Context: {context}
-{history_context}
+PLAN_PROMPT = PromptTemplate(
+    role="planning",
+    prefix=f"""
+You are the Planning Agent in a Multi-Agent AI system. Your role is to break down complex goals into clear, actionable steps using Chain-of-Thought reasoning.
 
 Instructions:
 1. Think step by step about how to achieve this goal
@@ -33,7 +24,7 @@ Instructions:
 3. Each step should be clear and actionable
 4. Consider what information or tools might be needed for each step
 5. Ensure the plan is comprehensive but not overly complex
-
+{{tag_instructions}}
 Think through this carefully:
 
 Step-by-step reasoning:
@@ -43,20 +34,202 @@ Step-by-step reasoning:
 - What logical sequence should I follow?
 - What potential challenges might arise?
 
-Now provide a numbered list of steps in this format:
+Provide a numbered list of steps in this format:
 1. [First step with clear action]
 2. [Second step with clear action]
 3. [Continue with remaining steps...]
+""",
+    body="""
+Goal to plan for: {goal}
+
+Additional Context: {context}
+{history_context}
 
 Plan:
 """
+)
+
+PLAN_WITH_SELF_REVIEW_PROMPT = PromptTemplate(
+    role="planning_self_review",
+    prefix=f"""
+You are the Planning Agent in a Multi-Agent AI system. Your role is to break down complex goals into clear, actionable steps using Chain-of-Thought reasoning, and to assess your own plan against Constitutional AI principles before it is executed.
+
+Instructions:
+1. Think step by step about how to achieve this goal
+2. Break it down into 3-7 logical, sequential steps
+3. Each step should be clear and actionable
+4. Review the finished plan against the constitutional principles below
+5. Be honest about uncertainty: use LOW confidence whenever the plan touches on potential harm, privacy, bias or other sensitive areas
+{{tag_instructions}}
+Provide your answer in this exact format:
+
+Plan:
+1. [First step with clear action]
+2. [Second step with clear action]
+3. [Continue with remaining steps...]
+
+SELF-ASSESSMENT:
+
+Status: [APPROVED/NEEDS_REVISION/REJECTED]
+
+Confidence: [HIGH/LOW]
+
+Reasoning:
+[Explain your assessment based on constitutional principles]
+
+Concerns (if any):
+[List specific ethical concerns or issues identified]
 
+Suggestions for improvement (if applicable):
+[Provide constructive suggestions for addressing concerns]
+
+Constitutional Principles to Consider:
+{{constitution}}
+""",
+    body="""
+Goal to plan for: {goal}
+
+Additional Context: {context}
+{history_context}
+"""
+)
+
+_PLAN_TAGS_RE = re.compile("|".join(re.escape(tag) for tag in (REASONING_ONLY_TAG, OPTIONAL_TAG)), re.IGNORECASE)
+
+def plan_tag_instructions(first: int) -> str:
+    """Numbered instructions for the step tags the enabled features read, or "" if none are."""
+    instructions = []
+    if config.BATCH_REASONING_STEPS:
+        instructions.append(
+            f"Append {REASONING_ONLY_TAG} to steps that need no tools (no searching, running code or retrieving principles)"
+        )
+    if config.EARLY_TERMINATION in ("conservative", "adaptive"):
+        instructions.append(f"Append {OPTIONAL_TAG} to steps that only refine, double-check or restate earlier steps")
+    return "".join(f"{number}. {text}\n" for number, text in enumerate(instructions, first))
+
+def strip_plan_tags(step: str) -> str:
+    """Remove planner tags from a step before it is executed or shown."""
+    return " ".join(_PLAN_TAGS_RE.sub(" ", step).split())
+
+class PlanningAgent(BaseAgent):
+    """Agent responsible for breaking down complex tasks into step-by-step plans."""
+    
+    def __init__(self, api_key: str):
+        """Initialize the Planning Agent."""
+        super().__init__(api_key)
+        self.agent_name = "Planning Agent"
+    
+    @traced("plan")
+    async def plan_task(self, goal: str, context: str = "", conversation_history: List[Dict] = None) -> List[str]:
+        """
+        Create a detailed step-by-step plan for achieving the given goal.
+        Uses Chain-of-Thought reasoning to break down complex tasks.
+        """
+        history_context = self._format_conversation_history(conversation_history or [])
+        
+        prompt = PLAN_PROMPT.render(
+            goal=goal, context=context, history_context=history_context,
+            tag_instructions=plan_tag_instructions(6)
+        )
+        
         try:
             response = await self._generate_content(prompt)
             return self._parse_plan(response)
         except Exception as e:
             return [f"Error creating plan: {str(e)}"]
     
+    @traced("plan_with_self_review")
+    async def plan_task_with_self_review(self, goal: str, constitution: str, context: str = "",
+                                         conversation_history: List[Dict] = None) -> Dict[str, Any]:
+        """
+        Create a plan and assess it against the constitution in a single LLM call.
+        Used by the fused planning mode; plans flagged as borderline still go to the Ethics Agent.
+        """
+        history_context = self._format_conversation_history(conversation_history or [])
+        
+        prompt = PLAN_WITH_SELF_REVIEW_PROMPT.render(
+            goal=goal, context=context, history_context=history_context, constitution=constitution,
+            tag_instructions=plan_tag_instructions(6)
+        )
+        
+        try:
+            response = await self._generate_content(prompt)
+            plan_text, _, assessment_text = response.partition("SELF-ASSESSMENT")
+            result = self._parse_self_assessment(assessment_text)
+            result["plan"] = self._parse_plan(plan_text)
+            return result
+        except Exception as e:
+            return {
+                "plan": [f"Error creating plan: {str(e)}"],
+                "status": "needs_revision",
+                "confidence": "low",
+                "reasoning": f"Error during plan self-assessment: {str(e)}",
+                "concerns": ["Technical error during self-assessment"],
+                "suggestions": [],
+                "approved": False,
+                "borderline": True
+            }
+    
+    def _parse_self_assessment(self, response: str) -> Dict[str, Any]:
+        """Parse the self-assessment section of a fused planning response."""
+        result = {
+            "status": "needs_revision",  # Default to cautious approach
+            "confidence": "low",
+            "reasoning": "",
+            "concerns": [],
+            "suggestions": [],
+            "approved": False,
+            "borderline": True
+        }
+        status_found = False
+        current_section = None
+        
+        for line in response.split('\n'):
+            line = line.strip()
+            
+            if line.startswith("Status:"):
+                status_found = True
+                status_text = line.split("Status:", 1)[1].strip().upper()
+                if "NEEDS_REVISION" in status_text or "REVISION" in status_text:
+                    result["status"] = "needs_revision"
+                elif "APPROVED" in status_text:
+                    result["status"] = "approved"
+                elif "REJECTED" in status_text:
+                    result["status"] = "rejected"
+            
+            elif line.startswith("Confidence:"):
+                confidence_text = line.split("Confidence:", 1)[1].strip().upper()
+                result["confidence"] = "high" if "HIGH" in confidence_text else "low"
+            
+            elif line.startswith("Reasoning:"):
+                current_section = "reasoning"
+                result["reasoning"] = line.split("Reasoning:", 1)[1].strip()
+            
+            elif line.startswith("Concerns") and ":" in line:
+                current_section = "concerns"
+            
+            elif line.startswith("Suggestions") and ":" in line:
+                current_section = "suggestions"
+            
+            elif line and current_section:
+                if current_section == "reasoning":
+                    result["reasoning"] = f"{result['reasoning']} {line}".strip()
+                elif line.startswith(('-', '•', '*')):
+                    result[current_section].append(line.lstrip('-•* '))
+        
+        result["approved"] = result["status"] == "approved"
+        # Anything short of a confident approve or reject is borderline
+        result["borderline"] = (
+            not status_found
+            or result["status"] == "needs_revision"
+            or result["confidence"] != "high"
+        )
+        
+        if not result["reasoning"]:
+            result["reasoning"] = "Plan self-assessed against constitutional principles."
+        
+        return result
+    
     def _parse_plan(self, response: str) -> List[str]:
         """Parse the AI response into a list of plan steps."""
         lines = response.split('\n')
@@ -0,0 +1,133 @@
+"""
+Context caching for the static prefix of templated prompts.
+
+PROMPT_PREFIX_CACHE selects the backend:
+
+- "off": prompts are sent whole (the default).
+- "local": a stand-in that sends prompts whole but tracks which prefixes a
+  provider cache would already hold, so /api/status shows the input tokens
+  context caching would save.
+- "gemini": creates Gemini cached contents for prefixes and sends only the
+  remaining body. This needs an SDK with context caching
+  (google-generativeai >= 0.7); otherwise, or if creating the cache fails,
+  it falls back to sending the whole prompt.
+
+Only prefixes of at least PROMPT_PREFIX_CACHE_MIN_TOKENS tokens are cached.
+"""
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import datetime
+import hashlib
+import threading
+import time
+
+from .client_pool import GeminiClient, load_sdk
+from .rate_limiter import estimate_tokens
+from ..cache import LRUCache
+from .. import config
+
+class PrefixCache:
+    """Tracks cached prefixes per (API key, model, prefix hash) with a TTL."""
+    
+    def __init__(self, mode: str, ttl: float, min_tokens: int, max_size: int = 256):
+        """Initialize an empty cache for the "local" or "gemini" backend."""
+        self.mode = mode
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self._entries = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+        self.created = 0
+        # Whether the installed SDK supports context caching; checked on first use
+        self._provider_supported = None
+    
+    def _key(self, client: GeminiClient, model_name: str, prefix: str) -> Tuple[str, str, str]:
+        return client.fingerprint, model_name, hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+    
+    async def prepare(self, client: GeminiClient, model_name: str, prompt: str) -> Tuple[Optional[Any], str, int]:
+        """
+        Decide how to send a prompt.
+        Returns (model bound to a cached prefix or None, contents to send, prefix tokens served from cache).
+        """
+        prefix = getattr(prompt, "prefix", "")
+        if not prefix or estimate_tokens(prefix) < self.min_tokens:
+            return None, prompt, 0
+        
+        key = self._key(client, model_name, prefix)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        hit = entry is not None and entry["expires_at"] > now
+        
+        if self.mode == "local":
+            if not hit:
+                self._entries.put(key, {"expires_at": now + self.ttl})
+                with self._lock:
+                    self.created += 1
+                return None, prompt, 0
+            return None, prompt, estimate_tokens(prefix)
+        
+        if self._provider_supported is None:
+            self._provider_supported = hasattr(load_sdk()[0], "caching")
+        if not self._provider_supported:
+            with self._lock:
+                self.fallbacks += 1
+            return None, prompt, 0
+        
+        try:
+            if not hit:
+                model = await asyncio.to_thread(self._create_cached_model, client, model_name, prefix)
+                entry = {"expires_at": now + self.ttl, "model": model}
+                self._entries.put(key, entry)
+                with self._lock:
+                    self.created += 1
+                # The first call pays for the prefix as cache storage instead of input
+                return entry["model"], prompt[len(prefix):], 0
+            return entry["model"], prompt[len(prefix):], estimate_tokens(prefix)
+        except Exception:
+            with self._lock:
+                self.fallbacks += 1
+            return None, prompt, 0
+    
+    def _create_cached_model(self, client: GeminiClient, model_name: str, prefix: str):
+        """Create a Gemini cached content for the prefix and a model bound to it and to this key's clients."""
+        genai, _ = load_sdk()
+        caching = genai.caching
+        request = caching.CachedContent._prepare_create_request(
+            model=model_name,
+            contents=[prefix],
+            ttl=datetime.timedelta(seconds=self.ttl)
+        )
+        cached_content = caching.CachedContent._from_obj(client.cache_client().create_cached_content(request))
+        model = genai.GenerativeModel.from_cached_content(cached_content)
+        base = client.model(model_name)
+        model._client = base._client
+        model._async_client = base._async_client
+        return model
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of prefixes cached and provider fallbacks."""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "ttl": self.ttl,
+                "min_tokens": self.min_tokens,
+                "provider_supported": self._provider_supported if self.mode == "gemini" else None,
+                "cached_prefixes": len(self._entries),
+                "created": self.created,
+                "fallbacks": self.fallbacks
+            }
+
+_prefix_cache: Optional[PrefixCache] = None
+_prefix_cache_lock = threading.Lock()
+
+def get_prefix_cache() -> Optional[PrefixCache]:
+    """Get the process-wide prefix cache, or None when PROMPT_PREFIX_CACHE is off."""
+    global _prefix_cache
+    if config.PROMPT_PREFIX_CACHE not in ("local", "gemini"):
+        return None
+    with _prefix_cache_lock:
+        if _prefix_cache is None or _prefix_cache.mode != config.PROMPT_PREFIX_CACHE:
+            _prefix_cache = PrefixCache(
+                config.PROMPT_PREFIX_CACHE, config.PROMPT_PREFIX_CACHE_TTL, config.PROMPT_PREFIX_CACHE_MIN_TOKENS
+            )
+        return _prefix_cache
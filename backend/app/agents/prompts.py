@@ -0,0 +1,91 @@
+"""
+Precompiled prompt templates with a stable prefix.
+
+Each agent prompt is split into a prefix (role instructions, output format and
+slowly changing context such as the constitution excerpt) and a body (the
+goal, step, history and other per-call values). Templates are parsed once at
+import time, and rendering only concatenates. Because the prefix comes first,
+it is identical across calls and can be served from a context cache (see
+prefix_cache.py).
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import string
+import threading
+
+from .rate_limiter import estimate_tokens
+
+class RenderedPrompt(str):
+    """Prompt text that also carries its agent role and cacheable prefix."""
+    
+    role: str
+    prefix: str
+    
+    def __new__(cls, text: str, role: str, prefix: str):
+        prompt = super().__new__(cls, text)
+        prompt.role = role
+        prompt.prefix = prefix
+        return prompt
+
+def _compile(template: str) -> List[Tuple[str, Optional[str]]]:
+    """Parse a str.format-style template into (literal, field name) pairs."""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+def _render(parts: List[Tuple[str, Optional[str]]], values: Dict[str, Any]) -> str:
+    return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in parts)
+
+class PromptTemplate:
+    """A prompt compiled once into a prefix and a body."""
+    
+    def __init__(self, role: str, prefix: str, body: str):
+        """Compile the template; `{name}` fields are filled in by render()."""
+        self.role = role
+        self._prefix = _compile(prefix)
+        self._body = _compile(body)
+        # Prefixes without fields are rendered once
+        self._static_prefix = _render(self._prefix, {}) if all(f is None for _, f in self._prefix) else None
+    
+    def render(self, **values) -> RenderedPrompt:
+        """Fill in the fields and return the full prompt."""
+        prefix = self._static_prefix if self._static_prefix is not None else _render(self._prefix, values)
+        return RenderedPrompt(prefix + _render(self._body, values), self.role, prefix)
+
+class PromptStats:
+    """Process-wide prompt size and cached-prefix counters per agent role."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self._roles: Dict[str, Dict[str, int]] = {}
+    
+    def record(self, prompt: str, cached_tokens: int = 0):
+        """Count one prompt sent to the model and how many of its tokens were served from cache."""
+        role = getattr(prompt, "role", "untemplated")
+        with self._lock:
+            stats = self._roles.setdefault(
+                role, {"calls": 0, "prompt_tokens": 0, "prefix_tokens": 0, "cached_prefix_tokens": 0}
+            )
+            stats["calls"] += 1
+            stats["prompt_tokens"] += estimate_tokens(prompt)
+            prefix = getattr(prompt, "prefix", "")
+            stats["prefix_tokens"] += estimate_tokens(prefix) if prefix else 0
+            stats["cached_prefix_tokens"] += cached_tokens
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get per-role averages and prefix shares."""
+        with self._lock:
+            roles = {}
+            for role, stats in self._roles.items():
+                calls, tokens = stats["calls"], stats["prompt_tokens"]
+                roles[role] = {
+                    **stats,
+                    "avg_prompt_tokens": round(tokens / calls) if calls else 0,
+                    "prefix_share": round(stats["prefix_tokens"] / tokens, 4) if tokens else None,
+                    "cached_prefix_share": round(stats["cached_prefix_tokens"] / tokens, 4) if tokens else None
+                }
+            return {
+                "roles": roles,
+                "saved_input_tokens": sum(stats["cached_prefix_tokens"] for stats in self._roles.values())
+            }
+
+# Shared across agents
+prompt_stats = PromptStats()
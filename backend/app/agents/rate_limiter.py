@@ -0,0 +1,179 @@
+"""
+Client-side rate limiting for outbound LLM calls.
+
+Admitted jobs reserve their estimated calls and tokens, so admission checks
+running concurrently don't all count the same budget. A reservation is bound
+to the task running the job (activate_reservation), is drawn down as its calls
+acquire budget, and whatever is left is released when the job ends.
+"""
+from contextvars import ContextVar
+from typing import Optional
+import asyncio
+import time
+
+class TokenBucket:
+    """Token bucket that refills continuously at rate_per_minute, up to capacity."""
+    
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """Initialize a full bucket. A rate of 0 or less disables the limit."""
+        self.rate_per_second = max(rate_per_minute, 0) / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute, 0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    @property
+    def unlimited(self) -> bool:
+        """Whether this bucket is disabled."""
+        return self.rate_per_second <= 0
+    
+    def _refill(self):
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+    
+    def available(self) -> float:
+        """Get the number of tokens currently available."""
+        if self.unlimited:
+            return float("inf")
+        self._refill()
+        return self.tokens
+    
+    def wait_time(self, amount: float = 1) -> float:
+        """Seconds until amount tokens will be available (capped at a full bucket)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(missing, 0) / self.rate_per_second
+    
+    def shortfall_time(self, amount: float) -> float:
+        """
+        Seconds of refill needed before amount tokens will have been available in total,
+        i.e. how long a job consuming them stalls. Unlike wait_time this is not capped
+        at a full bucket, so jobs larger than the bucket are estimated at their full cost.
+        """
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        return max(amount - self.tokens, 0) / self.rate_per_second
+    
+    async def acquire(self, amount: float = 1):
+        """Wait until amount tokens are available, then take them."""
+        if self.unlimited:
+            return
+        # Requests larger than the bucket wait for a full bucket and then run it into debt
+        needed = min(amount, self.capacity)
+        while True:
+            delay = self.wait_time(needed)
+            if delay <= 0:
+                self.tokens -= amount
+                return
+            await asyncio.sleep(delay)
+
+class Reservation:
+    """Calls and tokens set aside for an admitted job that hasn't spent them yet."""
+    
+    def __init__(self, limiter: "KeyRateLimiter", calls: int, tokens: int):
+        """Hold calls and tokens on the limiter until they are spent or released."""
+        self.limiter = limiter
+        self.calls = calls
+        self.tokens = tokens
+        limiter.reserved_calls += calls
+        limiter.reserved_tokens += tokens
+    
+    def spend(self, calls: int, tokens: int):
+        """Hand part of the reservation back as the job's calls take real budget."""
+        calls, tokens = min(calls, self.calls), min(tokens, self.tokens)
+        self.calls -= calls
+        self.tokens -= tokens
+        self.limiter.reserved_calls -= calls
+        self.limiter.reserved_tokens -= tokens
+    
+    def release(self):
+        """Give back whatever the job did not spend."""
+        self.spend(self.calls, self.tokens)
+
+# The reservation of the job running in the current task, if any
+_active_reservation: ContextVar[Optional[Reservation]] = ContextVar("llm_reservation", default=None)
+
+def activate_reservation(reservation: Optional[Reservation]):
+    """Charge LLM calls made from the current task (and tasks it starts) to a reservation."""
+    _active_reservation.set(reservation)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for Gemini prompts (about four characters per token)."""
+    return max(1, (len(text) + 3) // 4)
+
+class KeyRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one API key.
+    Calls wait for capacity instead of failing, and usage is accounted so
+    callers can check up front whether a multi-call job fits the budget.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, expected_output_tokens: int = 512):
+        """Initialize full buckets. Rates of 0 or less disable that limit."""
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.expected_output_tokens = expected_output_tokens
+        self.reserved_calls = 0
+        self.reserved_tokens = 0
+        self.requests = 0
+        self.tokens_estimated = 0
+        self.tokens_used = 0
+        self.throttled_calls = 0
+        self.throttled_seconds = 0.0
+    
+    def estimate_call(self, prompt: str) -> int:
+        """Estimate the tokens (prompt plus expected output) one call will consume."""
+        return estimate_tokens(prompt) + self.expected_output_tokens
+    
+    async def acquire(self, estimated_tokens: int):
+        """Wait until both a request and the estimated tokens are available, then take them."""
+        delay = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(estimated_tokens))
+        if delay > 0:
+            self.throttled_calls += 1
+            self.throttled_seconds += delay
+        
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(estimated_tokens)
+        self.requests += 1
+        self.tokens_estimated += estimated_tokens
+        reservation = _active_reservation.get()
+        if reservation is not None and reservation.limiter is self:
+            reservation.spend(1, estimated_tokens)
+    
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Reconcile the token bucket once the real size of a call is known."""
+        self.tokens_used += actual_tokens
+        if not self.token_bucket.unlimited:
+            self.token_bucket.tokens -= actual_tokens - estimated_tokens
+    
+    def estimate_wait(self, calls: int, tokens: int) -> float:
+        """
+        Seconds a job of the given number of calls and tokens will spend throttled in total,
+        queued behind the budget reserved by jobs already admitted.
+        """
+        return max(
+            self.request_bucket.shortfall_time(calls + self.reserved_calls),
+            self.token_bucket.shortfall_time(tokens + self.reserved_tokens)
+        )
+    
+    def reserve(self, calls: int, tokens: int) -> Reservation:
+        """Set aside the budget of an admitted job."""
+        return Reservation(self, calls, tokens)
+    
+    def stats(self) -> dict:
+        """Get usage and remaining-budget counters."""
+        return {
+            "requests": self.requests,
+            "tokens_estimated": self.tokens_estimated,
+            "tokens_used": self.tokens_used,
+            "throttled_calls": self.throttled_calls,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "reserved_calls": self.reserved_calls,
+            "reserved_tokens": self.reserved_tokens,
+            "requests_available": None if self.request_bucket.unlimited else int(self.request_bucket.available()),
+            "tokens_available": None if self.token_bucket.unlimited else int(self.token_bucket.available())
+        }
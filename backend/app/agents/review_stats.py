@@ -0,0 +1,92 @@
+"""
+Agreement tracking between the Ethics Agent's LLM review and its cheaper
+stand-ins: the fused plan self-assessment and the local safety pre-screen.
+"""
+import threading
+from typing import Dict, Any
+
+class FusedReviewStats:
+    """Process-wide counters for the fused planning mode."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.fused_plans = 0
+        self.escalations = 0
+        self.audits = 0
+        self.compared = 0
+        self.agreements = 0
+    
+    def record_fused_plan(self):
+        """Count a plan produced by the fused plan+review call."""
+        with self._lock:
+            self.fused_plans += 1
+    
+    def record_comparison(self, fused_status: str, reviewer_status: str, audit: bool = False):
+        """Record a plan that was also reviewed by the separate Ethics Agent."""
+        with self._lock:
+            if audit:
+                self.audits += 1
+            else:
+                self.escalations += 1
+            self.compared += 1
+            if fused_status == reviewer_status:
+                self.agreements += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current counters and agreement rate."""
+        with self._lock:
+            return {
+                "fused_plans": self.fused_plans,
+                "escalations": self.escalations,
+                "audits": self.audits,
+                "compared": self.compared,
+                "agreements": self.agreements,
+                "agreement_rate": round(self.agreements / self.compared, 4) if self.compared else None,
+                "ethics_calls_saved": self.fused_plans - self.compared
+            }
+
+class SafetyScreenStats:
+    """Process-wide counters for the local safety pre-screen."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.decisions = {"reject": 0, "review": 0}
+        self.review_outcomes = {}
+        self.audits = 0
+        self.agreements = 0
+    
+    def record_screen(self, decision: str):
+        """Count a pre-screen decision."""
+        with self._lock:
+            self.screened += 1
+            self.decisions[decision] += 1
+    
+    def record_review(self, decision: str, reviewer_status: str, audit: bool = False):
+        """Record the LLM verdict for content that was escalated or audited."""
+        with self._lock:
+            if audit:
+                self.audits += 1
+                if reviewer_status == "rejected":
+                    self.agreements += 1
+            else:
+                self.review_outcomes[reviewer_status] = self.review_outcomes.get(reviewer_status, 0) + 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the decision counts, the LLM verdicts for the review band and the audit agreement rate."""
+        with self._lock:
+            return {
+                "screened": self.screened,
+                "decisions": dict(self.decisions),
+                "review_outcomes": dict(self.review_outcomes),
+                "audits": self.audits,
+                "agreements": self.agreements,
+                "agreement_rate": round(self.agreements / self.audits, 4) if self.audits else None,
+                "llm_calls_saved": self.decisions["reject"] - self.audits
+            }
+
+# Shared across orchestrator instances, which are created per request
+fused_review_stats = FusedReviewStats()
+safety_screen_stats = SafetyScreenStats()
@@ -0,0 +1,153 @@
+"""
+Local safety pre-screen that runs before the Ethics Agent's LLM review.
+
+Content is scanned once with an Aho-Corasick automaton over a risk lexicon
+grouped by constitution section. The per-section match scores form a small
+feature vector for a linear (logistic) classifier. Content above
+SAFETY_SCREEN_REJECT_ABOVE is rejected locally; everything else goes to the
+LLM reviewer. Nothing is approved locally: a lexicon miss is not evidence
+that content is safe, since harmful requests can simply avoid the listed
+phrases.
+"""
+from typing import Dict, Any, List, Tuple
+from collections import deque
+import math
+
+from .. import config
+
+# Risk lexicon: constitution section -> {phrase: severity}. Severity 1 marks
+# sensitive topics that need a closer look, 3 marks clearly harmful intent.
+RISK_LEXICON: Dict[str, Dict[str, float]] = {
+    "SAFETY AND HARM PREVENTION": {
+        "weapon": 1, "explosive": 1, "firearm": 1, "poison": 1, "overdose": 1,
+        "self-harm": 1, "suicide": 1, "kill": 1, "attack": 1, "malware": 1,
+        "ransomware": 1, "exploit": 1, "hack into": 1, "bypass security": 1,
+        "untraceable": 1, "illegal": 1, "drugs": 1,
+        "build a bomb": 3, "make a bomb": 3, "pipe bomb": 3, "nerve agent": 3,
+        "bioweapon": 3, "synthesize meth": 3, "kill someone": 3, "hurt someone": 3,
+        "write ransomware": 3, "steal credentials": 3, "ddos attack on": 3
+    },
+    "HUMAN DIGNITY AND RESPECT": {
+        "harass": 1, "humiliate": 1, "insult": 1, "threaten": 1, "bully": 1,
+        "blackmail": 3, "extort": 3, "revenge porn": 3
+    },
+    "FAIRNESS AND NON-DISCRIMINATION": {
+        "stereotype": 1, "inferior": 1, "discriminate": 1, "racial": 1, "ethnic": 1,
+        "hate speech": 3, "racial slur": 3, "ethnic cleansing": 3
+    },
+    "PRIVACY AND CONFIDENTIALITY": {
+        "personal information": 1, "home address": 1, "phone number of": 1,
+        "social security number": 1, "password": 1, "track someone": 1, "surveil": 1,
+        "doxx": 3, "stalk": 3, "spy on my": 3, "leak private": 3
+    },
+    "TRUTHFULNESS AND ACCURACY": {
+        "misinformation": 1, "propaganda": 1, "fake review": 1, "deepfake": 1,
+        "impersonate": 1, "phishing": 3, "fake news article": 3
+    }
+}
+
+# Phrases that mark defensive, educational or analytical framing. They only
+# lower the score, so they can send content back to review but never approve it.
+MITIGATING_PHRASES = [
+    "prevent", "protect", "defend", "detect", "awareness", "safety tips", "history of",
+    "research", "summarize", "explain", "analyze", "fiction", "report", "mitigate"
+]
+
+# Logistic classifier over [one feature per lexicon section..., mitigation]
+FEATURES = list(RISK_LEXICON) + ["MITIGATION"]
+WEIGHTS = [2.6, 2.4, 2.4, 2.2, 2.0, -0.8]
+BIAS = -4.0
+# Caps each feature so long responses that mention a topic repeatedly don't saturate
+FEATURE_CAP = 4.0
+
+class PatternMatcher:
+    """Aho-Corasick automaton matching many phrases in one pass, on word boundaries."""
+    
+    def __init__(self, phrases: Dict[str, Any]):
+        """Compile the phrases (lowercase) into a goto/fail automaton; values are returned with matches."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any]]] = [[]]
+        
+        for phrase, payload in phrases.items():
+            state = 0
+            for char in phrase.lower():
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((phrase.lower(), payload))
+        
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def find(self, text: str) -> List[Tuple[str, Any]]:
+        """Find the phrases that occur in the text as whole words."""
+        text = text.lower()
+        matches = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for phrase, payload in self._output[state]:
+                start = end - len(phrase)
+                # Whole words only, but allow suffixes like 'weapons' or 'stalking'
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                matches.append((phrase, payload))
+        return matches
+
+class SafetyScreen:
+    """Scores content for risk with the compiled lexicon and the linear classifier."""
+    
+    def __init__(self, reject_above: float):
+        """Compile the lexicon; scores up to reject_above are sent to the LLM reviewer."""
+        self.reject_above = reject_above
+        phrases = {
+            phrase: (index, severity)
+            for index, section in enumerate(RISK_LEXICON)
+            for phrase, severity in RISK_LEXICON[section].items()
+        }
+        phrases.update({phrase: (len(FEATURES) - 1, 1.0) for phrase in MITIGATING_PHRASES})
+        self._matcher = PatternMatcher(phrases)
+    
+    def features(self, content: str) -> Tuple[List[float], List[str]]:
+        """Build the feature vector and the list of distinct risk phrases matched."""
+        vector = [0.0] * len(FEATURES)
+        matched = {}
+        for phrase, (index, severity) in self._matcher.find(content):
+            if phrase not in matched:
+                matched[phrase] = index
+                vector[index] = min(vector[index] + severity, FEATURE_CAP)
+        mitigation = len(FEATURES) - 1
+        return vector, [phrase for phrase, index in matched.items() if index != mitigation]
+    
+    def screen(self, content: str) -> Dict[str, Any]:
+        """
+        Score content and decide: "reject" or "review" (send to the LLM).
+        Returns the decision, the risk score and the constitution sections that matched.
+        """
+        vector, matched = self.features(content)
+        z = BIAS + sum(weight * value for weight, value in zip(WEIGHTS, vector))
+        risk = 1.0 / (1.0 + math.exp(-z))
+        
+        return {
+            "decision": "reject" if risk > self.reject_above else "review",
+            "risk": round(risk, 4),
+            "sections": [FEATURES[index] for index, value in enumerate(vector[:-1]) if value],
+            "matched": matched
+        }
+
+# Shared across agents; the automaton is compiled once per process
+safety_screen = SafetyScreen(config.SAFETY_SCREEN_REJECT_ABOVE)
@@ -0,0 +1,324 @@
+"""
+Out-of-process execution of plan steps.
+
+With STEP_QUEUE set, the orchestrator sends each ExecutionAgent.execute_step
+call (including the tool calls the step makes) as a task to a queue consumed
+by separate worker processes, so execution capacity scales apart from the API
+front end. Backends:
+
+- "process": a local pool of STEP_WORKERS worker processes.
+- "socket": worker servers listening on Unix sockets (STEP_QUEUE_SOCKETS,
+  comma-separated). Tasks go to the server with the fewest tasks in flight
+  and results come back over the same connection as they finish. Start a
+  server with:
+
+    python -m app.agents.step_queue /tmp/mas-steps.sock [concurrency]
+
+Other brokers can be plugged in with set_step_queue().
+
+Each task carries its plan id, and workers keep one Execution Agent per plan
+(the most recent MAX_WORKER_PLANS), so per-plan tool state never outlives its
+plan. With an artifact store, the task also carries the plan store's shared
+settings and workers attach to it. The API process enforces the per-key rate
+limits for the steps it sends, so workers run without limits of their own.
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+
+from ..cache import LRUCache
+from ..tools.artifact_store import ArtifactStore
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+# Plans whose Execution Agent (and tool state) a worker process keeps
+MAX_WORKER_PLANS = 32
+
+def step_task(api_key: str, step: str, context: str = "", available_tools: List[str] = None,
+              plan_id: str = None, artifacts: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Build an execute_step task; `artifacts` are the plan store's shared settings, if any."""
+    return {
+        "kind": "execute_step",
+        "api_key": api_key,
+        "step": step,
+        "context": context,
+        "available_tools": available_tools,
+        "plan_id": plan_id,
+        "artifacts": artifacts
+    }
+
+# Per worker process: one Execution Agent per recent plan
+_worker_plans = LRUCache(MAX_WORKER_PLANS)
+
+def init_worker():
+    """Set up a worker process; the API process sending the tasks enforces the per-key rate limits."""
+    config.GEMINI_RPM_PER_KEY = 0.0
+    config.GEMINI_TPM_PER_KEY = 0.0
+
+async def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a task in this process and return its JSON-serializable result.
+    Step results include the artifacts the step stored, for the plan's own store to adopt.
+    """
+    from .execution_agent import ExecutionAgent
+    
+    if task["kind"] != "execute_step":
+        raise ValueError(f"Unknown task kind: {task['kind']}")
+    
+    plan_id = task.get("plan_id")
+    agent = _worker_plans.get(plan_id) if plan_id else None
+    if agent is None:
+        agent = ExecutionAgent(task["api_key"])
+        settings = task.get("artifacts")
+        agent.tool_registry.start_plan(artifacts=ArtifactStore.attach(settings) if settings else None)
+        if plan_id:
+            _worker_plans.put(plan_id, agent)
+    
+    result = await agent.execute_step(
+        step=task["step"], context=task.get("context", ""), available_tools=task.get("available_tools")
+    )
+    if agent.tool_registry.artifacts is not None:
+        result["artifacts"] = agent.tool_registry.artifacts.entries()
+    return result
+
+class StepQueue(ABC):
+    """Interface for queues that run tasks on execution workers."""
+    
+    name = "base"
+    
+    @abstractmethod
+    async def submit(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task on a worker and return its result."""
+    
+    async def close(self):
+        """Release workers and connections."""
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get queue statistics for status reporting."""
+        return {"backend": self.name}
+
+_process_loop = None
+
+def _run_in_worker_process(task: Dict[str, Any]) -> Dict[str, Any]:
+    # Each worker process keeps one event loop, so its SDK clients stay usable across tasks
+    global _process_loop
+    if _process_loop is None:
+        _process_loop = asyncio.new_event_loop()
+    return _process_loop.run_until_complete(run_task(task))
+
+class ProcessStepQueue(StepQueue):
+    """Runs tasks on a local pool of worker processes."""
+    
+    name = "process"
+    
+    def __init__(self, workers: int):
+        """Initialize the pool; worker processes are started on first use."""
+        self.workers = max(workers, 1)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+    
+    async def submit(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task in a worker process."""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, _run_in_worker_process, task)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+    
+    async def close(self):
+        """Shut the worker processes down."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size and task counts."""
+        with self._lock:
+            return {"backend": self.name, "workers": self.workers, "in_flight": self.in_flight, "completed": self.completed}
+
+class WorkerUnavailable(ConnectionError):
+    """A worker server could not be reached; the task was not sent."""
+
+class _SocketConnection:
+    """One multiplexed connection to a worker server; responses are matched to tasks by id."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.in_flight = 0
+        self.completed = 0
+        self._reader = None
+        self._writer = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._connect_lock = asyncio.Lock()
+    
+    async def _ensure_connected(self):
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=2 ** 24)
+                asyncio.create_task(self._read_responses(self._reader))
+    
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        """Resolve pending tasks as their results arrive, in completion order."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response["result"])
+        finally:
+            error = ConnectionError(f"Step worker at {self.path} disconnected")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._writer = None
+    
+    async def submit(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        self.in_flight += 1
+        try:
+            await self._ensure_connected()
+        except OSError as e:
+            self.in_flight -= 1
+            raise WorkerUnavailable(f"Step worker at {self.path} is unreachable: {e}") from e
+        task_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[task_id] = future
+        try:
+            self._writer.write(json.dumps({"id": task_id, "task": task}).encode("utf-8") + b"\n")
+            await self._writer.drain()
+            return await future
+        finally:
+            self._pending.pop(task_id, None)
+            self.in_flight -= 1
+            self.completed += 1
+
+class SocketStepQueue(StepQueue):
+    """Sends tasks to worker servers on Unix sockets, balancing by tasks in flight."""
+    
+    name = "socket"
+    
+    def __init__(self, paths: List[str]):
+        """Initialize connections to the worker servers; they connect on first use."""
+        if not paths:
+            raise ValueError("STEP_QUEUE_SOCKETS must list at least one worker socket")
+        self._connections = [_SocketConnection(path) for path in paths]
+    
+    async def submit(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task on the least busy reachable worker server."""
+        for connection in sorted(self._connections, key=lambda c: c.in_flight):
+            try:
+                return await connection.submit(task)
+            except WorkerUnavailable:
+                continue
+        raise WorkerUnavailable("No step worker is reachable")
+    
+    async def close(self):
+        """Close the connections."""
+        for connection in self._connections:
+            if connection._writer is not None:
+                connection._writer.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get per-server task counts."""
+        return {
+            "backend": self.name,
+            "workers": [
+                {"socket": c.path, "in_flight": c.in_flight, "completed": c.completed}
+                for c in self._connections
+            ]
+        }
+
+async def serve(path: str, concurrency: int):
+    """Run a worker server on a Unix socket, executing up to `concurrency` tasks at once."""
+    init_worker()
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        
+        async def handle_task(request: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    response = {"id": request["id"], "result": await run_task(request["task"])}
+                except Exception as e:
+                    response = {"id": request["id"], "error": str(e)}
+            async with write_lock:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            task = asyncio.create_task(handle_task(json.loads(line)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+    
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(handle_connection, path, limit=2 ** 24)
+    logger.info("Step worker listening on %s (concurrency %d)", path, concurrency)
+    async with server:
+        await server.serve_forever()
+
+_step_queue: Optional[StepQueue] = None
+_step_queue_lock = threading.Lock()
+
+def get_step_queue() -> Optional[StepQueue]:
+    """
+    Get the configured step queue, creating it on first use.
+    Returns None when STEP_QUEUE is "off" (the default) and no custom queue has been installed.
+    """
+    global _step_queue
+    if _step_queue is None and config.STEP_QUEUE == "off":
+        return None
+    
+    with _step_queue_lock:
+        if _step_queue is None:
+            if config.STEP_QUEUE == "process":
+                _step_queue = ProcessStepQueue(config.STEP_WORKERS)
+            elif config.STEP_QUEUE == "socket":
+                _step_queue = SocketStepQueue(
+                    [path.strip() for path in config.STEP_QUEUE_SOCKETS.split(",") if path.strip()]
+                )
+            else:
+                raise ValueError(f"Unknown step queue: {config.STEP_QUEUE}")
+        return _step_queue
+
+def set_step_queue(queue: Optional[StepQueue]):
+    """Install a custom step queue, e.g. one backed by an external broker."""
+    global _step_queue
+    with _step_queue_lock:
+        _step_queue = queue
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.stderr.write("Usage: python -m app.agents.step_queue <socket_path> [concurrency]\n")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    asyncio.run(serve(sys.argv[1], int(sys.argv[2]) if len(sys.argv) == 3 else config.STEP_WORKERS))
@@ -0,0 +1,78 @@
+"""
+Small in-process caching helpers shared by tools and agents.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+_MISSING = object()
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+    
+    def __init__(self, max_size: int = 256):
+        """Initialize an empty cache holding at most max_size entries."""
+        self.max_size = max(int(max_size), 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, marking it as recently used."""
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a cached value."""
+        with self._lock:
+            return self._entries.pop(key, default)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def values(self) -> list:
+        """Get a snapshot of the cached values, least recently used first."""
+        with self._lock:
+            return list(self._entries.values())
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit-rate counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
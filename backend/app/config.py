@@ -7,14 +7,182 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-# Global variable to store the dynamic API key
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean feature flag from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment, falling back on bad values."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back on bad values."""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+# Global variable to store the dynamic API key (the default when no tenant key is set)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
-def set_api_key(api_key: str):
-    """Set the Gemini API key dynamically."""
+# API keys set per tenant through /set-api-key with an X-Tenant-ID header.
+# The header is not authenticated: any client that sends a tenant id can use, and
+# replace, that tenant's key. Deploy behind a proxy that authenticates callers and
+# sets X-Tenant-ID itself, or have clients send their own X-Gemini-Api-Key.
+TENANT_API_KEYS = {}
+
+# Pool of isolated Gemini clients, one per API key
+GEMINI_CLIENT_POOL_SIZE = _env_int("GEMINI_CLIENT_POOL_SIZE", 64)
+GEMINI_MAX_CONCURRENCY_PER_KEY = _env_int("GEMINI_MAX_CONCURRENCY_PER_KEY", 8)
+GEMINI_RPM_PER_KEY = _env_float("GEMINI_RPM_PER_KEY", 0.0)  # 0 disables the limit
+GEMINI_TPM_PER_KEY = _env_float("GEMINI_TPM_PER_KEY", 0.0)  # 0 disables the limit
+LLM_EXPECTED_OUTPUT_TOKENS = _env_int("LLM_EXPECTED_OUTPUT_TOKENS", 512)
+# Reject new requests with 429 when the key's budget would make them wait longer than this
+LLM_ADMISSION_MAX_WAIT = _env_float("LLM_ADMISSION_MAX_WAIT", 60.0)
+
+# Record/replay LLM calls: "off", "record" or "replay"
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").strip().lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl.gz")
+LLM_REPLAY_SPEED = _env_float("LLM_REPLAY_SPEED", 1.0)  # latency scale; 0 replays instantly
+
+# Request tracing: span trees for the last TRACE_BUFFER_SIZE requests at /debug/requests
+TRACING_ENABLED = _env_flag("TRACING_ENABLED", True)
+TRACE_BUFFER_SIZE = _env_int("TRACE_BUFFER_SIZE", 200)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")  # e.g. http://localhost:4318
+
+# Sampling profiler (/admin/profiler); off until started at runtime
+PROFILER_INTERVAL_MS = _env_float("PROFILER_INTERVAL_MS", 5.0)
+# Token required in the X-Admin-Token header for /admin endpoints (empty disables those endpoints)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Prewarm SDK clients, indexes and caches in the background at startup;
+# /health/ready reports 503 until this finishes
+PREWARM_ON_STARTUP = _env_flag("PREWARM_ON_STARTUP")
+
+# Fused planning mode: plan and constitutional self-assessment in one LLM call.
+# The separate Ethics Agent review only runs for plans flagged as borderline,
+# plus a sampled fraction of confident plans to measure agreement.
+FUSED_PLAN_REVIEW = _env_flag("FUSED_PLAN_REVIEW")
+FUSED_REVIEW_AUDIT_RATE = _env_float("FUSED_REVIEW_AUDIT_RATE", 0.0)
+
+# Reuse approved plans for goals that match a cached template (entities masked)
+# with at least PLAN_CACHE_SIMILARITY cosine similarity; skips the planning call, and
+# the plan review when the goal's entities are the ones the plan was approved with
+PLAN_CACHE_ENABLED = _env_flag("PLAN_CACHE_ENABLED")
+PLAN_CACHE_SIZE = _env_int("PLAN_CACHE_SIZE", 256)
+PLAN_CACHE_SIMILARITY = _env_float("PLAN_CACHE_SIMILARITY", 0.9)
+
+# Local safety pre-screen before Ethics Agent reviews: risk scores above
+# REJECT_ABOVE are rejected without an LLM call, everything else is reviewed;
+# AUDIT_RATE of those local rejections still go to the LLM to measure agreement.
+SAFETY_SCREEN_ENABLED = _env_flag("SAFETY_SCREEN_ENABLED")
+SAFETY_SCREEN_REJECT_ABOVE = _env_float("SAFETY_SCREEN_REJECT_ABOVE", 0.95)
+SAFETY_SCREEN_AUDIT_RATE = _env_float("SAFETY_SCREEN_AUDIT_RATE", 0.0)
+
+# Review final responses longer than ETHICS_REVIEW_CHUNK_CHARS as overlapping
+# chunks (split at paragraph and code-block boundaries) reviewed concurrently
+CHUNKED_ETHICS_REVIEW = _env_flag("CHUNKED_ETHICS_REVIEW")
+ETHICS_REVIEW_CHUNK_CHARS = _env_int("ETHICS_REVIEW_CHUNK_CHARS", 4000)
+ETHICS_REVIEW_CHUNK_OVERLAP = _env_int("ETHICS_REVIEW_CHUNK_OVERLAP", 400)
+
+# Execute consecutive reasoning-only plan steps in one batched LLM call
+BATCH_REASONING_STEPS = _env_flag("BATCH_REASONING_STEPS")
+REASONING_BATCH_SIZE = _env_int("REASONING_BATCH_SIZE", 4)
+
+# Skip remaining plan steps once the goal is met: "off", "conservative" (only steps
+# the planner tagged [optional]) or "adaptive" (also wrap-up and already covered steps).
+# The goal is met when a one-word LLM check says so; the check is only asked once
+# COVERAGE of the goal's content words not restated by the plan appear in step results.
+EARLY_TERMINATION = os.getenv("EARLY_TERMINATION", "off").strip().lower()
+EARLY_TERMINATION_COVERAGE = _env_float("EARLY_TERMINATION_COVERAGE", 0.6)
+
+# Context caching for the static prefix of agent prompts: "off", "local"
+# (stand-in that only reports the input tokens caching would save) or "gemini"
+PROMPT_PREFIX_CACHE = os.getenv("PROMPT_PREFIX_CACHE", "off").strip().lower()
+PROMPT_PREFIX_CACHE_TTL = _env_float("PROMPT_PREFIX_CACHE_TTL", 3600.0)
+PROMPT_PREFIX_CACHE_MIN_TOKENS = _env_int("PROMPT_PREFIX_CACHE_MIN_TOKENS", 0)
+
+# Stream Execution Agent responses and start tool calls as soon as they are parsed
+STREAM_EXECUTION = _env_flag("STREAM_EXECUTION")
+
+# Compress /chat and /chat/batch streams when the client sends Accept-Encoding (gzip, br)
+STREAM_COMPRESSION = _env_flag("STREAM_COMPRESSION", True)
+STREAM_COMPRESSION_LEVEL = _env_int("STREAM_COMPRESSION_LEVEL", 5)
+
+# Buffer each event stream (at most STREAM_BUFFER_EVENTS events) between the
+# orchestrator and the client, collapsing superseded status events for slow clients
+STREAM_BACKPRESSURE = _env_flag("STREAM_BACKPRESSURE")
+STREAM_BUFFER_EVENTS = _env_int("STREAM_BUFFER_EVENTS", 64)
+
+# Write missing .gz/.br siblings of the frontend build when the static index is built
+STATIC_PRECOMPRESS = _env_flag("STATIC_PRECOMPRESS")
+
+# web_search backend: "simulated" (canned results), "offline" (local BM25 index) or "http"
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "simulated").strip().lower()
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "search_index")
+SEARCH_API_URL = os.getenv("SEARCH_API_URL", "")
+SEARCH_API_KEY = os.getenv("SEARCH_API_KEY", "")
+SEARCH_CACHE_SIZE = _env_int("SEARCH_CACHE_SIZE", 1024)
+
+# Real SQL for code_interpreter: datasets (a directory of CSV/JSONL/Parquet files or
+# a JSON manifest) loaded into in-memory SQLite and queried read-only through a
+# pool of SQL_POOL_SIZE connections; without datasets, SQL output is simulated
+SQL_DATASETS = os.getenv("SQL_DATASETS", "")
+SQL_POOL_SIZE = _env_int("SQL_POOL_SIZE", 4)
+SQL_MAX_ROWS = _env_int("SQL_MAX_ROWS", 200)
+SQL_TIMEOUT_SECONDS = _env_float("SQL_TIMEOUT_SECONDS", 5.0)
+SQL_MAX_RESULT_CHARS = _env_int("SQL_MAX_RESULT_CHARS", 8000)
+SQL_RESULT_CACHE_SIZE = _env_int("SQL_RESULT_CACHE_SIZE", 256)
+
+# Shared result cache for tools registered as pure, plus dedup of identical
+# calls within a plan; web_search results expire after WEB_SEARCH_CACHE_TTL seconds
+TOOL_CACHE_ENABLED = _env_flag("TOOL_CACHE_ENABLED")
+TOOL_CACHE_SIZE = _env_int("TOOL_CACHE_SIZE", 2048)
+WEB_SEARCH_CACHE_TTL = _env_float("WEB_SEARCH_CACHE_TTL", 600.0)
+
+# Per-request artifact store: tool outputs longer than ARTIFACT_INLINE_CHARS are
+# replaced in observations by a handle and a preview; artifacts longer than
+# ARTIFACT_SPILL_CHARS are kept on disk (ARTIFACT_DIR, default: system temp dir)
+ARTIFACT_STORE_ENABLED = _env_flag("ARTIFACT_STORE_ENABLED")
+ARTIFACT_INLINE_CHARS = _env_int("ARTIFACT_INLINE_CHARS", 2000)
+ARTIFACT_PREVIEW_CHARS = _env_int("ARTIFACT_PREVIEW_CHARS", 300)
+ARTIFACT_SPILL_CHARS = _env_int("ARTIFACT_SPILL_CHARS", 200000)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "")
+
+# Run plan steps (and their tool calls) on separate execution workers: "off",
+# "process" (local pool of STEP_WORKERS processes) or "socket" (worker servers
+# started with `python -m app.agents.step_queue <socket>`, listed in STEP_QUEUE_SOCKETS)
+STEP_QUEUE = os.getenv("STEP_QUEUE", "off").strip().lower()
+STEP_WORKERS = _env_int("STEP_WORKERS", 4)
+STEP_QUEUE_SOCKETS = os.getenv("STEP_QUEUE_SOCKETS", "/tmp/mas-steps.sock")
+
+# Batch chat API (/chat/batch and app.agents.batch_runner)
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 4)
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 32)
+BATCH_PROGRESS_DIR = os.getenv("BATCH_PROGRESS_DIR", "batch_progress")
+BATCH_RESPONSE_CACHE_SIZE = _env_int("BATCH_RESPONSE_CACHE_SIZE", 4096)
+
+# Asynchronous job API (/jobs and app.agents.jobs)
+JOB_DIR = os.getenv("JOB_DIR", "jobs")
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)
+JOB_RETENTION_SECONDS = _env_float("JOB_RETENTION_SECONDS", 86400.0)
+
+def set_api_key(api_key: str, tenant_id: str = None):
+    """Set the Gemini API key dynamically, for one tenant or as the default."""
     global GEMINI_API_KEY
-    GEMINI_API_KEY = api_key
+    if tenant_id:
+        TENANT_API_KEYS[tenant_id] = api_key
+    else:
+        GEMINI_API_KEY = api_key
 
-def get_api_key() -> str:
-    """Get the current Gemini API key."""
-    return GEMINI_API_KEY
\ No newline at end of file
+def get_api_key(tenant_id: str = None) -> str:
+    """Get the Gemini API key for a tenant, falling back to the default key."""
+    if tenant_id and tenant_id in TENANT_API_KEYS:
+        return TENANT_API_KEYS[tenant_id]
+    return GEMINI_API_KEY
@@ -2,25 +2,72 @@
 FastAPI main application for Master Agentic AI.
 Provides API endpoints for chat functionality and serves the React frontend.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import json
+import math
 import os
-from typing import AsyncGenerator
+import shutil
+import tempfile
+from typing import AsyncGenerator, Optional, Tuple
 
-from .models import ChatRequest, ChatResponse, ApiKeyRequest
-from .agents.master_orchestrator import MasterAgentOrchestrator
+from .models import ChatRequest, ChatResponse, ApiKeyRequest, WebSocketMessage, BatchChatRequest, JobRequest
+from .agents.master_orchestrator import MasterAgentOrchestrator, estimate_orchestration_cost
+from .agents.batch_runner import BatchRunner, load_batch_items
+from .agents.jobs import job_manager
+from .agents.review_stats import fused_review_stats, safety_screen_stats
+from .agents.plan_cache import plan_cache
+from .agents.early_termination import early_termination_stats
+from .agents.client_pool import gemini_client_pool
+from .agents.rate_limiter import Reservation
+from .agents.cassette import get_cassette, close_cassette
+from .agents.prefix_cache import get_prefix_cache
+from .agents.prompts import prompt_stats
+from .agents.step_queue import get_step_queue
+from .tracing import trace_buffer, to_otlp
+from .profiler import profiler
+from .startup import readiness, prewarm, prewarm_clients
+from .streaming import event_stream_response, stream_stats
+from .static_assets import StaticAssets
+from .tools.search_backends import get_search_backend
+from .tools.tool_cache import tool_result_cache
+from .tools.sql_datasets import get_dataset_store, DATASET_EXTENSIONS
 from . import config
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prewarm in the background (if enabled) so liveness is reported while readiness waits."""
+    if config.PREWARM_ON_STARTUP:
+        async def run_prewarm():
+            await asyncio.to_thread(prewarm)
+            prewarm_clients()
+            readiness.mark_ready()
+        prewarm_task = asyncio.create_task(run_prewarm())
+    else:
+        prewarm_task = None
+        # The search index is cheap to open, so it is always mapped before serving
+        get_search_backend()
+        readiness.mark_ready()
+    yield
+    if prewarm_task and not prewarm_task.done():
+        prewarm_task.cancel()
+    await job_manager.stop()
+    if get_step_queue():
+        await get_step_queue().close()
+    await asyncio.to_thread(close_cassette)
+
 # Create FastAPI application
 app = FastAPI(
     title="Master Agentic AI",
     description="A sophisticated Multi-Agent System (MAS) implementing Constitutional AI principles",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -32,84 +79,566 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def resolve_api_key(api_key: Optional[str] = None, tenant_id: Optional[str] = None) -> str:
+    """Resolve the credentials for a request: per-request key, then tenant key, then the default."""
+    return api_key or config.get_api_key(tenant_id)
+
+def check_llm_budget(api_key: str, message: str, history: Optional[list] = None) -> float:
+    """
+    Estimate how long a full orchestration would wait on this key's rate limits in total.
+    Returns 0 when it can run start to finish without throttling.
+    """
+    calls, tokens = estimate_orchestration_cost(message, history)
+    return gemini_client_pool.get(api_key).rate_limiter.estimate_wait(calls, tokens)
+
+def admit_llm_request(api_key: str, message: str, history: Optional[list] = None) -> Tuple[float, Optional[Reservation]]:
+    """
+    Admission check for one orchestration. Returns (wait, None) when it would wait longer than
+    LLM_ADMISSION_MAX_WAIT, otherwise (wait, reservation) holding its estimated budget, so
+    requests admitted after it queue behind it. The orchestration releases the reservation.
+    """
+    wait = check_llm_budget(api_key, message, history)
+    if wait > config.LLM_ADMISSION_MAX_WAIT:
+        return wait, None
+    calls, tokens = estimate_orchestration_cost(message, history)
+    return wait, gemini_client_pool.get(api_key).rate_limiter.reserve(calls, tokens)
+
 @app.post("/set-api-key")
-async def set_api_key(request: ApiKeyRequest):
-    """Set the Gemini API key for the session."""
+async def set_api_key(request: ApiKeyRequest, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Set the Gemini API key for the tenant named in X-Tenant-ID, or the default key.
+    X-Tenant-ID is trusted as sent; see TENANT_API_KEYS in config.py.
+    """
     try:
-        config.set_api_key(request.api_key)
+        config.set_api_key(request.api_key, tenant_id=x_tenant_id)
         return {"status": "success", "message": "API key set successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to set API key: {str(e)}")
 
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(
+    request: ChatRequest,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """
     Main chat endpoint that processes user messages through the multi-agent system.
-    Returns a streaming response with agent status updates and final response.
+    Returns a streaming response with agent status updates and final response,
+    as NDJSON or MessagePack (Accept) and optionally gzip/brotli compressed (Accept-Encoding).
     """
     try:
         # Validate that we have an API key
-        api_key = config.get_api_key()
+        api_key = resolve_api_key(x_gemini_api_key, x_tenant_id)
         if not api_key:
             raise HTTPException(
                 status_code=400, 
                 detail="Gemini API key not configured. Please set your API key first."
             )
         
+        # Admission: refuse up front rather than fail halfway through the plan
+        wait, reservation = admit_llm_request(api_key, request.message, request.conversation_history)
+        if reservation is None:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Gemini rate limit budget exhausted. Retry in about {math.ceil(wait)} seconds.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+        
         # Initialize the Master Orchestrator
         orchestrator = MasterAgentOrchestrator(api_key)
         
-        async def generate_response() -> AsyncGenerator[str, None]:
+        async def generate_response() -> AsyncGenerator[dict, None]:
             """Generate streaming response from the agent system."""
             try:
                 async for response in orchestrator.handle_message(
                     message=request.message,
-                    history=request.conversation_history
+                    history=request.conversation_history,
+                    reservation=reservation
                 ):
-                    # Convert response to JSON and yield
-                    json_response = json.dumps(response) + "\n"
-                    yield json_response
-                    
+                    yield response
+            
             except Exception as e:
                 # Send error response
-                error_response = {
+                yield {
                     "type": "error",
                     "agent": "System",
                     "message": f"An error occurred: {str(e)}",
                     "is_final": True
                 }
-                yield json.dumps(error_response) + "\n"
+            finally:
+                reservation.release()
         
-        return StreamingResponse(
+        return event_stream_response(
             generate_response(),
-            media_type="application/x-ndjson",
+            accept=accept,
+            accept_encoding=accept_encoding,
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
             }
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def _stream_batch(items: list, concurrency: Optional[int], batch_id: Optional[str], api_key: str,
+                  accept: Optional[str] = None, accept_encoding: Optional[str] = None) -> StreamingResponse:
+    """Run a batch and stream its results in completion order, negotiating format and compression."""
+    if not api_key:
+        raise HTTPException(
+            status_code=400,
+            detail="Gemini API key not configured. Please set your API key first."
+        )
+    
+    runner = BatchRunner(api_key, concurrency=concurrency)
+    
+    async def generate_batch() -> AsyncGenerator[dict, None]:
+        """Generate streaming batch results."""
+        try:
+            async for event in runner.run(items, batch_id=batch_id):
+                yield event
+        except Exception as e:
+            yield {
+                "type": "error",
+                "agent": "System",
+                "message": f"Batch failed: {str(e)}",
+                "is_final": True
+            }
+    
+    return event_stream_response(
+        generate_batch(),
+        accept=accept,
+        accept_encoding=accept_encoding,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(
+    request: BatchChatRequest,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Process a list of messages through the multi-agent system with bounded concurrency.
+    Results stream back as NDJSON in completion order; pass a batch_id to make the run resumable.
+    """
+    return _stream_batch(
+        load_batch_items(request.messages), request.concurrency, request.batch_id,
+        resolve_api_key(x_gemini_api_key, x_tenant_id), accept, accept_encoding
+    )
+
+@app.post("/chat/batch/upload")
+async def chat_batch_upload_endpoint(
+    file: UploadFile = File(...),
+    concurrency: Optional[int] = Form(None),
+    batch_id: Optional[str] = Form(None),
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Same as /chat/batch, for a JSONL file with one message (string or object) per line."""
+    try:
+        lines = (await file.read()).decode("utf-8").splitlines()
+        items = load_batch_items([json.loads(line) for line in lines if line.strip()])
+    except (UnicodeDecodeError, ValueError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL batch file: {str(e)}")
+    return _stream_batch(
+        items, concurrency, batch_id, resolve_api_key(x_gemini_api_key, x_tenant_id), accept, accept_encoding
+    )
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    request: JobRequest,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None)
+):
+    """
+    Submit a message as a background job and return its id right away.
+    Poll /jobs/{job_id} for the result or read /jobs/{job_id}/events.
+    """
+    api_key = resolve_api_key(x_gemini_api_key, x_tenant_id)
+    if not api_key:
+        raise HTTPException(
+            status_code=400,
+            detail="Gemini API key not configured. Please set your API key first."
+        )
+    
+    existing = job_manager.get(request.job_id, api_key) if request.job_id else None
+    reservation = None
+    if existing is None:
+        wait, reservation = admit_llm_request(api_key, request.message, request.conversation_history)
+        if reservation is None:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Gemini rate limit budget exhausted. Retry in about {math.ceil(wait)} seconds.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+    
+    job = await job_manager.submit(
+        request.message, request.conversation_history, api_key, job_id=request.job_id,
+        reservation=reservation
+    )
+    return {"job_id": job.job_id, "status": job.status}
+
+def _get_job(job_id: str, api_key: str):
+    """Look up a job submitted with the same API key; other keys' jobs are reported as missing."""
+    job = job_manager.get(job_id, api_key) if api_key else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None)
+):
+    """Get a job's status and, once it has finished, its final response."""
+    return _get_job(job_id, resolve_api_key(x_gemini_api_key, x_tenant_id)).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    offset: int = 0,
+    follow: bool = False,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Read a job's events from an offset.
+    With follow=true the events stream like /chat until the job finishes; otherwise
+    the events logged so far are returned with the offset to resume from.
+    """
+    job = _get_job(job_id, resolve_api_key(x_gemini_api_key, x_tenant_id))
+    offset = max(offset, 0)
+    if follow:
+        return event_stream_response(
+            job_manager.follow(job, offset),
+            accept=accept,
+            accept_encoding=accept_encoding,
+            headers={"Cache-Control": "no-cache"}
+        )
+    events = job.events[offset:]
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "events": events,
+        "next_offset": offset + len(events)
+    }
+
+@app.post("/jobs/{job_id}/retry", status_code=202)
+async def retry_job(
+    job_id: str,
+    x_tenant_id: Optional[str] = Header(None),
+    x_gemini_api_key: Optional[str] = Header(None)
+):
+    """Run a failed or interrupted job again; completed jobs are not recomputed."""
+    api_key = resolve_api_key(x_gemini_api_key, x_tenant_id)
+    if not api_key:
+        raise HTTPException(
+            status_code=400,
+            detail="Gemini API key not configured. Please set your API key first."
+        )
+    _get_job(job_id, api_key)
+    job = await job_manager.retry(job_id, api_key)
+    return {"job_id": job.job_id, "status": job.status}
+
+@app.websocket("/ws/chat")
+async def websocket_chat(websocket: WebSocket):
+    """
+    Persistent multi-turn chat session over a WebSocket.
+    The connection keeps one orchestrator and its conversation history across turns.
+    Client messages: {"type": "chat", "message": ...}, {"type": "cancel"} and
+    {"type": "steer", "message": ...}. Server messages are the same events as the /chat stream.
+    Credentials come from the X-Gemini-Api-Key header or the X-Tenant-ID header / tenant_id query parameter.
+    """
+    await websocket.accept()
+    
+    api_key = resolve_api_key(
+        websocket.headers.get("x-gemini-api-key"),
+        websocket.headers.get("x-tenant-id") or websocket.query_params.get("tenant_id")
+    )
+    if not api_key:
+        await websocket.send_json({
+            "type": "error",
+            "agent": "System",
+            "message": "Gemini API key not configured. Please set your API key first.",
+            "is_final": True
+        })
+        await websocket.close(code=1008)
+        return
+    
+    orchestrator = MasterAgentOrchestrator(api_key)
+    turn: Optional[asyncio.Task] = None
+    
+    async def run_turn(message: str, history: Optional[list], reservation: Reservation):
+        """Stream one orchestrated turn to the client."""
+        try:
+            async for response in orchestrator.handle_message(
+                message=message,
+                history=orchestrator.conversation_history if history is None else history,
+                reservation=reservation
+            ):
+                await websocket.send_json(response)
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "agent": "System",
+                "message": f"An error occurred: {str(e)}",
+                "is_final": True
+            })
+        finally:
+            reservation.release()
+    
+    try:
+        while True:
+            try:
+                incoming = WebSocketMessage(**json.loads(await websocket.receive_text()))
+            except (ValueError, TypeError, ValidationError) as e:
+                await websocket.send_json({
+                    "type": "error",
+                    "agent": "System",
+                    "message": f"Invalid message: {str(e)}",
+                    "is_final": False
+                })
+                continue
+            
+            if incoming.type == "chat":
+                if turn and not turn.done():
+                    await websocket.send_json({
+                        "type": "error",
+                        "agent": "System",
+                        "message": "A request is already running. Cancel it or steer it instead.",
+                        "is_final": False
+                    })
+                    continue
+                wait, reservation = admit_llm_request(api_key, incoming.message, orchestrator.conversation_history)
+                if reservation is None:
+                    await websocket.send_json({
+                        "type": "error",
+                        "agent": "System",
+                        "message": f"Gemini rate limit budget exhausted. Retry in about {math.ceil(wait)} seconds.",
+                        "is_final": True
+                    })
+                    continue
+                turn = asyncio.create_task(run_turn(incoming.message, incoming.conversation_history, reservation))
+            
+            elif incoming.type == "cancel":
+                if turn and not turn.done():
+                    turn.cancel()
+                    try:
+                        await turn
+                    except asyncio.CancelledError:
+                        pass
+                    await websocket.send_json({
+                        "type": "error",
+                        "agent": "System",
+                        "message": "Request cancelled.",
+                        "is_final": True
+                    })
+            
+            elif incoming.type == "steer":
+                if not turn or turn.done():
+                    # Notes are cleared when a turn ends, so they would never be applied
+                    await websocket.send_json({
+                        "type": "error",
+                        "agent": "System",
+                        "message": "No request is running to steer. Include the guidance in your next message instead.",
+                        "is_final": False
+                    })
+                    continue
+                orchestrator.steer(incoming.message)
+                await websocket.send_json({
+                    "type": "status",
+                    "agent": "Master Orchestrator",
+                    "message": "Guidance received; applying it to the remaining steps...",
+                    "is_final": False
+                })
+            
+            else:
+                await websocket.send_json({
+                    "type": "error",
+                    "agent": "System",
+                    "message": f"Unknown message type: {incoming.type}",
+                    "is_final": False
+                })
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if turn and not turn.done():
+            turn.cancel()
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint; reports liveness and readiness separately."""
     return {
         "status": "healthy",
         "service": "Master Agentic AI",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "live": True,
+        **readiness.status()
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving."""
+    return {"live": True}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 503 until startup prewarming has finished."""
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=readiness.status())
+    return readiness.status()
+
+def require_admin(token: Optional[str]):
+    """Reject admin requests without the configured X-Admin-Token; all are rejected while ADMIN_TOKEN is unset."""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest((token or "").encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/debug/requests")
+async def debug_requests(limit: int = 50, format: str = "json", x_admin_token: Optional[str] = Header(None)):
+    """Span trees for the most recent requests (ring buffer), optionally as OTLP/JSON."""
+    require_admin(x_admin_token)
+    traces = trace_buffer.list(limit)
+    if format == "otlp":
+        return [to_otlp(root) for root in traces]
+    return [{"trace_id": root.trace_id, **root.to_dict()} for root in traces]
+
+@app.get("/debug/requests/{trace_id}")
+async def debug_request(trace_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Span tree for a single recent request."""
+    require_admin(x_admin_token)
+    root = trace_buffer.get(trace_id)
+    if root is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have left the ring buffer)")
+    return {"trace_id": root.trace_id, **root.to_dict()}
+
+@app.post("/admin/profiler/start")
+async def start_profiler(
+    duration: float = 0.0,
+    request_sample_rate: float = 0.0,
+    interval_ms: Optional[float] = None,
+    reset: bool = False,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Start the sampling profiler for `duration` seconds, and/or for a sampled
+    fraction of requests. No restart needed; stacks accumulate until reset.
+    """
+    require_admin(x_admin_token)
+    if duration <= 0 and request_sample_rate <= 0:
+        raise HTTPException(status_code=400, detail="Set a duration or a request_sample_rate")
+    if reset:
+        profiler.reset()
+    profiler.start(duration=duration, request_sample_rate=request_sample_rate, interval_ms=interval_ms)
+    return profiler.status()
+
+@app.post("/admin/profiler/stop")
+async def stop_profiler(x_admin_token: Optional[str] = Header(None)):
+    """Stop the sampling profiler; collected stacks are kept."""
+    require_admin(x_admin_token)
+    profiler.stop()
+    return profiler.status()
+
+@app.get("/admin/profiler")
+async def get_profile(format: str = "json", x_admin_token: Optional[str] = Header(None)):
+    """
+    Profile collected so far: "json" (status and top functions by self time) or
+    "collapsed" (collapsed stacks for flamegraph.pl or speedscope).
+    """
+    require_admin(x_admin_token)
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return {**profiler.status(), "top_functions": profiler.top_functions()}
+
+@app.post("/admin/datasets")
+async def upload_dataset(
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None),
+    indexes: Optional[str] = Form(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Load a CSV, JSONL or Parquet file as a table for SQL in code_interpreter.
+    `indexes` is a comma-separated list of columns to index; an existing table of the same name is replaced.
+    """
+    require_admin(x_admin_token)
+    stem, extension = os.path.splitext(file.filename or "")
+    if extension.lower() not in DATASET_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Dataset must be one of: {', '.join(DATASET_EXTENSIONS)}")
+    
+    # Copy the upload to disk in chunks, off the event loop, instead of reading it into memory
+    with tempfile.NamedTemporaryFile(suffix=extension.lower(), delete=False) as f:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, f, 1 << 20)
+    try:
+        table = await asyncio.to_thread(
+            get_dataset_store(create=True).load,
+            name or stem, f.name,
+            [column.strip() for column in (indexes or "").split(",") if column.strip()]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to load dataset: {str(e)}")
+    finally:
+        os.remove(f.name)
+    # The uploaded file is only a temporary copy
+    return {"status": "success", **{key: value for key, value in table.items() if key != "path"}}
+
 @app.get("/api/status")
-async def api_status():
+async def api_status(x_tenant_id: Optional[str] = Header(None)):
     """API status endpoint with configuration info."""
     return {
-        "api_key_configured": bool(config.get_api_key()),
+        "api_key_configured": bool(config.get_api_key(x_tenant_id)),
+        "client_pool": gemini_client_pool.stats(),
+        "llm_cassette": get_cassette().stats() if get_cassette() else {"mode": "off"},
+        "prompts": {
+            "prefix_cache": get_prefix_cache().stats() if get_prefix_cache() else {"mode": "off"},
+            **prompt_stats.snapshot()
+        },
         "agents_available": ["orchestrator", "planning", "execution", "ethics"],
-        "tools_available": ["web_search", "code_interpreter", "constitution_retriever"]
+        "tools_available": ["web_search", "code_interpreter", "constitution_retriever"],
+        "search_backend": get_search_backend().stats() if get_search_backend() else {"backend": "simulated"},
+        "streams": {
+            "backpressure": config.STREAM_BACKPRESSURE,
+            "buffer_events": config.STREAM_BUFFER_EVENTS,
+            **stream_stats.snapshot()
+        },
+        "step_queue": get_step_queue().stats() if get_step_queue() else {"backend": "off"},
+        "sql_datasets": get_dataset_store().stats() if get_dataset_store() else {"tables": {}},
+        "tool_cache": {"enabled": config.TOOL_CACHE_ENABLED, **tool_result_cache.stats()},
+        "fused_plan_review": {
+            "enabled": config.FUSED_PLAN_REVIEW,
+            "audit_rate": config.FUSED_REVIEW_AUDIT_RATE,
+            **fused_review_stats.snapshot()
+        },
+        "plan_cache": {
+            "enabled": config.PLAN_CACHE_ENABLED,
+            **plan_cache.stats()
+        },
+        "early_termination": {
+            "mode": config.EARLY_TERMINATION,
+            "coverage_threshold": config.EARLY_TERMINATION_COVERAGE,
+            **early_termination_stats.snapshot()
+        },
+        "safety_screen": {
+            "enabled": config.SAFETY_SCREEN_ENABLED,
+            "reject_above": config.SAFETY_SCREEN_REJECT_ABOVE,
+            "audit_rate": config.SAFETY_SCREEN_AUDIT_RATE,
+            **safety_screen_stats.snapshot()
+        },
+        "jobs": job_manager.stats()
     }
 
 # Exception handlers
@@ -130,16 +659,10 @@ async def pydantic_exception_handler(request, exc):
 # Serve static files (React frontend)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
-    
-    @app.get("/")
-    async def serve_frontend():
-        """Serve the React frontend."""
-        index_path = os.path.join(static_dir, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        else:
-            return {"message": "Frontend not built. Please build the React frontend first."}
+    # Registered last so API routes take precedence; "/" and unknown page paths serve index.html
+    static_assets = StaticAssets(static_dir)
+    app.mount("/static", static_assets, name="static")
+    app.mount("/", static_assets, name="frontend")
 else:
     @app.get("/")
     async def root():
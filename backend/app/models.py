@@ -2,7 +2,7 @@
 Pydantic models for request and response validation.
 """
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Union
 
 class ChatRequest(BaseModel):
     message: str
@@ -14,4 +14,17 @@ class ChatResponse(BaseModel):
     is_final: bool = True
 
 class ApiKeyRequest(BaseModel):
-    api_key: str
\ No newline at end of file
+    api_key: str
+
+class WebSocketMessage(BaseModel):
+    type: str = "chat"  # "chat", "cancel" or "steer"
+    message: str = ""
+    conversation_history: Optional[List[dict]] = None
+
+class BatchChatRequest(BaseModel):
+    messages: List[Union[str, dict]]
+    concurrency: Optional[int] = None
+    batch_id: Optional[str] = None
+
+class JobRequest(ChatRequest):
+    job_id: Optional[str] = None  # Resubmitting the same id returns the existing job
@@ -0,0 +1,161 @@
+"""
+Opt-in statistical profiler for hot-path analysis in production.
+
+A background thread samples the Python stacks of all other threads at a
+fixed interval and aggregates them as collapsed stacks ("a;b;c count"),
+the input format of flamegraph.pl and speedscope. It can run for a fixed
+period, or only while a sampled fraction of requests is in flight, and is
+controlled at runtime through the /admin/profiler endpoints.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+import os
+import random
+import sys
+import threading
+import time
+
+from . import config
+
+# Leaf frames, as (module, function), of threads that are blocked waiting rather than using CPU
+IDLE_FRAMES = {
+    ("selectors", "select"),
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"),
+    ("socket", "accept"),
+    ("concurrent.futures.thread", "_worker"),
+    ("multiprocessing.connection", "wait")
+}
+
+def is_idle_frame(frame) -> bool:
+    """Whether a leaf frame is a known blocking wait in the standard library."""
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES
+
+class SamplingProfiler:
+    """Samples thread stacks and aggregates them across requests."""
+    
+    def __init__(self):
+        """Initialize a stopped profiler."""
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.interval = config.PROFILER_INTERVAL_MS / 1000.0
+        self.until = 0.0
+        self.request_sample_rate = 0.0
+        self.active_requests = 0
+        self.sampled_requests = 0
+        self.started_at: Optional[float] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the sampling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, duration: float = 0.0, request_sample_rate: float = 0.0, interval_ms: float = None):
+        """
+        Start sampling. With a duration, every thread is sampled until it elapses;
+        with a request_sample_rate, only while sampled requests are running.
+        """
+        with self._lock:
+            if interval_ms:
+                self.interval = max(interval_ms, 1) / 1000.0
+            self.until = time.monotonic() + duration if duration > 0 else 0.0
+            self.request_sample_rate = min(max(request_sample_rate, 0.0), 1.0)
+            self.started_at = time.time()
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        """Stop sampling; collected stacks are kept until reset."""
+        with self._lock:
+            self.until = 0.0
+            self.request_sample_rate = 0.0
+            self._stop.set()
+    
+    def reset(self):
+        """Discard collected stacks."""
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.sampled_requests = 0
+    
+    @contextmanager
+    def profile_request(self):
+        """Mark a request as in flight if it is picked for request-sampled profiling."""
+        sampled = self.request_sample_rate > 0 and random.random() < self.request_sample_rate
+        if sampled:
+            with self._lock:
+                self.active_requests += 1
+                self.sampled_requests += 1
+        try:
+            yield sampled
+        finally:
+            if sampled:
+                with self._lock:
+                    self.active_requests -= 1
+    
+    def _should_sample(self) -> bool:
+        """Whether the current tick should take a sample."""
+        return time.monotonic() < self.until or self.active_requests > 0
+    
+    def _run(self):
+        """Sampling loop; exits when stopped or when no mode is active."""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self._should_sample():
+                if not self.request_sample_rate and time.monotonic() >= self.until:
+                    break
+                continue
+            
+            collected = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or is_idle_frame(frame):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < 128:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                collected.append(";".join(reversed(stack)))
+            
+            with self._lock:
+                self.samples += 1
+                self.stacks.update(collected)
+    
+    def collapsed(self) -> str:
+        """Aggregated stacks in collapsed format, one "frame;frame;frame count" per line."""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+    
+    def top_functions(self, limit: int = 30) -> list:
+        """Functions ranked by self time (samples where they are the leaf frame)."""
+        leaf_counts: Counter = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                leaf_counts[stack.rsplit(";", 1)[-1]] += count
+            total = sum(self.stacks.values()) or 1
+        return [
+            {"function": name, "samples": count, "share": round(count / total, 4)}
+            for name, count in leaf_counts.most_common(limit)
+        ]
+    
+    def status(self) -> Dict[str, Any]:
+        """Get the profiler state and counters."""
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000, 3),
+            "seconds_remaining": round(max(self.until - time.monotonic(), 0.0), 1),
+            "request_sample_rate": self.request_sample_rate,
+            "sampled_requests": self.sampled_requests,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            "started_at": self.started_at
+        }
+
+profiler = SamplingProfiler()
@@ -0,0 +1,98 @@
+"""
+Startup prewarming, readiness tracking and import-time profiling.
+
+With PREWARM_ON_STARTUP enabled, the lifespan hook runs prewarm() in the
+background: it imports the Gemini SDK, builds the pooled client for the
+default API key, parses the constitution, opens the search index and LLM cassette and
+loads the SQL datasets. /health/ready reports 503 until it finishes, while /health/live
+answers as soon as the process is serving.
+
+Profile the import chain of the app:
+
+    python -m app.startup
+"""
+from typing import Dict, Any, List
+import re
+import subprocess
+import sys
+import time
+
+from . import config
+
+class Readiness:
+    """Tracks whether the service has finished startup work."""
+    
+    def __init__(self):
+        """Start out not ready."""
+        self.ready = False
+        self.started_at = time.time()
+        self.ready_at = None
+        self.steps: Dict[str, Any] = {}
+    
+    def mark_ready(self):
+        """Record that startup work is complete."""
+        self.ready = True
+        self.ready_at = time.time()
+    
+    def status(self) -> Dict[str, Any]:
+        """Get readiness details."""
+        return {
+            "ready": self.ready,
+            "startup_seconds": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            "prewarm": self.steps
+        }
+
+readiness = Readiness()
+
+def _prewarm_step(name: str, func):
+    """Run one prewarm step, recording its duration or error without failing startup."""
+    started = time.perf_counter()
+    try:
+        func()
+        readiness.steps[name] = {"seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        readiness.steps[name] = {"seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+def prewarm():
+    """Do the one-off setup that would otherwise land on the first requests. Safe to run in a thread."""
+    from .agents.client_pool import load_sdk
+    from .agents.cassette import get_cassette
+    from .tools.constitution_retriever import parse_constitution
+    from .tools.search_backends import get_search_backend
+    from .tools.sql_datasets import get_dataset_store
+    
+    _prewarm_step("sdk_import", load_sdk)
+    _prewarm_step("constitution", parse_constitution)
+    _prewarm_step("search_backend", get_search_backend)
+    _prewarm_step("llm_cassette", get_cassette)
+    _prewarm_step("sql_datasets", get_dataset_store)
+
+def prewarm_clients():
+    """Create the pooled client for the default API key. Must run on the event loop thread."""
+    from .agents.client_pool import gemini_client_pool
+    
+    if config.get_api_key():
+        _prewarm_step("gemini_client", lambda: gemini_client_pool.get(config.get_api_key()).model("gemini-pro"))
+
+def import_profile(module: str = "app.main", top: int = 25) -> List[Dict[str, Any]]:
+    """Import a module in a fresh interpreter with -X importtime and rank modules by cumulative time."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    ).stderr
+    
+    rows = []
+    for line in output.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2
+            })
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+if __name__ == "__main__":
+    for row in import_profile(sys.argv[1] if len(sys.argv) > 1 else "app.main"):
+        print(f"{row['cumulative_ms']:10.1f} ms cumulative {row['self_ms']:9.1f} ms self  {'  ' * row['depth']}{row['module']}")
@@ -0,0 +1,172 @@
+"""
+Static file serving for the React build.
+
+The directory is indexed once at startup: size, ETag, media type and any
+precompressed `.br`/`.gz` siblings of every file, so serving a request needs
+no filesystem lookups. Fingerprinted build outputs (e.g. assets/index-CRRU0xFI.js)
+are sent with a one-year immutable Cache-Control; everything else, including
+index.html, must be revalidated with its ETag. Each encoding of a file is a
+different representation, so the br and gzip variants get their own ETags
+(the file's ETag with an encoding suffix). Unknown paths requested by a
+browser fall back to index.html for client-side routing.
+
+Write the compressed siblings after a frontend build:
+
+    python -m app.static_assets app/static
+"""
+from typing import Dict, Any, Optional
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.types import Scope, Receive, Send
+
+from .streaming import parse_accept_header
+from . import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".xml", ".wasm"}
+# Vite/Rollup style content hashes: a separator and 8+ hash characters including a digit
+_FINGERPRINT_RE = re.compile(r"[.-](?=[A-Za-z_-]*\d)[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+_ENCODING_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+def is_fingerprinted(path: str) -> bool:
+    """Whether a file name carries a content hash, so its content never changes."""
+    return bool(_FINGERPRINT_RE.search(os.path.basename(path)))
+
+def _etag(path: str) -> str:
+    """Strong ETag from the file content, for the uncompressed representation."""
+    digest = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()}"'
+
+def build_index(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Index the files under a directory by URL path."""
+    index = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] in (".br", ".gz") and os.path.exists(path[:-3]):
+                continue  # a compressed sibling, indexed with its original
+            url_path = os.path.relpath(path, directory).replace(os.sep, "/")
+            variants = {}
+            for encoding, extension in _ENCODING_EXTENSIONS.items():
+                if os.path.isfile(path + extension):
+                    variants[encoding] = {"path": path + extension, "stat": os.stat(path + extension)}
+            index[url_path] = {
+                "path": path,
+                "stat": os.stat(path),
+                "etag": _etag(path),
+                "media_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+                "cache_control": IMMUTABLE_CACHE_CONTROL if is_fingerprinted(name) else REVALIDATE_CACHE_CONTROL,
+                "variants": variants
+            }
+    return index
+
+def precompress(directory: str, min_size: int = 1024) -> int:
+    """Write .gz (and .br, if brotli is installed) siblings for compressible files; returns files written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS or os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            outputs = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                outputs[".br"] = brotli.compress(data, quality=11)
+            for extension, compressed in outputs.items():
+                target = path + extension
+                if len(compressed) >= len(data):
+                    continue
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+class StaticAssets:
+    """ASGI app serving an indexed static directory with precompressed variants and cache headers."""
+    
+    def __init__(self, directory: str, fallback: Optional[str] = "index.html"):
+        """Index the directory; unknown paths requested by browsers get the fallback file."""
+        self.directory = directory
+        self.fallback = fallback
+        if config.STATIC_PRECOMPRESS:
+            precompress(directory)
+        self.index = build_index(directory)
+    
+    def lookup(self, path: str, accept: str = "") -> Optional[Dict[str, Any]]:
+        """Find the indexed entry for a URL path, falling back to the SPA entry point for page loads."""
+        path = path.strip("/") or self.fallback or ""
+        entry = self.index.get(path)
+        if entry is None and self.fallback and "text/html" in accept:
+            entry = self.index.get(self.fallback)
+        return entry
+    
+    def response(self, entry: Dict[str, Any], headers: Headers, method: str) -> Response:
+        """Build the response for an entry, honoring Accept-Encoding and If-None-Match."""
+        response_headers = {"cache-control": entry["cache_control"]}
+        if entry["variants"]:
+            response_headers["vary"] = "Accept-Encoding"
+        
+        path, stat_result, etag = entry["path"], entry["stat"], entry["etag"]
+        accepted = parse_accept_header(headers.get("accept-encoding"))
+        for encoding in ("br", "gzip"):
+            if accepted.get(encoding, 0) > 0 and encoding in entry["variants"]:
+                path, stat_result = entry["variants"][encoding]["path"], entry["variants"][encoding]["stat"]
+                etag = f'{etag[:-1]}-{encoding}"'
+                response_headers["content-encoding"] = encoding
+                break
+        response_headers["etag"] = etag
+        
+        if_none_match = [tag.strip().replace("W/", "") for tag in headers.get("if-none-match", "").split(",")]
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status_code=304, headers=response_headers)
+        
+        return FileResponse(
+            path,
+            headers=response_headers,
+            media_type=entry["media_type"],
+            stat_result=stat_result,
+            method=method
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Serve GET and HEAD requests from the index."""
+        if scope["type"] != "http":
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1000})
+            return
+        headers = Headers(scope=scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+        else:
+            entry = self.lookup(scope["path"], headers.get("accept", ""))
+            if entry is None:
+                response = PlainTextResponse("Not Found", status_code=404)
+            else:
+                response = self.response(entry, headers, scope["method"])
+        await response(scope, receive, send)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.stderr.write("usage: python -m app.static_assets <static_dir>\n")
+        sys.exit(2)
+    print(f"wrote {precompress(sys.argv[1])} compressed files")
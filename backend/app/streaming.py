@@ -0,0 +1,271 @@
+"""
+Event stream encoding for the streaming endpoints.
+
+Events are NDJSON by default. Clients can negotiate a compact MessagePack
+stream (a concatenation of MessagePack maps) with
+`Accept: application/x-msgpack`, and gzip or brotli compression with
+`Accept-Encoding`. The compressor is flushed after every event so each
+update reaches the client as soon as it is produced.
+
+With STREAM_BACKPRESSURE, events pass through a bounded per-connection
+buffer filled by a separate producer task, so a slow client doesn't hold up
+the orchestration. While the client is behind, a new status event replaces
+the unsent status event from the same agent; when the buffer is full, the
+oldest unsent status event is dropped. Other events (responses, errors,
+batch results) are never dropped: if the buffer holds nothing but those, the
+producer waits.
+
+orjson, msgpack and brotli are optional; without them the stream falls back
+to the standard json module, NDJSON and gzip respectively.
+"""
+from collections import deque
+from typing import Dict, Any, AsyncIterator, Optional
+import asyncio
+import json
+import threading
+import zlib
+
+from fastapi.responses import StreamingResponse
+
+from . import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/x-msgpack"
+
+def dumps_json(event: Dict[str, Any]) -> bytes:
+    """Serialize an event as one NDJSON line."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. non-string keys; the json module handles those
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+def dumps_msgpack(event: Dict[str, Any]) -> bytes:
+    """Serialize an event as one MessagePack map."""
+    return msgpack.packb(event, use_bin_type=True)
+
+def parse_accept_header(value: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-style header into {token: q}."""
+    tokens = {}
+    for part in (value or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        if token:
+            tokens[token.strip().lower()] = q
+    return tokens
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick MessagePack if the client prefers it and msgpack is installed, otherwise NDJSON."""
+    accepted = parse_accept_header(accept)
+    if msgpack is not None and accepted.get(MSGPACK, 0) > max(accepted.get(NDJSON, 0), 0):
+        return MSGPACK
+    return NDJSON
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick br or gzip from Accept-Encoding, or None for an uncompressed stream."""
+    if not config.STREAM_COMPRESSION:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    candidates = [encoding for encoding in ("br", "gzip") if accepted.get(encoding, accepted.get("*", 0)) > 0]
+    if brotli is None and "br" in candidates:
+        candidates.remove("br")
+    return candidates[0] if candidates else None
+
+class _GzipFlusher:
+    """Streaming gzip compressor with a sync flush after each chunk."""
+    
+    def __init__(self):
+        self._compressor = zlib.compressobj(config.STREAM_COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliFlusher:
+    """Streaming brotli compressor with a flush after each chunk."""
+    
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=min(config.STREAM_COMPRESSION_LEVEL, 11))
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+    
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class StreamStats:
+    """Process-wide counters for buffered event streams."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.active = 0
+        self.events_sent = 0
+        self.coalesced = 0
+        self.producer_waits = 0
+        self.high_water_mark = 0
+    
+    def record(self, counter: str, amount: int = 1):
+        """Add to a counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+    
+    def record_buffer_size(self, size: int):
+        """Track the largest per-connection buffer seen."""
+        with self._lock:
+            self.high_water_mark = max(self.high_water_mark, size)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current counters."""
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "active": self.active,
+                "events_sent": self.events_sent,
+                "coalesced": self.coalesced,
+                "producer_waits": self.producer_waits,
+                "buffer_high_water_mark": self.high_water_mark
+            }
+
+# Shared by all streaming endpoints
+stream_stats = StreamStats()
+
+class CoalescingBuffer:
+    """Bounded event buffer that collapses superseded status events."""
+    
+    def __init__(self, max_events: int):
+        """Initialize an empty buffer holding at most max_events events."""
+        self.max_events = max(max_events, 1)
+        self._events = deque()
+        self._changed = asyncio.Condition()
+        self.closed = False
+        self.high_water_mark = 0
+    
+    def _drop_status(self, agent=None) -> bool:
+        """Remove the oldest unsent status event (from the given agent, if any)."""
+        for index, event in enumerate(self._events):
+            if event.get("type") == "status" and (agent is None or event.get("agent") == agent):
+                del self._events[index]
+                stream_stats.record("coalesced")
+                return True
+        return False
+    
+    async def put(self, event: Dict[str, Any]):
+        """Add an event, coalescing status events; waits only if the buffer is full of other events."""
+        async with self._changed:
+            if event.get("type") == "status":
+                self._drop_status(event.get("agent"))
+            while len(self._events) >= self.max_events and not self._drop_status():
+                stream_stats.record("producer_waits")
+                await self._changed.wait()
+            self._events.append(event)
+            if len(self._events) > self.high_water_mark:
+                self.high_water_mark = len(self._events)
+                stream_stats.record_buffer_size(self.high_water_mark)
+            self._changed.notify_all()
+    
+    async def close(self):
+        """Mark the end of the stream."""
+        async with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+    
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Take the next event, or None once the stream is closed and drained."""
+        async with self._changed:
+            while not self._events and not self.closed:
+                await self._changed.wait()
+            if not self._events:
+                return None
+            event = self._events.popleft()
+            self._changed.notify_all()
+            return event
+
+async def buffered_events(events: AsyncIterator[Dict[str, Any]], max_events: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Decouple an event source from the client: a producer task fills a
+    CoalescingBuffer while this generator yields as fast as the client reads.
+    """
+    buffer = CoalescingBuffer(max_events)
+    
+    async def produce():
+        try:
+            async for event in events:
+                await buffer.put(event)
+        finally:
+            await buffer.close()
+    
+    producer = asyncio.create_task(produce())
+    stream_stats.record("streams")
+    stream_stats.record("active")
+    try:
+        while True:
+            event = await buffer.get()
+            if event is None:
+                break
+            stream_stats.record("events_sent")
+            yield event
+        await producer  # Re-raise errors from the event source
+    finally:
+        stream_stats.record("active", -1)
+        if not producer.done():
+            # The client went away; stop producing for it
+            producer.cancel()
+
+async def encode_events(events: AsyncIterator[Dict[str, Any]], media_type: str = NDJSON,
+                        encoding: Optional[str] = None) -> AsyncIterator[bytes]:
+    """Serialize and optionally compress an event stream, one flushed chunk per event."""
+    dumps = dumps_msgpack if media_type == MSGPACK else dumps_json
+    compressor = {"gzip": _GzipFlusher, "br": _BrotliFlusher}[encoding]() if encoding else None
+    
+    async for event in events:
+        chunk = dumps(event)
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.finish()
+
+def event_stream_response(events: AsyncIterator[Dict[str, Any]], accept: Optional[str] = None,
+                          accept_encoding: Optional[str] = None,
+                          headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Build a StreamingResponse for an event stream, negotiating format and compression."""
+    media_type = negotiate_media_type(accept)
+    encoding = negotiate_encoding(accept_encoding)
+    
+    response_headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    
+    if config.STREAM_BACKPRESSURE:
+        events = buffered_events(events, config.STREAM_BUFFER_EVENTS)
+    
+    return StreamingResponse(
+        encode_events(events, media_type, encoding),
+        media_type=media_type,
+        headers=response_headers
+    )
@@ -0,0 +1,167 @@
+"""
+Per-request store for large tool outputs.
+
+Tool results longer than ARTIFACT_INLINE_CHARS are kept once in the store and
+replaced in observations by a compact reference: a handle such as
+`artifact:3f9c0a1b2d4e`, the size and a bounded preview. Agents read specific
+slices through the artifact_reader tool. Artifacts larger than
+ARTIFACT_SPILL_CHARS are written to a temporary directory instead of being
+held in memory; it is removed when the store is closed or garbage collected.
+
+When steps run on execution workers, the plan's store shares its directory
+with them (shared_settings): worker-side stores attached to it write every
+artifact there, report what they stored, and the plan's store adopts those
+entries, so all steps see the same artifacts.
+"""
+from typing import Dict, Any, List, Optional
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+from .. import config
+
+HANDLE_PREFIX = "artifact:"
+_ARTIFACT_ID_RE = re.compile(r"[0-9a-f]{12}")
+
+class ArtifactStore:
+    """Large tool outputs for one request, in memory or spilled to disk."""
+    
+    def __init__(self, inline_chars: int, preview_chars: int, spill_chars: int, directory: Optional[str] = None):
+        """Initialize an empty store; the spill directory is created on first use."""
+        self.inline_chars = inline_chars
+        self.preview_chars = preview_chars
+        self.spill_chars = spill_chars
+        self.directory = directory
+        self._artifacts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._tempdir = None
+        # Directory owned by another store (attached worker-side stores)
+        self._shared_path = None
+    
+    @classmethod
+    def from_config(cls) -> "ArtifactStore":
+        """Create a store with the ARTIFACT_* settings."""
+        return cls(
+            config.ARTIFACT_INLINE_CHARS, config.ARTIFACT_PREVIEW_CHARS,
+            config.ARTIFACT_SPILL_CHARS, config.ARTIFACT_DIR or None
+        )
+    
+    @classmethod
+    def attach(cls, settings: Dict[str, Any]) -> "ArtifactStore":
+        """Create a store that writes into another store's directory (see shared_settings)."""
+        store = cls(settings["inline_chars"], settings["preview_chars"], spill_chars=0)
+        store._shared_path = settings["path"]
+        return store
+    
+    def shared_settings(self) -> Dict[str, Any]:
+        """
+        Settings for attaching stores in other processes to this one.
+        From now on every artifact is kept on disk, where those processes can read it.
+        """
+        with self._lock:
+            self.spill_chars = 0
+            return {"path": self._spill_dir(), "inline_chars": self.inline_chars, "preview_chars": self.preview_chars}
+    
+    def _spill_dir(self) -> str:
+        if self._shared_path is not None:
+            return self._shared_path
+        if self._tempdir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="artifacts-", dir=self.directory)
+        return self._tempdir.name
+    
+    def put(self, content: str, source: str = "") -> str:
+        """Store content (once per distinct content) and return its handle."""
+        artifact_id = hashlib.blake2b(content.encode("utf-8"), digest_size=6).hexdigest()
+        with self._lock:
+            if artifact_id not in self._artifacts:
+                artifact = {"source": source, "chars": len(content), "content": None, "path": None}
+                if len(content) > self.spill_chars:
+                    artifact["path"] = os.path.join(self._spill_dir(), artifact_id)
+                    with open(artifact["path"], "w", encoding="utf-8") as f:
+                        f.write(content)
+                else:
+                    artifact["content"] = content
+                self._artifacts[artifact_id] = artifact
+        return HANDLE_PREFIX + artifact_id
+    
+    def reference(self, content: str, source: str = "") -> str:
+        """Return small content as is; store large content and return its handle with a preview."""
+        if len(content) <= self.inline_chars:
+            return content
+        handle = self.put(content, source)
+        return (
+            f"[{handle} from {source or 'tool'}, {len(content)} chars; "
+            f"read more with artifact_reader]\n{content[:self.preview_chars]}..."
+        )
+    
+    def read(self, handle: str, start: int = 0, length: Optional[int] = None) -> str:
+        """Read `length` characters (at most inline_chars) of an artifact from `start`."""
+        artifact_id = handle[len(HANDLE_PREFIX):] if handle.startswith(HANDLE_PREFIX) else handle
+        artifact = self._artifacts.get(artifact_id)
+        if artifact is None and self._shared_path is not None and _ARTIFACT_ID_RE.fullmatch(artifact_id):
+            # Stored by another step of the plan, in another process
+            path = os.path.join(self._shared_path, artifact_id)
+            if os.path.exists(path):
+                artifact = {"content": None, "path": path}
+        if artifact is None:
+            raise ValueError(f"Unknown artifact '{handle}'")
+        start = max(int(start), 0)
+        length = min(int(length) if length is not None else self.inline_chars, self.inline_chars)
+        if artifact["content"] is not None:
+            return artifact["content"][start:start + length]
+        with open(artifact["path"], encoding="utf-8") as f:
+            # Text files can't seek by character, so skip ahead in bounded reads
+            while start > 0:
+                skipped = len(f.read(min(start, 1 << 16)))
+                if not skipped:
+                    break
+                start -= skipped
+            return f.read(length)
+    
+    def describe(self) -> List[str]:
+        """One line per stored artifact, for prompt context."""
+        return [
+            f"{HANDLE_PREFIX}{artifact_id} ({artifact['source'] or 'tool'}, {artifact['chars']} chars)"
+            for artifact_id, artifact in self._artifacts.items()
+        ]
+    
+    def entries(self) -> List[Dict[str, Any]]:
+        """The artifacts kept on disk, for adopt() in the store that owns the directory."""
+        with self._lock:
+            return [
+                {"id": artifact_id, "source": artifact["source"], "chars": artifact["chars"]}
+                for artifact_id, artifact in self._artifacts.items() if artifact["path"]
+            ]
+    
+    def adopt(self, entries: List[Dict[str, Any]]):
+        """Register artifacts that attached stores wrote into this store's directory."""
+        with self._lock:
+            if self._tempdir is None:
+                return
+            for entry in entries:
+                if _ARTIFACT_ID_RE.fullmatch(entry["id"]) and entry["id"] not in self._artifacts:
+                    self._artifacts[entry["id"]] = {
+                        "source": entry["source"],
+                        "chars": entry["chars"],
+                        "content": None,
+                        "path": os.path.join(self._tempdir.name, entry["id"])
+                    }
+    
+    def close(self):
+        """Drop all artifacts and delete spilled files (unless the directory belongs to another store)."""
+        with self._lock:
+            self._artifacts = {}
+            if self._tempdir is not None:
+                self._tempdir.cleanup()
+                self._tempdir = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get the number and total size of stored artifacts."""
+        with self._lock:
+            return {
+                "artifacts": len(self._artifacts),
+                "chars": sum(artifact["chars"] for artifact in self._artifacts.values()),
+                "spilled": sum(1 for artifact in self._artifacts.values() if artifact["path"])
+            }
@@ -5,6 +5,8 @@ In a production environment, this would run in a secure sandboxed environment.
 from typing import Dict, Any
 import re
 
+from .sql_datasets import get_dataset_store
+
 def code_interpreter(code: str, language: str = "python") -> str:
     """
     Simulate code interpretation and execution.
@@ -21,6 +23,9 @@ def code_interpreter(code: str, language: str = "python") -> str:
     elif language in ["bash", "shell", "sh"]:
         return _simulate_shell_execution(code)
     elif language in ["sql"]:
+        store = get_dataset_store()
+        if store is not None and store.tables():
+            return _execute_sql(store, code)
         return _simulate_sql_execution(code)
     else:
         return f"Code interpretation for {language}:\n{code}\n\nOutput: [Simulated execution - language '{language}' processed successfully]"
@@ -104,6 +109,16 @@ def _simulate_shell_execution(code: str) -> str:
     
     return output
 
+def _execute_sql(store, code: str) -> str:
+    """Run a read-only query against the loaded datasets."""
+    try:
+        return "SQL execution output:\n" + store.query(code)
+    except Exception as e:
+        tables = ", ".join(
+            f"{name}({', '.join(info['columns'])})" for name, info in store.tables().items()
+        )
+        return f"SQL execution error: {str(e)}\nAvailable tables: {tables}"
+
 def _simulate_sql_execution(code: str) -> str:
     """Simulate SQL query execution."""
     code_upper = code.upper()
@@ -2,9 +2,11 @@
 Constitution Retriever Tool - Retrieves relevant constitutional AI principles.
 In a production environment, this would use vector embeddings and semantic search.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from functools import lru_cache
 from ..constitution import CONSTITUTION
 
+@lru_cache(maxsize=512)
 def constitution_retriever(query: str) -> str:
     """
     Retrieve relevant constitutional AI principles based on the query.
@@ -41,50 +43,49 @@ def constitution_retriever(query: str) -> str:
     if not relevant_sections:
         relevant_sections = ["HUMAN DIGNITY AND RESPECT", "SAFETY AND HARM PREVENTION", "BENEFICENCE AND SOCIAL GOOD"]
     
-    # Extract relevant sections from the constitution
-    constitution_lines = CONSTITUTION.split('\n')
+    # Assemble the relevant sections, in constitution order, from the pre-parsed constitution
+    sections, guidelines = parse_constitution()
     result = "RELEVANT CONSTITUTIONAL PRINCIPLES:\n\n"
     
-    current_section = None
-    include_lines = False
-    
-    for line in constitution_lines:
-        line = line.strip()
-        
-        # Check if this line is a section header we want
-        if any(section in line for section in relevant_sections):
-            current_section = line
-            include_lines = True
-            result += f"{line}\n"
-        
-        # Check if we've hit a new section we don't want
-        elif line.isupper() and len(line) > 10 and current_section and not any(section in line for section in relevant_sections):
-            include_lines = False
-            current_section = None
-        
-        # Include lines if we're in a relevant section
-        elif include_lines and line:
-            result += f"   {line}\n"
-        
-        # Stop if we hit the guidelines section
-        elif "Ethical Guidelines for Responses:" in line:
-            break
+    for header, body in sections:
+        if any(section in header for section in relevant_sections):
+            result += f"{header}\n"
+            result += "".join(f"   {line}\n" for line in body)
     
     # Always include the ethical guidelines
     result += "\nETHICAL GUIDELINES FOR RESPONSES:\n"
+    result += "".join(f"   {line}\n" for line in guidelines)
+    
+    return result
+
+@lru_cache(maxsize=1)
+def parse_constitution() -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+    """
+    Split the constitution into (section header, body lines) pairs plus the
+    ethical guideline lines. Parsed once and reused by every retrieval.
+    """
+    sections = []
+    guidelines = []
     in_guidelines = False
     
-    for line in constitution_lines:
+    for line in CONSTITUTION.split('\n'):
+        line = line.strip()
+        
         if "Ethical Guidelines for Responses:" in line:
             in_guidelines = True
-            continue
-        elif in_guidelines and line.strip().startswith('-'):
-            result += f"   {line.strip()}\n"
-        elif in_guidelines and line.strip() and not line.strip().startswith('-'):
-            # End of guidelines section
-            break
+        elif in_guidelines:
+            if line.startswith('-'):
+                guidelines.append(line)
+            elif line:
+                # End of guidelines section
+                break
+        elif line.isupper() and len(line) > 10 and line[0].isdigit():
+            # Numbered section header, e.g. "1. HUMAN DIGNITY AND RESPECT"
+            sections.append((line, []))
+        elif line and sections:
+            sections[-1][1].append(line)
     
-    return result
+    return sections, guidelines
 
 # Alternative function names
 retrieve_constitution = constitution_retriever
@@ -0,0 +1,162 @@
+"""
+Pluggable search backends for the web_search tool.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, urlencode
+import http.client
+import json
+import queue
+import threading
+
+from .search_index import SearchIndex, snippet
+from ..cache import LRUCache
+from .. import config
+
+class SearchBackend(ABC):
+    """Interface for search providers used by the web_search tool."""
+    
+    name = "base"
+    
+    @abstractmethod
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Return up to top_k results as dicts with title, url, snippet and score."""
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get backend statistics for status reporting."""
+        return {"backend": self.name}
+
+class OfflineSearchBackend(SearchBackend):
+    """Search over a local memory-mapped BM25 index."""
+    
+    name = "offline"
+    
+    def __init__(self, index_dir: str):
+        """Open the index built by app.tools.search_index."""
+        self.index = SearchIndex(index_dir)
+    
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Search the local index."""
+        results = []
+        for doc_id, score in self.index.search(query, top_k):
+            doc = self.index.get_document(doc_id)
+            results.append({
+                "title": doc.get("title", ""),
+                "url": doc.get("url", ""),
+                "snippet": snippet(doc.get("text", ""), query),
+                "score": round(score, 4)
+            })
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return {"backend": self.name, "documents": self.index.num_docs}
+
+class HttpSearchBackend(SearchBackend):
+    """
+    Search through a JSON HTTP API over a pool of persistent connections.
+    The endpoint is called as GET <url>?q=<query>&num=<top_k> and must return
+    {"results": [{"title", "url", "snippet"}, ...]}.
+    """
+    
+    name = "http"
+    
+    def __init__(self, url: str, api_key: str = "", pool_size: int = 4, timeout: float = 10.0):
+        """Configure the endpoint and connection pool."""
+        parts = urlsplit(url)
+        self._scheme = parts.scheme or "https"
+        self._host = parts.netloc
+        self._path = parts.path or "/"
+        self._api_key = api_key
+        self._timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=max(pool_size, 1))
+    
+    def _connect(self) -> http.client.HTTPConnection:
+        """Open a new connection to the search endpoint."""
+        connection_class = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+        return connection_class(self._host, timeout=self._timeout)
+    
+    def _release(self, connection: http.client.HTTPConnection):
+        """Return a connection to the pool, closing it if the pool is full."""
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+    
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Query the HTTP search API, reusing a pooled connection."""
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        
+        headers = {"Accept": "application/json"}
+        if self._api_key:
+            headers["Authorization"] = f"Bearer {self._api_key}"
+        
+        try:
+            connection.request("GET", f"{self._path}?{urlencode({'q': query, 'num': top_k})}", headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except Exception:
+            connection.close()
+            raise
+        
+        if response.status != 200:
+            connection.close()
+            raise RuntimeError(f"Search API returned HTTP {response.status}")
+        
+        self._release(connection)
+        return json.loads(body).get("results", [])[:top_k]
+
+class CachedSearchBackend(SearchBackend):
+    """LRU query cache in front of another backend."""
+    
+    def __init__(self, backend: SearchBackend, max_size: int = 1024):
+        """Wrap a backend with an LRU cache keyed on the normalized query."""
+        self.backend = backend
+        self.name = backend.name
+        self.cache = LRUCache(max_size)
+    
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Search, serving repeated queries from the cache."""
+        key = (" ".join(query.lower().split()), top_k)
+        results = self.cache.get(key)
+        if results is None:
+            results = self.backend.search(query, top_k)
+            self.cache.put(key, results)
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get backend and cache statistics."""
+        return {**self.backend.stats(), "cache": self.cache.stats()}
+
+_backend: Optional[SearchBackend] = None
+_backend_lock = threading.Lock()
+
+def get_search_backend() -> Optional[SearchBackend]:
+    """
+    Get the configured search backend, creating it on first use.
+    Returns None when SEARCH_BACKEND is "simulated" (the default) and no
+    custom backend has been installed.
+    """
+    global _backend
+    if _backend is None and config.SEARCH_BACKEND == "simulated":
+        return None
+    
+    with _backend_lock:
+        if _backend is None:
+            if config.SEARCH_BACKEND == "offline":
+                backend = OfflineSearchBackend(config.SEARCH_INDEX_PATH)
+            elif config.SEARCH_BACKEND == "http":
+                backend = HttpSearchBackend(config.SEARCH_API_URL, config.SEARCH_API_KEY)
+            else:
+                raise ValueError(f"Unknown search backend: {config.SEARCH_BACKEND}")
+            _backend = CachedSearchBackend(backend, config.SEARCH_CACHE_SIZE)
+        return _backend
+
+def set_search_backend(backend: Optional[SearchBackend]):
+    """Install a custom search backend, e.g. another HTTP provider."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,173 @@
+"""
+Compact on-disk inverted index with BM25 scoring for the offline web_search backend.
+
+Build an index from a JSONL file (one {"title", "text", "url"} object per line)
+or a directory of text files:
+
+    python -m app.tools.search_index path/to/corpus path/to/index
+"""
+from array import array
+from typing import Dict, Any, List, Iterator, Tuple
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+TEXT_EXTENSIONS = (".txt", ".md", ".rst", ".html")
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _iter_corpus(corpus_path: str) -> Iterator[Dict[str, str]]:
+    """Yield documents from a JSONL file or a directory of text files."""
+    if os.path.isdir(corpus_path):
+        for root, _, files in os.walk(corpus_path):
+            for name in sorted(files):
+                if not name.lower().endswith(TEXT_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    yield {"title": os.path.splitext(name)[0], "url": path, "text": f.read()}
+    else:
+        with open(corpus_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                doc = json.loads(line)
+                yield {
+                    "title": str(doc.get("title", "")),
+                    "url": str(doc.get("url", "")),
+                    "text": str(doc.get("text") or doc.get("content") or "")
+                }
+
+def build_index(corpus_path: str, index_dir: str) -> Dict[str, Any]:
+    """Index a document corpus into index_dir and return the index metadata."""
+    os.makedirs(index_dir, exist_ok=True)
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doc_lengths = array("I")
+    doc_offsets = array("Q", [0])
+    
+    with open(os.path.join(index_dir, "docs.bin"), "wb") as docs_file:
+        for doc_id, doc in enumerate(_iter_corpus(corpus_path)):
+            tokens = tokenize(f"{doc['title']} {doc['text']}")
+            doc_lengths.append(len(tokens))
+            
+            term_counts: Dict[str, int] = {}
+            for token in tokens:
+                term_counts[token] = term_counts.get(token, 0) + 1
+            for term, tf in term_counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+            
+            encoded = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+            docs_file.write(encoded)
+            doc_offsets.append(doc_offsets[-1] + len(encoded))
+    
+    # Postings are stored as flat (doc_id, tf) uint32 pairs, one contiguous run per term
+    terms = {}
+    flat = array("I")
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [len(flat) // 2, len(entries)]
+        for doc_id, tf in entries:
+            flat.append(doc_id)
+            flat.append(tf)
+    
+    with open(os.path.join(index_dir, "postings.bin"), "wb") as f:
+        flat.tofile(f)
+    with open(os.path.join(index_dir, "doclens.bin"), "wb") as f:
+        doc_lengths.tofile(f)
+    with open(os.path.join(index_dir, "docs.offsets"), "wb") as f:
+        doc_offsets.tofile(f)
+    
+    num_docs = len(doc_lengths)
+    meta = {
+        "version": INDEX_VERSION,
+        "num_docs": num_docs,
+        "avg_doc_len": (sum(doc_lengths) / num_docs) if num_docs else 0.0,
+        "terms": terms
+    }
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, separators=(",", ":"))
+    
+    return meta
+
+class SearchIndex:
+    """Read-only, memory-mapped view of an index built by build_index."""
+    
+    def __init__(self, index_dir: str):
+        """Open and memory-map the index files in index_dir."""
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {meta.get('version')}")
+        
+        self.num_docs = meta["num_docs"]
+        self.avg_doc_len = meta["avg_doc_len"] or 1.0
+        self._terms = meta["terms"]
+        self._files = []
+        
+        self._postings = self._map(os.path.join(index_dir, "postings.bin"), "I")
+        self._doc_lengths = self._map(os.path.join(index_dir, "doclens.bin"), "I")
+        self._doc_offsets = self._map(os.path.join(index_dir, "docs.offsets"), "Q")
+        self._docs = self._map(os.path.join(index_dir, "docs.bin"), None)
+    
+    def _map(self, path: str, typecode: str):
+        """Memory-map a file, optionally as a typed view."""
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"").cast(typecode) if typecode else b""
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode) if typecode else mapped
+    
+    def get_document(self, doc_id: int) -> Dict[str, str]:
+        """Load a stored document by id."""
+        start, end = self._doc_offsets[doc_id], self._doc_offsets[doc_id + 1]
+        return json.loads(bytes(self._docs[start:end]).decode("utf-8"))
+    
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Score documents for the query with BM25 and return the top (doc_id, score) pairs."""
+        scores: Dict[int, float] = {}
+        
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if not entry:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            run = self._postings[offset * 2:(offset + df) * 2]
+            
+            for i in range(0, len(run), 2):
+                doc_id, tf = run[i], run[i + 1]
+                norm = K1 * (1 - B + B * self._doc_lengths[doc_id] / self.avg_doc_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+def snippet(text: str, query: str, width: int = 240) -> str:
+    """Extract a short snippet of text around the first query term."""
+    text = " ".join(text.split())
+    text_lower = text.lower()
+    positions = [text_lower.find(term) for term in tokenize(query)]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    excerpt = text[start:start + width]
+    return ("..." if start else "") + excerpt + ("..." if start + width < len(text) else "")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.tools.search_index <corpus.jsonl|corpus_dir> <index_dir>")
+        sys.exit(1)
+    built = build_index(sys.argv[1], sys.argv[2])
+    print(f"Indexed {built['num_docs']} documents, {len(built['terms'])} terms into {sys.argv[2]}")
@@ -0,0 +1,274 @@
+"""
+Read-only SQL over datasets loaded into an in-memory SQLite database.
+
+Datasets (CSV, JSONL or Parquet files) are bulk-loaded once into a shared
+in-memory database and queried through a pool of read-only connections, so
+repeated queries run on warm connections. Results are cached per query until
+the datasets change. Queries are limited to SQL_MAX_ROWS rows and
+SQL_TIMEOUT_SECONDS, and the formatted result to SQL_MAX_RESULT_CHARS.
+
+SQL_DATASETS points to either a directory (every supported file becomes a
+table named after the file) or a JSON manifest:
+
+    {"sales": {"path": "data/sales.csv", "indexes": ["region", ["region", "month"]]}}
+
+Admins can add datasets at runtime through POST /admin/datasets.
+Parquet files need pyarrow.
+"""
+from typing import Dict, Any, List, Iterator, Optional, Tuple, Union
+import csv
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from ..cache import LRUCache
+from .. import config
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DATASET_EXTENSIONS = (".csv", ".jsonl", ".parquet")
+# Rows per executemany batch when loading
+LOAD_BATCH_ROWS = 5000
+# Rows sampled to infer column names and types
+SAMPLE_ROWS = 1000
+MAX_CELL_CHARS = 200
+# Authorizer actions allowed on query connections: reading tables and calling functions
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+_IDENTIFIER_RE = re.compile(r"[^A-Za-z0-9_]")
+
+def _clean_name(name: str) -> str:
+    """Replace characters that are not letters, digits or underscores."""
+    return _IDENTIFIER_RE.sub("_", str(name).strip()) or "column"
+
+def _identifier(name: str) -> str:
+    """Make a safe, quoted SQL identifier."""
+    return f'"{_clean_name(name)}"'
+
+def _iter_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield rows of a CSV, JSONL or Parquet file as dicts."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif extension == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == ".parquet":
+        if pq is None:
+            raise ValueError("Loading Parquet datasets requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=LOAD_BATCH_ROWS):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported dataset format '{extension}'; use one of {', '.join(DATASET_EXTENSIONS)}")
+
+def _convert(value: Any) -> Any:
+    """Turn CSV strings into numbers where possible; nested values become JSON."""
+    if isinstance(value, str):
+        text = value.strip()
+        if text == "":
+            return None
+        for cast in (int, float):
+            try:
+                return cast(text)
+            except ValueError:
+                pass
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _column_type(values: List[Any]) -> str:
+    """SQLite column type for sampled values."""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return "INTEGER"
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "REAL"
+    return "TEXT"
+
+def format_table(columns: List[str], rows: List[Tuple], max_chars: int) -> Tuple[str, bool]:
+    """Format rows as a pipe-separated table; returns (text, truncated)."""
+    def cell(value):
+        text = "NULL" if value is None else str(value)
+        return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS] + "..."
+    
+    lines = [" | ".join(columns)]
+    size = len(lines[0])
+    for row in rows:
+        line = " | ".join(cell(value) for value in row)
+        if size + len(line) + 1 > max_chars:
+            return "\n".join(lines), True
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines), False
+
+class DatasetStore:
+    """Datasets in a shared in-memory SQLite database, queried through a pool of read-only connections."""
+    
+    def __init__(self, pool_size: int, max_rows: int, timeout: float, max_result_chars: int, cache_size: int):
+        """Create the empty database; its lifetime is tied to the loader connection."""
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.max_result_chars = max_result_chars
+        self._uri = f"file:datasets-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self._loader = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        self._load_lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._version = 0
+        self._results = LRUCache(cache_size)
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only = ON")
+            connection.execute("PRAGMA read_uncommitted = ON")
+            # No writes, ATTACH or PRAGMAs from queries
+            connection.set_authorizer(
+                lambda action, *args: sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+            )
+            self._pool.put(connection)
+    
+    def load(self, name: str, path: str, indexes: List[Union[str, List[str]]] = None) -> Dict[str, Any]:
+        """Bulk-load a dataset file into a table (replacing one of the same name) and index declared columns."""
+        name = _clean_name(name)
+        table = _identifier(name)
+        rows = (dict((key, _convert(value)) for key, value in row.items()) for row in _iter_rows(path))
+        sample = list(itertools.islice(rows, SAMPLE_ROWS))
+        if not sample:
+            raise ValueError(f"Dataset '{path}' has no rows")
+        columns = list(dict.fromkeys(key for row in sample for key in row))
+        types = {column: _column_type([row.get(column) for row in sample]) for column in columns}
+        
+        started = time.perf_counter()
+        count = 0
+        with self._load_lock:
+            connection = self._loader
+            with connection:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+                connection.execute(
+                    f"CREATE TABLE {table} ({', '.join(f'{_identifier(c)} {types[c]}' for c in columns)})"
+                )
+                insert = f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns)})"
+                all_rows = itertools.chain(sample, rows)
+                while True:
+                    batch = [tuple(row.get(column) for column in columns) for row in itertools.islice(all_rows, LOAD_BATCH_ROWS)]
+                    if not batch:
+                        break
+                    connection.executemany(insert, batch)
+                    count += len(batch)
+                for index in indexes or []:
+                    index_columns = [index] if isinstance(index, str) else list(index)
+                    index_name = _identifier(f"idx_{name}_{'_'.join(index_columns)}")
+                    connection.execute(
+                        f"CREATE INDEX {index_name} ON {table} ({', '.join(_identifier(c) for c in index_columns)})"
+                    )
+                connection.execute(f"ANALYZE {table}")
+            self._tables[name] = {
+                "name": name,
+                "path": path,
+                "rows": count,
+                "columns": {_clean_name(column): types[column] for column in columns},
+                "indexes": indexes or [],
+                "load_seconds": round(time.perf_counter() - started, 3)
+            }
+            # Cached results may refer to the old data
+            self._version += 1
+            self._results.clear()
+        return self._tables[name]
+    
+    def load_config(self, source: str):
+        """Load every dataset in a directory, or the datasets listed in a JSON manifest."""
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                stem, extension = os.path.splitext(name)
+                if extension.lower() in DATASET_EXTENSIONS:
+                    self.load(stem, os.path.join(source, name))
+            return
+        with open(source, encoding="utf-8") as f:
+            manifest = json.load(f)
+        base = os.path.dirname(os.path.abspath(source))
+        for name, spec in manifest.items():
+            self.load(name, os.path.join(base, spec["path"]), spec.get("indexes"))
+    
+    def tables(self) -> Dict[str, Dict[str, Any]]:
+        """Loaded tables with their row counts, columns and indexes."""
+        return dict(self._tables)
+    
+    def query(self, sql: str) -> str:
+        """Run one read-only statement and format the result, from the result cache when possible."""
+        key = (self._version, " ".join(sql.split()).rstrip(";"))
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        
+        connection = self._pool.get()
+        deadline = time.monotonic() + self.timeout
+        connection.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 10000)
+        try:
+            cursor = connection.execute(sql)
+            if cursor.description is None:
+                raise ValueError("Only queries that return rows are allowed")
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchmany(self.max_rows + 1)
+        except sqlite3.DatabaseError as e:
+            if "interrupted" in str(e):
+                raise TimeoutError(f"Query exceeded the {self.timeout:g}s time limit") from e
+            if "not authorized" in str(e):
+                raise ValueError("Only read-only SELECT queries on the loaded tables are allowed") from e
+            raise
+        finally:
+            connection.set_progress_handler(None, 0)
+            self._pool.put(connection)
+        
+        row_limited = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+        table, char_limited = format_table(columns, rows, self.max_result_chars)
+        shown = table.count("\n")
+        summary = f"{shown} row{'s' if shown != 1 else ''} returned"
+        if row_limited or char_limited:
+            summary += f" (truncated; limit {self.max_rows} rows / {self.max_result_chars} characters)"
+        result = f"{table}\n{summary}."
+        self._results.put(key, result)
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get loaded tables and result cache statistics."""
+        return {
+            "tables": {name: {"rows": info["rows"], "indexes": info["indexes"]} for name, info in self._tables.items()},
+            "idle_connections": self._pool.qsize(),
+            "result_cache": self._results.stats()
+        }
+
+_store: Optional[DatasetStore] = None
+_store_lock = threading.Lock()
+
+def get_dataset_store(create: bool = False) -> Optional[DatasetStore]:
+    """
+    Get the process-wide dataset store, loading SQL_DATASETS on first use.
+    Returns None when no datasets are configured, unless create is set.
+    """
+    global _store
+    if _store is None and not config.SQL_DATASETS and not create:
+        return None
+    
+    with _store_lock:
+        if _store is None:
+            store = DatasetStore(
+                config.SQL_POOL_SIZE, config.SQL_MAX_ROWS, config.SQL_TIMEOUT_SECONDS,
+                config.SQL_MAX_RESULT_CHARS, config.SQL_RESULT_CACHE_SIZE
+            )
+            if config.SQL_DATASETS:
+                store.load_config(config.SQL_DATASETS)
+            _store = store
+        return _store
@@ -0,0 +1,79 @@
+"""
+Shared result cache for tools registered as pure in the ToolRegistry.
+"""
+from typing import Dict, Any, Hashable, Optional
+import threading
+import time
+
+from ..cache import LRUCache
+from .. import config
+
+def default_key(parameters: Dict[str, Any]) -> Hashable:
+    """Cache key for tool parameters: the sorted (name, value) pairs."""
+    return tuple(sorted((name, repr(value)) for name, value in parameters.items()))
+
+def normalize_query(parameters: Dict[str, Any]) -> Hashable:
+    """Cache key for query tools: case and whitespace in the query don't matter."""
+    normalized = dict(parameters)
+    normalized["query"] = " ".join(str(parameters.get("query", "")).lower().split())
+    return default_key(normalized)
+
+class ToolResultCache:
+    """Bounded LRU of tool results with per-entry TTLs and per-tool counters."""
+    
+    def __init__(self, max_size: int):
+        """Initialize an empty cache holding at most max_size results across all tools."""
+        self._entries = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self._tool_stats: Dict[str, Dict[str, int]] = {}
+    
+    def _count(self, tool_name: str, counter: str):
+        with self._lock:
+            stats = self._tool_stats.setdefault(
+                tool_name, {"hits": 0, "misses": 0, "expired": 0, "too_large": 0, "plan_dedups": 0}
+            )
+            stats[counter] += 1
+    
+    def get(self, tool_name: str, key: Hashable) -> Optional[Any]:
+        """Get a cached result, or None if missing or expired."""
+        entry = self._entries.get((tool_name, key))
+        if entry is not None:
+            result, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._count(tool_name, "hits")
+                return result
+            self._entries.pop((tool_name, key))
+            self._count(tool_name, "expired")
+        self._count(tool_name, "misses")
+        return None
+    
+    def put(self, tool_name: str, key: Hashable, result: Any, ttl: Optional[float] = None,
+            max_entry_chars: Optional[int] = None):
+        """Store a result unless it is larger than max_entry_chars."""
+        if max_entry_chars is not None and len(str(result)) > max_entry_chars:
+            self._count(tool_name, "too_large")
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries.put((tool_name, key), (result, expires_at))
+    
+    def record_plan_dedup(self, tool_name: str):
+        """Count a call answered from the current plan's results."""
+        self._count(tool_name, "plan_dedups")
+    
+    def clear(self):
+        """Remove all cached results."""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get overall size and per-tool counters."""
+        entries = self._entries.stats()
+        with self._lock:
+            return {
+                "size": entries["size"],
+                "max_size": entries["max_size"],
+                "evictions": entries["evictions"],
+                "tools": {name: dict(stats) for name, stats in self._tool_stats.items()}
+            }
+
+# Shared by every ToolRegistry in the process
+tool_result_cache = ToolResultCache(config.TOOL_CACHE_SIZE)
@@ -1,33 +1,43 @@
 """
 Tool Registry for managing and executing available tools.
 """
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Hashable, Optional
+import uuid
 from .web_search import web_search
 from .code_interpreter import code_interpreter
 from .constitution_retriever import constitution_retriever
+from .tool_cache import tool_result_cache, default_key, normalize_query
+from .artifact_store import ArtifactStore
+from ..tracing import span
+from .. import config
 
 class ToolRegistry:
     """Registry for managing available tools and their execution."""
     
     def __init__(self):
         """Initialize the tool registry with available tools."""
-        self._tools = {
-            "web_search": {
-                "function": web_search,
-                "description": "Search the web for information on a given topic",
-                "parameters": ["query"]
-            },
-            "code_interpreter": {
-                "function": code_interpreter,
-                "description": "Execute and interpret code snippets",
-                "parameters": ["code", "language"]
-            },
-            "constitution_retriever": {
-                "function": constitution_retriever,
-                "description": "Retrieve relevant constitutional AI principles",
-                "parameters": ["query"]
-            }
-        }
+        self._tools = {}
+        # Results of pure tool calls made since start_plan(), keyed like the shared cache
+        self._plan_results = {}
+        # Identifies the current plan to execution workers
+        self.plan_id = uuid.uuid4().hex
+        # Large outputs of the current plan's tool calls (ARTIFACT_STORE_ENABLED)
+        self.artifacts: Optional[ArtifactStore] = None
+        
+        self.register_tool(
+            "web_search", web_search,
+            "Search the web for information on a given topic", ["query"],
+            pure=True, ttl=config.WEB_SEARCH_CACHE_TTL, key_normalizer=normalize_query, max_entry_chars=20000
+        )
+        self.register_tool(
+            "code_interpreter", code_interpreter,
+            "Execute and interpret code snippets", ["code", "language"]
+        )
+        self.register_tool(
+            "constitution_retriever", constitution_retriever,
+            "Retrieve relevant constitutional AI principles", ["query"],
+            pure=True
+        )
     
     def get_available_tools(self) -> Dict[str, Dict[str, Any]]:
         """Get a dictionary of all available tools and their metadata."""
@@ -37,24 +47,87 @@ class ToolRegistry:
         } for name, tool_info in self._tools.items()}
     
     def execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
-        """Execute a tool with the given parameters."""
+        """
+        Execute a tool with the given parameters.
+        With TOOL_CACHE_ENABLED, pure tools are answered from the current plan's
+        earlier identical calls or the shared result cache when possible.
+        """
         if tool_name not in self._tools:
             return f"Error: Tool '{tool_name}' not found. Available tools: {list(self._tools.keys())}"
         
-        try:
-            tool_function = self._tools[tool_name]["function"]
-            return tool_function(**parameters)
-        except Exception as e:
-            return f"Error executing tool '{tool_name}': {str(e)}"
+        tool = self._tools[tool_name]
+        with span(f"tool:{tool_name}", "tool", tool=tool_name) as tool_span:
+            key = None
+            if config.TOOL_CACHE_ENABLED and tool["pure"]:
+                try:
+                    key = tool["key_normalizer"](parameters)
+                except Exception:
+                    key = None  # unhashable or unexpected parameters; run uncached
+            
+            if key is not None:
+                if (tool_name, key) in self._plan_results:
+                    tool_result_cache.record_plan_dedup(tool_name)
+                    tool_span.set(cache="plan")
+                    return self._plan_results[(tool_name, key)]
+                cached = tool_result_cache.get(tool_name, key)
+                if cached is not None:
+                    self._plan_results[(tool_name, key)] = cached
+                    tool_span.set(cache="hit")
+                    return cached
+            
+            try:
+                result = tool["function"](**parameters)
+            except Exception as e:
+                tool_span.set(error=str(e))
+                return f"Error executing tool '{tool_name}': {str(e)}"
+            tool_span.set(result_chars=len(str(result)))
+            
+            if key is not None and not str(result).startswith("Error"):
+                self._plan_results[(tool_name, key)] = result
+                tool_result_cache.put(
+                    tool_name, key, result, ttl=tool["ttl"], max_entry_chars=tool["max_entry_chars"]
+                )
+            return result
     
-    def register_tool(self, name: str, function: Callable, description: str, parameters: list):
-        """Register a new tool with the registry."""
+    def register_tool(self, name: str, function: Callable, description: str, parameters: list,
+                      pure: bool = False, ttl: Optional[float] = None,
+                      key_normalizer: Callable[[Dict[str, Any]], Hashable] = default_key,
+                      max_entry_chars: Optional[int] = None):
+        """
+        Register a new tool with the registry.
+        Pure tools (same parameters, same result, no side effects) are cached for
+        `ttl` seconds (None: until evicted) under `key_normalizer(parameters)`;
+        results longer than `max_entry_chars` are not cached across requests.
+        """
         self._tools[name] = {
             "function": function,
             "description": description,
-            "parameters": parameters
+            "parameters": parameters,
+            "pure": pure,
+            "ttl": ttl,
+            "key_normalizer": key_normalizer,
+            "max_entry_chars": max_entry_chars
         }
     
+    def start_plan(self, artifacts: Optional[ArtifactStore] = None):
+        """
+        Forget the per-plan results, so identical calls are only shared within one plan.
+        With an artifact store, large tool outputs of the plan are kept there and the
+        artifact_reader tool is available to read them back.
+        """
+        self._plan_results = {}
+        self.plan_id = uuid.uuid4().hex
+        if self.artifacts is not None:
+            self.artifacts.close()
+        self.artifacts = artifacts
+        if artifacts is not None:
+            self.register_tool(
+                "artifact_reader", artifacts.read,
+                "Read part of a stored tool output by its artifact handle", ["handle", "start", "length"]
+            )
+        else:
+            self._tools.pop("artifact_reader", None)
+    
     def list_tools(self) -> str:
         """Get a formatted string listing all available tools."""
         output = "Available Tools:\n"
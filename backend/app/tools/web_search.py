@@ -1,15 +1,33 @@
 """
-Web Search Tool - Simulated web search functionality.
-In a production environment, this would integrate with a real search API.
+Web Search Tool - Searches through the configured backend (see search_backends.py),
+falling back to simulated results when no backend is configured.
 """
 from typing import Dict, Any
 import random
 
-def web_search(query: str) -> str:
+from .search_backends import get_search_backend
+
+def web_search(query: str, top_k: int = 5) -> str:
     """
-    Simulate a web search for the given query.
-    In production, this would integrate with Google Search API, SerpAPI, or similar.
+    Search for the given query using the configured search backend.
+    Falls back to simulated results when SEARCH_BACKEND is "simulated".
     """
+    backend = get_search_backend()
+    if backend is not None:
+        results = backend.search(query, top_k=int(top_k))
+        if not results:
+            return f"Web search results for '{query}': No matching documents found."
+        
+        output = f"Web search results for '{query}':\n"
+        for i, item in enumerate(results, 1):
+            source = f" ({item['url']})" if item.get("url") else ""
+            output += f"{i}. {item.get('title', 'Untitled')}{source}: {item.get('snippet', '')}\n"
+        return output
+    
+    return _simulate_web_search(query)
+
+def _simulate_web_search(query: str) -> str:
+    """Simulate a web search with canned results picked by keyword."""
     # Simulate different types of search results based on query content
     query_lower = query.lower()
     
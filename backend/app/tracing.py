@@ -0,0 +1,201 @@
+"""
+Lightweight request tracing.
+
+Each orchestrated request gets a tree of spans (orchestrator phases, LLM
+calls, tool executions) with timings and attributes such as prompt and
+response sizes and cache outcome. Finished traces are kept in a fixed-size
+in-memory ring buffer served from /debug/requests, and can optionally be
+exported to an OTLP/HTTP collector.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+import functools
+import json
+import os
+import threading
+import time
+import urllib.request
+
+from . import config
+
+class Span:
+    """A timed operation within a trace."""
+    
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str] = None, **attributes):
+        """Start the span."""
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.children: List["Span"] = []
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+    
+    def set(self, **attributes):
+        """Add or update span attributes."""
+        self.attributes.update(attributes)
+    
+    def finish(self):
+        """Record the span's duration."""
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the span and its children."""
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "children": [child.to_dict() for child in self.children]
+        }
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is off or there is no active trace."""
+    
+    trace_id = None
+    
+    def set(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class TraceBuffer:
+    """Fixed-size ring buffer of the most recent finished traces."""
+    
+    def __init__(self, max_size: int):
+        """Initialize an empty buffer."""
+        self._traces = deque(maxlen=max(max_size, 1))
+        self._lock = threading.Lock()
+    
+    def add(self, root: Span):
+        """Store a finished trace, dropping the oldest when full."""
+        with self._lock:
+            self._traces.append(root)
+    
+    def list(self, limit: int = None) -> List[Span]:
+        """Get the stored traces, most recent first."""
+        with self._lock:
+            traces = list(reversed(self._traces))
+        return traces[:limit] if limit else traces
+    
+    def get(self, trace_id: str) -> Optional[Span]:
+        """Find a stored trace by id."""
+        with self._lock:
+            for root in self._traces:
+                if root.trace_id == trace_id:
+                    return root
+        return None
+
+trace_buffer = TraceBuffer(config.TRACE_BUFFER_SIZE)
+
+def current_span():
+    """Get the active span, or a no-op span outside a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+@contextmanager
+def trace(name: str, **attributes):
+    """Start a new trace for one request; it is stored in the ring buffer when finished."""
+    if not config.TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+    
+    root = Span(name, "request", trace_id=os.urandom(16).hex(), **attributes)
+    parent = _current_span.get()
+    _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        root.finish()
+        _current_span.set(parent)
+        trace_buffer.add(root)
+        if config.TRACE_OTLP_ENDPOINT:
+            threading.Thread(target=_export_otlp, args=(root,), daemon=True).start()
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Record a child span of the active span; a no-op outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    
+    child = Span(name, kind, trace_id=parent.trace_id, parent_id=parent.span_id, **attributes)
+    parent.children.append(child)
+    _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        child.finish()
+        _current_span.set(parent)
+
+def traced(name: str, kind: str = "phase"):
+    """Decorator that records an async function call as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def to_otlp(root: Span) -> Dict[str, Any]:
+    """Convert a trace to the OTLP/JSON ExportTraceServiceRequest format."""
+    spans = []
+    
+    def visit(item: Span):
+        start_ns = int(item.start_time * 1e9)
+        end_ns = start_ns + int((item.duration_ms or 0) * 1e6)
+        otlp_span = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 3 if item.kind in ("llm", "tool") else 1,  # CLIENT / INTERNAL
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in {"span.kind": item.kind, **item.attributes}.items()
+            ]
+        }
+        if item.parent_id:
+            otlp_span["parentSpanId"] = item.parent_id
+        spans.append(otlp_span)
+        for child in item.children:
+            visit(child)
+    
+    visit(root)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "master-agentic-ai"}}]},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}]
+        }]
+    }
+
+def _export_otlp(root: Span):
+    """Send a finished trace to the configured OTLP/HTTP collector; failures are ignored."""
+    try:
+        request = urllib.request.Request(
+            config.TRACE_OTLP_ENDPOINT.rstrip("/") + "/v1/traces",
+            data=json.dumps(to_otlp(root)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception:
+        pass
@@ -0,0 +1,7 @@
+"""
+Shared test setup: run the tests from the backend directory with `python -m pytest`.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+"""
+Tests for resumable batches: progress is kept per API key and only replayed
+for unchanged items.
+"""
+import asyncio
+
+import pytest
+
+from app.agents import batch_runner
+from app.agents.batch_runner import BatchRunner
+
+class FakeOrchestrator:
+    def __init__(self, api_key, response_cache=None, review_cache=None):
+        self.api_key = api_key
+    
+    async def handle_message(self, message, history=None):
+        yield {"type": "response", "agent": "Master Orchestrator", "message": f"{self.api_key}: {message}", "is_final": True}
+
+@pytest.fixture(autouse=True)
+def fake_orchestrator(monkeypatch):
+    monkeypatch.setattr(batch_runner, "MasterAgentOrchestrator", FakeOrchestrator)
+
+def _run(tmp_path, api_key, messages, batch_id="nightly"):
+    async def collect():
+        runner = BatchRunner(api_key, concurrency=2, progress_dir=str(tmp_path))
+        return [event async for event in runner.run(messages, batch_id=batch_id)]
+    
+    return [event for event in asyncio.run(collect()) if event["type"] == "batch_result"]
+
+def test_resumes_unchanged_items(tmp_path):
+    _run(tmp_path, "key-a", ["first", "second"])
+    results = _run(tmp_path, "key-a", ["first", "second"])
+    assert all(result.get("resumed") for result in results)
+
+def test_batch_ids_are_scoped_per_key(tmp_path):
+    _run(tmp_path, "key-a", ["secret question"])
+    results = _run(tmp_path, "key-b", ["secret question"])
+    assert not results[0].get("resumed")
+    assert results[0]["response"] == "key-b: secret question"
+
+def test_changed_items_are_recomputed(tmp_path):
+    _run(tmp_path, "key-a", ["first", "second"])
+    results = {result["id"]: result for result in _run(tmp_path, "key-a", ["first", "changed"])}
+    assert results["0"].get("resumed")
+    assert not results["1"].get("resumed")
+    assert results["1"]["response"] == "key-a: changed"
+    # The recomputed answer replaces the stale one on the next resume
+    again = {result["id"]: result for result in _run(tmp_path, "key-a", ["first", "changed"])}
+    assert again["1"].get("resumed") and again["1"]["response"] == "key-a: changed"
@@ -0,0 +1,47 @@
+"""
+Tests for cassette recording: one gzip stream per session, written off the
+calling thread and readable before it is closed.
+"""
+import asyncio
+import time
+import zlib
+
+from app.agents.cassette import Cassette, load_cassette
+
+def _wait_for(cassette, recorded):
+    deadline = time.time() + 5
+    while cassette.stats()["recorded"] < recorded and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_records_are_written_as_one_gzip_member(tmp_path):
+    path = str(tmp_path / "calls.jsonl.gz")
+    cassette = Cassette("record", path)
+    for index in range(50):
+        cassette.record("gemini-pro", f"prompt {index}", f"response {index}", 0.1)
+    cassette.close()
+    
+    with open(path, "rb") as f:
+        decompressor = zlib.decompressobj(wbits=31)
+        text = decompressor.decompress(f.read()).decode("utf-8")
+    assert decompressor.eof and decompressor.unused_data == b""
+    assert len(text.splitlines()) == 50
+    assert cassette.stats()["recorded"] == 50
+
+def test_entries_are_readable_before_close(tmp_path):
+    path = str(tmp_path / "calls.jsonl.gz")
+    cassette = Cassette("record", path)
+    cassette.record("gemini-pro", "hello", "world", 0.1)
+    _wait_for(cassette, 1)
+    
+    entries = load_cassette(path)
+    assert [entry["response"] for recordings in entries.values() for entry in recordings] == ["world"]
+    cassette.close()
+
+def test_replay_reads_a_recording(tmp_path):
+    path = str(tmp_path / "calls.jsonl.gz")
+    recorder = Cassette("record", path)
+    recorder.record("gemini-pro", "hello", "world", 0.5)
+    recorder.close()
+    
+    player = Cassette("replay", path, speed=0)
+    assert asyncio.run(player.replay("gemini-pro", "hello")) == "world"
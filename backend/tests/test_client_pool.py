@@ -0,0 +1,32 @@
+"""
+Tests for the per-key client pool's use of Gemini SDK internals.
+"""
+import asyncio
+
+import pytest
+
+from app.agents import client_pool
+from app.agents.client_pool import GeminiClient, UnsupportedSDKError
+
+def _client():
+    return GeminiClient("test-key", max_concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+
+def test_models_are_bound_to_the_key_clients():
+    async def run():
+        # The async SDK client binds to the running event loop
+        gemini_client = _client()
+        model = gemini_client.model("gemini-pro")
+        assert model._async_client is gemini_client._async_client
+        assert gemini_client.model("gemini-pro") is model
+    
+    asyncio.run(run())
+
+def test_missing_sdk_internals_raise_a_clear_error(monkeypatch):
+    genai, genai_client = client_pool.load_sdk()
+    monkeypatch.delattr(genai_client, "_ClientManager")
+    with pytest.raises(UnsupportedSDKError, match=f"google-generativeai=={client_pool.SUPPORTED_SDK_VERSION}"):
+        _client().model("gemini-pro")
+
+def test_supported_version_matches_requirements():
+    with open("requirements.txt", encoding="utf-8") as f:
+        assert f"google-generativeai=={client_pool.SUPPORTED_SDK_VERSION}\n" in f.read()
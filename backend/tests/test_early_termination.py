@@ -0,0 +1,89 @@
+"""
+Tests for early termination: coverage ignores words restated from the plan,
+and only the LLM check can end a plan early.
+"""
+import asyncio
+
+from app import config
+from app.agents.early_termination import goal_coverage, is_skippable
+from app.agents.master_orchestrator import MasterAgentOrchestrator
+from app.agents.planning_agent import OPTIONAL_TAG, PLAN_PROMPT, plan_tag_instructions
+
+def _result(text, success=True):
+    return {"step": "", "success": success, "result": text, "observation": ""}
+
+def test_coverage_ignores_words_restated_from_the_plan():
+    goal = "Compare Rust and Go for web backends"
+    plan = ["Research Rust web backends", "Research Go web backends"]
+    # The result only echoes the plan, which already names every goal word but "compare"
+    assert goal_coverage(goal, [_result("Researched Rust web backends")], plan) == 0.0
+    assert goal_coverage(goal, [_result("In a compare of both, Go compiles faster")], plan) == 1.0
+
+def test_coverage_skips_failed_results():
+    plan = ["Look things up"]
+    assert goal_coverage("Explain quantum tunnelling", [_result("quantum tunnelling", success=False)], plan) == 0.0
+
+def test_optional_steps_are_skippable_in_every_mode():
+    assert is_skippable(f"Double-check the numbers {OPTIONAL_TAG}", [], "conservative")
+    assert not is_skippable("Summarize the findings", [], "conservative")
+    assert is_skippable("Summarize the findings", [], "adaptive")
+
+def test_optional_instruction_follows_early_termination(monkeypatch):
+    def prompt():
+        return PLAN_PROMPT.render(goal="g", context="c", history_context="", tag_instructions=plan_tag_instructions(6))
+    
+    monkeypatch.setattr(config, "EARLY_TERMINATION", "off")
+    assert OPTIONAL_TAG not in prompt()
+    monkeypatch.setattr(config, "EARLY_TERMINATION", "adaptive")
+    assert OPTIONAL_TAG in prompt()
+
+def _skip(monkeypatch, answer, coverage_threshold=0.6):
+    monkeypatch.setattr(config, "EARLY_TERMINATION", "adaptive")
+    monkeypatch.setattr(config, "EARLY_TERMINATION_COVERAGE", coverage_threshold)
+    prompts = []
+    
+    async def generate(self, prompt, model_name="gemini-pro"):
+        prompts.append(prompt)
+        return answer
+    
+    monkeypatch.setattr(MasterAgentOrchestrator, "_generate_content", generate)
+    plan = ["Research Rust web backends", "Summarize the findings"]
+    early_stop = {"skipped": 0, "llm_checks": 0}
+    
+    async def run():
+        orchestrator = MasterAgentOrchestrator("test-key")
+        return await orchestrator._skip_satisfied_steps(
+            "Rust web backends", plan, 1, [_result("Rust web backends researched")], early_stop
+        )
+    
+    return asyncio.run(run()), early_stop, prompts
+
+def test_full_coverage_alone_does_not_terminate(monkeypatch):
+    skipped, early_stop, prompts = _skip(monkeypatch, "NO")
+    assert skipped == []
+    assert early_stop["llm_checks"] == 1 and len(prompts) == 1
+
+def test_llm_check_confirms_termination(monkeypatch):
+    skipped, early_stop, _ = _skip(monkeypatch, "YES")
+    assert skipped == [1]
+    assert early_stop == {"skipped": 1, "llm_checks": 1}
+
+def test_low_coverage_skips_the_llm_check(monkeypatch):
+    monkeypatch.setattr(config, "EARLY_TERMINATION", "adaptive")
+    monkeypatch.setattr(config, "EARLY_TERMINATION_COVERAGE", 0.6)
+    
+    async def generate(self, prompt, model_name="gemini-pro"):
+        raise AssertionError("the LLM check should not be asked")
+    
+    monkeypatch.setattr(MasterAgentOrchestrator, "_generate_content", generate)
+    early_stop = {"skipped": 0, "llm_checks": 0}
+    
+    async def run():
+        orchestrator = MasterAgentOrchestrator("test-key")
+        return await orchestrator._skip_satisfied_steps(
+            "Compare Rust and Go performance", ["Research Rust", "Summarize the findings"], 1,
+            [_result("Rust is a systems language")], early_stop
+        )
+    
+    assert asyncio.run(run()) == []
+    assert early_stop["llm_checks"] == 0
@@ -0,0 +1,106 @@
+"""
+Tests for tool calls in ReAct responses: scanning streamed chunks, running
+every call off the event loop and cleaning up after a failed stream.
+"""
+import asyncio
+import threading
+
+from app import config
+from app.agents.execution_agent import ExecutionAgent, ToolCallScanner
+
+TWO_CALLS = """Thought: I need two lookups.
+Action: use_tool
+Tool: web_search
+Parameters: {"query": "first"}
+Tool: web_search
+Parameters: {"query": "second"}
+Observation: Found both.
+Result: Done."""
+
+def _scan_in_chunks(text, size):
+    scanner = ToolCallScanner()
+    calls = []
+    for start in range(0, len(text), size):
+        calls += scanner.feed(text[start:start + size])
+    return calls + scanner.close()
+
+def test_scanner_finds_calls_split_across_chunks():
+    expected = [("web_search", '{"query": "first"}'), ("web_search", '{"query": "second"}')]
+    for size in (1, 3, 7, 50, len(TWO_CALLS)):
+        assert _scan_in_chunks(TWO_CALLS, size) == expected
+
+def test_scanner_reports_a_call_once_its_line_is_complete():
+    scanner = ToolCallScanner()
+    assert scanner.feed("Tool: web_search\nParameters: {\"query\": ") == []
+    assert scanner.feed("\"rust\"}") == []
+    assert scanner.close() == [("web_search", '{"query": "rust"}')]
+
+def test_scanner_ignores_reasoning_only_steps():
+    assert _scan_in_chunks("Tool: none\nParameters: none\nResult: ok", 4) == []
+
+def _agent(monkeypatch, threads):
+    agent = ExecutionAgent("test-key")
+    
+    def run_tool(tool_name, params_text):
+        threads.append(threading.current_thread())
+        return f"Tool {tool_name} executed: {params_text}\n"
+    
+    monkeypatch.setattr(agent, "_run_tool", run_tool)
+    return agent
+
+def test_every_call_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(config, "STREAM_EXECUTION", False)
+    threads = []
+    agent = _agent(monkeypatch, threads)
+    
+    async def generate(prompt, model_name="gemini-pro"):
+        return TWO_CALLS
+    
+    monkeypatch.setattr(agent, "_generate_content", generate)
+    result = asyncio.run(agent.execute_step("Look up two things"))
+    assert len(threads) == 2
+    assert all(thread is not threading.main_thread() for thread in threads)
+    assert '"first"' in result["observation"] and '"second"' in result["observation"]
+
+def test_streamed_calls_are_all_observed(monkeypatch):
+    monkeypatch.setattr(config, "STREAM_EXECUTION", True)
+    threads = []
+    agent = _agent(monkeypatch, threads)
+    
+    async def stream(prompt, model_name="gemini-pro"):
+        for start in range(0, len(TWO_CALLS), 5):
+            yield TWO_CALLS[start:start + 5]
+    
+    monkeypatch.setattr(agent, "_generate_content_stream", stream)
+    result = asyncio.run(agent.execute_step("Look up two things"))
+    assert len(threads) == 2
+    assert result["observation"].index('"first"') < result["observation"].index('"second"')
+
+def test_failed_stream_cancels_dispatched_tools(monkeypatch):
+    monkeypatch.setattr(config, "STREAM_EXECUTION", True)
+    agent = ExecutionAgent("test-key")
+    release = threading.Event()
+    tasks = []
+    
+    def slow_tool(tool_name, params_text):
+        release.wait(5)
+        return "late\n"
+    
+    monkeypatch.setattr(agent, "_run_tool", slow_tool)
+    
+    async def stream(prompt, model_name="gemini-pro"):
+        yield "Tool: web_search\nParameters: {\"query\": \"x\"}\n"
+        tasks.extend(task for task in asyncio.all_tasks() if task is not asyncio.current_task())
+        raise ConnectionError("stream dropped")
+    
+    monkeypatch.setattr(agent, "_generate_content_stream", stream)
+    
+    async def run():
+        result = await agent.execute_step("Search")
+        pending = [task for task in tasks if not task.done()]
+        release.set()
+        return result, pending
+    
+    result, pending = asyncio.run(run())
+    assert not result["success"] and "stream dropped" in result["result"]
+    assert tasks and pending == []
@@ -0,0 +1,144 @@
+"""
+Tests for background jobs: per-key ownership, job id normalization, retries,
+background file writes and reloading persisted jobs.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.agents import jobs
+from app.agents.jobs import JobManager
+
+class FakeOrchestrator:
+    def __init__(self, api_key):
+        self.api_key = api_key
+    
+    async def handle_message(self, message, history=None, reservation=None):
+        yield {"type": "final_response", "agent": "Master Agent", "message": f"done: {message}", "is_final": True}
+
+@pytest.fixture(autouse=True)
+def fake_orchestrator(monkeypatch):
+    monkeypatch.setattr(jobs, "MasterAgentOrchestrator", FakeOrchestrator)
+
+async def _finish(manager, job):
+    async for _ in manager.follow(job):
+        pass
+    return job
+
+def test_jobs_are_only_visible_to_their_key(tmp_path):
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        job = await _finish(manager, await manager.submit("hello", [], "key-a", job_id="report"))
+        await manager.stop()
+        return manager, job
+    
+    manager, job = asyncio.run(run())
+    assert job.status == "completed"
+    assert manager.get("report", "key-a") is job
+    assert manager.get("report", "key-b") is None
+
+def test_same_job_id_is_namespaced_per_key(tmp_path):
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        first = await manager.submit("from a", [], "key-a", job_id="report")
+        second = await manager.submit("from b", [], "key-b", job_id="report")
+        again = await manager.submit("from a again", [], "key-a", job_id="report")
+        await _finish(manager, first)
+        await _finish(manager, second)
+        await manager.stop()
+        return first, second, again
+    
+    first, second, again = asyncio.run(run())
+    assert first is not second
+    assert again is first
+    assert second.result["message"] == "done: from b"
+
+def test_retry_rejects_other_keys(tmp_path):
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        job = await _finish(manager, await manager.submit("hello", [], "key-a", job_id="report"))
+        job.status = "failed"
+        other = await manager.retry("report", "key-b")
+        await manager.stop()
+        return job, other
+    
+    job, other = asyncio.run(run())
+    assert other is None
+    assert job.status == "failed"
+
+def test_lookup_uses_the_normalized_job_id(tmp_path):
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        job = await _finish(manager, await manager.submit("hello", [], "key-a", job_id="daily report/1"))
+        await manager.stop()
+        return manager, job
+    
+    manager, job = asyncio.run(run())
+    assert job.job_id == "daily_report_1"
+    assert manager.get("daily report/1", "key-a") is job
+
+def test_persisted_jobs_keep_their_owner(tmp_path):
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        await _finish(manager, await manager.submit("hello", [], "key-a", job_id="report"))
+        await manager.stop()
+    
+    asyncio.run(run())
+    reloaded = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+    assert reloaded.get("report", "key-a").result["message"] == "done: hello"
+    assert reloaded.get("report", "key-b") is None
+
+def test_job_files_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    loop_thread = threading.current_thread()
+    writers = []
+    real_open = open
+    
+    def tracking_open(path, *args, **kwargs):
+        if str(path).startswith(str(tmp_path)) and "r" not in (args[0] if args else kwargs.get("mode", "r")):
+            writers.append(threading.current_thread())
+        return real_open(path, *args, **kwargs)
+    
+    monkeypatch.setattr("builtins.open", tracking_open)
+    
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        await _finish(manager, await manager.submit("hello", [], "key-a", job_id="report"))
+        await manager.stop()
+    
+    asyncio.run(run())
+    assert writers and loop_thread not in writers
+    reloaded = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+    assert reloaded.get("report", "key-a").events[-1]["message"] == "done: hello"
+
+def test_retry_discards_the_previous_attempt(tmp_path, monkeypatch):
+    class FailingOnce(FakeOrchestrator):
+        calls = 0
+        
+        async def handle_message(self, message, history=None, reservation=None):
+            FailingOnce.calls += 1
+            yield {"type": "status", "agent": "Master Agent", "message": f"attempt {FailingOnce.calls}", "is_final": False}
+            if FailingOnce.calls == 1:
+                yield {"type": "error", "agent": "Master Agent", "message": "boom", "is_final": True}
+            else:
+                yield {"type": "final_response", "agent": "Master Agent", "message": "done", "is_final": True}
+    
+    monkeypatch.setattr(jobs, "MasterAgentOrchestrator", FailingOnce)
+    
+    async def run():
+        manager = JobManager(str(tmp_path), workers=1, retention_seconds=3600)
+        job = await _finish(manager, await manager.submit("hello", [], "key-a", job_id="report"))
+        assert job.status == "failed" and job.result["type"] == "error"
+        retried = await manager.retry("report", "key-a")
+        assert retried.result is None and retried.events == []
+        await _finish(manager, retried)
+        await manager.stop()
+        return retried
+    
+    job = asyncio.run(run())
+    assert job.status == "completed"
+    assert job.result["message"] == "done"
+    messages = [event["message"] for event in job.events]
+    assert "boom" not in messages and "attempt 1" not in messages
+    reloaded = JobManager(str(tmp_path), workers=1, retention_seconds=3600).get("report", "key-a")
+    assert [event["message"] for event in reloaded.events] == messages
@@ -0,0 +1,63 @@
+"""
+Tests for the plan template cache.
+"""
+from app.agents.plan_cache import PlanCache, extract_template
+
+ROME_PLAN = [
+    "1. Search the web for the history of Rome",
+    "2. Summarize the key periods of Rome's history"
+]
+
+def make_cache() -> PlanCache:
+    return PlanCache(max_size=16, threshold=0.9)
+
+def test_template_masks_names_and_numbers():
+    template, entities = extract_template("Compare Python and Rust in 2024")
+    assert template == "compare <e0> and <e1> in <e2>"
+    assert entities == ["Python", "Rust", "2024"]
+
+def test_quoted_text_is_part_of_the_template():
+    template, entities = extract_template('Summarize "the history of Rome"')
+    assert template == 'summarize "the history of <e0>"'
+    assert entities == ["Rome"]
+
+def test_similar_goal_gets_its_own_entities():
+    cache = make_cache()
+    assert cache.store("Summarize the history of Rome", ROME_PLAN)
+    
+    cached = cache.lookup("Summarize the history of Paris")
+    assert cached["plan"] == [
+        "1. Search the web for the history of Paris",
+        "2. Summarize the key periods of Paris's history"
+    ]
+    assert not cached["same_entities"]
+    assert cache.lookup("Summarize the history of Rome")["same_entities"]
+
+def test_quoted_goal_substitutes_entities():
+    cache = make_cache()
+    assert cache.store('Summarize "the history of Rome"', ROME_PLAN)
+    cached = cache.lookup('Summarize "the history of Paris"')
+    assert cached["plan"][0] == "1. Search the web for the history of Paris"
+
+def test_different_quoted_goal_misses():
+    cache = make_cache()
+    cache.store('Summarize "the history of Rome"', ROME_PLAN)
+    assert cache.lookup('Summarize "how to build a pipe bomb at home"') is None
+
+def test_plan_without_every_entity_is_not_stored():
+    cache = make_cache()
+    plan = ["1. Search the web for ancient history", "2. Summarize the findings"]
+    assert not cache.store("Summarize the history of Rome", plan)
+    assert cache.lookup("Summarize the history of Rome") is None
+    assert cache.stats()["not_stored"] == 1
+
+def test_entries_are_scoped():
+    cache = make_cache()
+    cache.store("Summarize the history of Rome", ROME_PLAN, scope="tenant-a")
+    assert cache.lookup("Summarize the history of Paris", scope="tenant-b") is None
+    assert cache.lookup("Summarize the history of Paris", scope="tenant-a") is not None
+
+def test_different_entity_count_misses():
+    cache = make_cache()
+    cache.store("Summarize the history of Rome", ROME_PLAN)
+    assert cache.lookup("Summarize the history of Rome and Carthage") is None
@@ -0,0 +1,56 @@
+"""
+Tests for planner step tags: the prompt only asks for the tags that enabled
+features read, and tags never reach execution or synthesis.
+"""
+import asyncio
+
+from app import config
+from app.agents import master_orchestrator
+from app.agents.base_agent import BaseAgent
+from app.agents.master_orchestrator import MasterAgentOrchestrator
+from app.agents.planning_agent import (
+    PLAN_PROMPT, REASONING_ONLY_TAG, plan_tag_instructions, strip_plan_tags
+)
+
+def _plan_prompt():
+    return PLAN_PROMPT.render(goal="g", context="c", history_context="", tag_instructions=plan_tag_instructions(6))
+
+def test_reasoning_only_instruction_follows_batching(monkeypatch):
+    monkeypatch.setattr(config, "BATCH_REASONING_STEPS", False)
+    assert REASONING_ONLY_TAG not in _plan_prompt()
+    monkeypatch.setattr(config, "BATCH_REASONING_STEPS", True)
+    assert f"6. Append {REASONING_ONLY_TAG}" in _plan_prompt()
+
+def test_strip_plan_tags():
+    assert strip_plan_tags("Compare the options [Reasoning-Only]") == "Compare the options"
+    assert strip_plan_tags("Search the web") == "Search the web"
+
+def test_tags_are_stripped_before_execution_and_synthesis(monkeypatch):
+    monkeypatch.setattr(config, "BATCH_REASONING_STEPS", True)
+    monkeypatch.setattr(config, "PLAN_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "FUSED_PLAN_REVIEW", False)
+    sleep = asyncio.sleep
+    monkeypatch.setattr(master_orchestrator.asyncio, "sleep", lambda _: sleep(0))
+    seen = []
+    
+    async def generate(self, prompt, model_name="gemini-pro"):
+        seen.append(str(prompt))
+        if "Goal to plan for" in prompt:
+            return f"1. Search the web for frameworks\n2. Compare the frameworks {REASONING_ONLY_TAG}"
+        if "Content to review" in prompt:
+            return "Status: APPROVED\nReasoning: Fine."
+        if "Steps to Execute" in prompt or "Current Step to Execute" in prompt:
+            return "Thought: ok\nResult: done"
+        return "Final answer"
+    
+    monkeypatch.setattr(BaseAgent, "_generate_content", generate)
+    
+    async def run():
+        orchestrator = MasterAgentOrchestrator("test-key")
+        return [event async for event in orchestrator.handle_message("Pick a web framework")]
+    
+    events = asyncio.run(run())
+    assert events[-1]["message"] == "Final answer"
+    executed = [prompt for prompt in seen if "Goal to plan for" not in prompt and "Content to review" not in prompt]
+    assert executed and not any(REASONING_ONLY_TAG in prompt for prompt in executed)
+    assert not any(REASONING_ONLY_TAG in event["message"] for event in events)
@@ -0,0 +1,50 @@
+"""
+Tests for the sampling profiler and the admin endpoints that control it.
+"""
+import queue
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.profiler import is_idle_frame
+
+class Cache:
+    def get(self):
+        return sys._getframe()
+
+def _worker():
+    return sys._getframe()
+
+def test_application_frames_with_generic_names_are_sampled():
+    assert not is_idle_frame(Cache().get())
+    assert not is_idle_frame(_worker())
+
+def test_blocked_queue_get_is_idle():
+    waiting = queue.Queue()
+    thread = threading.Thread(target=waiting.get, daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    assert is_idle_frame(sys._current_frames()[thread.ident])
+    waiting.put(None)
+    thread.join()
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+def test_admin_endpoints_are_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    assert client.get("/admin/profiler").status_code == 403
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": ""}).status_code == 403
+
+def test_admin_endpoints_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/admin/profiler", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "top_functions" in response.json()
@@ -0,0 +1,105 @@
+"""
+Tests for the per-key token buckets and the admission estimate.
+"""
+import asyncio
+
+import pytest
+
+from app.agents.rate_limiter import KeyRateLimiter, TokenBucket, activate_reservation
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    assert bucket.unlimited
+    assert bucket.wait_time(100) == 0.0
+    assert bucket.shortfall_time(100) == 0.0
+
+def test_shortfall_counts_the_full_job_cost():
+    bucket = TokenBucket(5)
+    # 5 calls are available now; the other 7 accrue at 5 per minute
+    assert bucket.shortfall_time(12) == pytest.approx(84.0, abs=0.1)
+    assert bucket.shortfall_time(5) == 0.0
+    # wait_time only looks as far as a full bucket
+    assert bucket.wait_time(12) == 0.0
+
+def test_drained_key_is_estimated_beyond_one_bucket():
+    limiter = KeyRateLimiter(requests_per_minute=5, tokens_per_minute=0)
+    for _ in range(5):
+        asyncio.run(limiter.acquire(10))
+    assert limiter.estimate_wait(calls=12, tokens=1000) == pytest.approx(144.0, abs=0.1)
+
+def test_token_budget_is_part_of_the_estimate():
+    limiter = KeyRateLimiter(requests_per_minute=0, tokens_per_minute=6000)
+    assert limiter.estimate_wait(calls=12, tokens=6000) == 0.0
+    assert limiter.estimate_wait(calls=12, tokens=12000) == pytest.approx(60.0, abs=0.1)
+
+def test_usage_is_reconciled_with_the_real_call_size():
+    limiter = KeyRateLimiter(requests_per_minute=0, tokens_per_minute=6000)
+    asyncio.run(limiter.acquire(1000))
+    limiter.record_usage(estimated_tokens=1000, actual_tokens=3000)
+    assert limiter.stats()["tokens_available"] == pytest.approx(3000, abs=5)
+    assert limiter.stats()["tokens_used"] == 3000
+
+def test_admission_rejects_a_plan_that_would_stall(monkeypatch):
+    from app import config
+    from app.main import check_llm_budget
+    
+    monkeypatch.setattr(config, "GEMINI_RPM_PER_KEY", 5.0)
+    wait = check_llm_budget("test-admission-key", "Compare PostgreSQL and MySQL")
+    assert wait > config.LLM_ADMISSION_MAX_WAIT
+
+def test_reservations_are_spent_by_calls_and_released():
+    limiter = KeyRateLimiter(requests_per_minute=12, tokens_per_minute=0)
+    reservation = limiter.reserve(calls=12, tokens=0)
+    assert limiter.estimate_wait(calls=12, tokens=0) == pytest.approx(60.0, abs=0.1)
+    
+    async def call():
+        activate_reservation(reservation)
+        await limiter.acquire(10)
+    
+    asyncio.run(call())
+    assert reservation.calls == 11 and limiter.reserved_calls == 11
+    reservation.release()
+    assert limiter.reserved_calls == 0
+    assert limiter.stats()["reserved_calls"] == 0
+
+def test_concurrent_admission_defers_the_second_request(monkeypatch):
+    from app import config
+    from app.agents.master_orchestrator import MasterAgentOrchestrator
+    from app.main import admit_llm_request
+    
+    monkeypatch.setattr(config, "GEMINI_RPM_PER_KEY", 12.0)
+    monkeypatch.setattr(config, "LLM_ADMISSION_MAX_WAIT", 30.0)
+    started = None
+    
+    async def workflow(self, message, history=None):
+        # Admitted, but none of its calls has been made yet
+        started.set()
+        await asyncio.sleep(10)
+        yield {"type": "response", "message": "done", "is_final": True}
+    
+    monkeypatch.setattr(MasterAgentOrchestrator, "_run_workflow", workflow)
+    
+    async def run():
+        nonlocal started
+        started = asyncio.Event()
+        _, first = admit_llm_request("test-concurrent-key", "Hi")
+        assert first is not None
+        
+        async def consume():
+            orchestrator = MasterAgentOrchestrator("test-concurrent-key")
+            async for _ in orchestrator.handle_message("Hi", reservation=first):
+                pass
+        
+        task = asyncio.create_task(consume())
+        await started.wait()
+        wait, second = admit_llm_request("test-concurrent-key", "Hi")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        third_wait, third = admit_llm_request("test-concurrent-key", "Hi")
+        return wait, second, first, third
+    
+    wait, second, first, third = asyncio.run(run())
+    assert second is None and wait > config.LLM_ADMISSION_MAX_WAIT
+    # The first request's unspent budget went back when it ended
+    assert first.calls == 0
+    assert third is not None
@@ -0,0 +1,34 @@
+"""
+Tests for the search backend interface and the query cache.
+"""
+import pytest
+
+from app.tools.search_backends import CachedSearchBackend, SearchBackend
+
+class CountingBackend(SearchBackend):
+    name = "counting"
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def search(self, query, top_k=5):
+        self.calls += 1
+        return [{"title": query, "url": "", "snippet": "", "score": 1.0}][:top_k]
+
+def test_search_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SearchBackend()
+    
+    class Incomplete(SearchBackend):
+        pass
+    
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_cache_serves_normalized_repeats():
+    backend = CountingBackend()
+    cached = CachedSearchBackend(backend, max_size=8)
+    cached.search("Rust  Web", 3)
+    cached.search("rust web", 3)
+    assert backend.calls == 1
+    assert cached.stats()["backend"] == "counting"
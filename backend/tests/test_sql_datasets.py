@@ -0,0 +1,104 @@
+"""
+Tests for SQL over loaded datasets and the dataset upload endpoint.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.agents.execution_agent import ExecutionAgent
+from app.main import app
+from app.tools import sql_datasets, tool_registry
+from app.tools.sql_datasets import DatasetStore
+
+SALES_CSV = "region,month,amount\n" + "".join(
+    f"{region},{month},{month * 10}\n" for region in ("north", "south") for month in range(1, 13)
+)
+
+@pytest.fixture
+def store(tmp_path) -> DatasetStore:
+    path = tmp_path / "sales.csv"
+    path.write_text(SALES_CSV)
+    store = DatasetStore(pool_size=2, max_rows=5, timeout=0.5, max_result_chars=8000, cache_size=16)
+    store.load("sales", str(path), ["region"])
+    return store
+
+def test_load_infers_column_types(store):
+    table = store.tables()["sales"]
+    assert table["rows"] == 24
+    assert table["columns"] == {"region": "TEXT", "month": "INTEGER", "amount": "INTEGER"}
+
+def test_query_formats_rows(store):
+    result = store.query("SELECT region, sum(amount) FROM sales GROUP BY region ORDER BY region")
+    assert result.splitlines()[1:3] == ["north | 780", "south | 780"]
+    assert result.endswith("2 rows returned.")
+
+def test_rows_are_limited(store):
+    result = store.query("SELECT * FROM sales")
+    assert "5 rows returned (truncated" in result
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM sales",
+    "DROP TABLE sales",
+    "ATTACH 'other.db' AS other",
+    "PRAGMA table_info(sales)"
+])
+def test_only_reads_are_allowed(store, sql):
+    with pytest.raises(Exception):
+        store.query(sql)
+    assert store.tables()["sales"]["rows"] == 24
+    assert "24" in store.query("SELECT count(*) FROM sales")
+
+def test_long_queries_time_out(store):
+    with pytest.raises(TimeoutError):
+        store.query("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c")
+
+def test_reload_invalidates_cached_results(store, tmp_path):
+    assert "24" in store.query("SELECT count(*) FROM sales")
+    path = tmp_path / "small.csv"
+    path.write_text("region,month,amount\nnorth,1,10\n")
+    store.load("sales", str(path))
+    assert store.query("SELECT count(*) FROM sales").splitlines()[1] == "1"
+
+def test_tool_calls_run_off_the_event_loop(monkeypatch):
+    threads = []
+    
+    def code_interpreter(code, language="python"):
+        threads.append(threading.current_thread())
+        return "ok"
+    
+    async def generate(self, prompt, model_name="gemini-pro"):
+        return 'Thought: query\nTool: code_interpreter\nParameters: {"code": "SELECT 1", "language": "sql"}\nResult: done'
+    
+    monkeypatch.setattr(tool_registry, "code_interpreter", code_interpreter)
+    monkeypatch.setattr(ExecutionAgent, "_generate_content", generate)
+    monkeypatch.setattr(config, "STREAM_EXECUTION", False)
+    
+    result = asyncio.run(ExecutionAgent("sql-key").execute_step("Query the sales dataset"))
+    assert result["observation"].startswith("Tool code_interpreter executed: ok")
+    assert threads and threads[0] is not threading.main_thread()
+
+@pytest.fixture
+def upload_client(monkeypatch, store):
+    monkeypatch.setattr(sql_datasets, "_store", store)
+    return TestClient(app)
+
+def test_upload_is_disabled_without_an_admin_token(upload_client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    response = upload_client.post("/admin/datasets", files={"file": ("people.csv", "name\nada\n")})
+    assert response.status_code == 403
+
+def test_upload_loads_a_table(upload_client, store, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    response = upload_client.post(
+        "/admin/datasets",
+        files={"file": ("people.csv", "name,age\nada,36\ngrace,45\n")},
+        data={"indexes": "name"},
+        headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.json()["rows"] == 2
+    assert "path" not in response.json()
+    assert store.query("SELECT max(age) FROM people").splitlines()[1] == "45"
@@ -0,0 +1,52 @@
+"""
+Tests for static serving: encoding negotiation, cache headers, revalidation
+and the SPA fallback.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import static_assets
+from app.static_assets import StaticAssets, precompress
+
+SCRIPT = "console.log('hello');\n" * 200
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<!doctype html><div id=root></div>" + " " * 2000)
+    (tmp_path / "assets" / "index-CRRU0xFI.js").write_text(SCRIPT)
+    precompress(str(tmp_path))
+    monkeypatch.setattr(static_assets.config, "STATIC_PRECOMPRESS", False)
+    return TestClient(StaticAssets(str(tmp_path)))
+
+def test_negotiates_precompressed_variants(client):
+    plain = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "identity"})
+    gzipped = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.text == SCRIPT
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+def test_each_encoding_has_its_own_etag(client):
+    plain = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "identity"})
+    gzipped = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "gzip"})
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+def test_fingerprinted_files_are_immutable(client):
+    assert "immutable" in client.get("/assets/index-CRRU0xFI.js").headers["cache-control"]
+    assert client.get("/index.html").headers["cache-control"] == "no-cache"
+
+def test_revalidation_returns_304_for_the_same_representation(client):
+    gzipped = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "gzip"})
+    etag = gzipped.headers["etag"]
+    again = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "gzip", "if-none-match": etag})
+    assert again.status_code == 304
+    # The gzip ETag does not validate the uncompressed representation
+    other = client.get("/assets/index-CRRU0xFI.js", headers={"accept-encoding": "identity", "if-none-match": etag})
+    assert other.status_code == 200
+
+def test_browser_navigation_falls_back_to_index(client):
+    page = client.get("/settings/profile", headers={"accept": "text/html"})
+    assert page.status_code == 200 and "id=root" in page.text
+    assert client.get("/missing.js", headers={"accept": "*/*"}).status_code == 404
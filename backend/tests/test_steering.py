@@ -0,0 +1,60 @@
+"""
+Tests for WebSocket steering: notes only apply to the turn they were sent
+during, and steering without a running turn is rejected.
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import config
+from app.agents.master_orchestrator import MasterAgentOrchestrator
+from app.main import app
+
+def test_notes_are_cleared_when_a_turn_fails(monkeypatch):
+    async def fail(self, message, history=None):
+        self.steer("keep it short")
+        raise RuntimeError("boom")
+        yield
+    
+    monkeypatch.setattr(MasterAgentOrchestrator, "_run_workflow", fail)
+    orchestrator = MasterAgentOrchestrator("test-key")
+    
+    async def run():
+        try:
+            async for _ in orchestrator.handle_message("hello"):
+                pass
+        except RuntimeError:
+            pass
+    
+    asyncio.run(run())
+    assert orchestrator.steering_notes == []
+
+def test_notes_are_cleared_when_a_turn_is_cancelled(monkeypatch):
+    async def slow(self, message, history=None):
+        yield {"type": "status", "agent": "Master Orchestrator", "message": "working", "is_final": False}
+        await asyncio.sleep(10)
+    
+    monkeypatch.setattr(MasterAgentOrchestrator, "_run_workflow", slow)
+    orchestrator = MasterAgentOrchestrator("test-key")
+    
+    async def consume():
+        async for _ in orchestrator.handle_message("hello"):
+            orchestrator.steer("keep it short")
+    
+    async def run():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        assert orchestrator.steering_notes == ["keep it short"]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    
+    asyncio.run(run())
+    assert orchestrator.steering_notes == []
+
+def test_steer_without_a_running_turn_is_rejected(monkeypatch):
+    monkeypatch.setattr(config, "get_api_key", lambda tenant_id=None: "test-key")
+    with TestClient(app).websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"type": "steer", "message": "keep it short"})
+        reply = websocket.receive_json()
+    assert reply["type"] == "error"
+    assert "No request is running" in reply["message"]
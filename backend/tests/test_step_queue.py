@@ -0,0 +1,101 @@
+"""
+Tests for out-of-process step execution: per-plan worker state, shared
+artifacts and rate limiting in the API process.
+"""
+import asyncio
+
+import pytest
+
+from app import config
+from app.agents import step_queue
+from app.agents.execution_agent import ExecutionAgent
+from app.agents.master_orchestrator import MasterAgentOrchestrator
+from app.tools import tool_registry
+from app.tools.artifact_store import ArtifactStore
+
+REACT_RESPONSE = """Thought: I need to search.
+Action: use_tool
+Tool: web_search
+Parameters: {"query": "rust web frameworks"}
+Observation: Found results.
+Result: Listed the main frameworks."""
+
+LARGE_OUTPUT = "framework " * 1000
+
+@pytest.fixture(autouse=True)
+def fake_llm_and_search(monkeypatch):
+    async def generate(self, prompt, model_name="gemini-pro"):
+        return REACT_RESPONSE
+    
+    monkeypatch.setattr(ExecutionAgent, "_generate_content", generate)
+    monkeypatch.setattr(tool_registry, "web_search", lambda query, top_k=5: LARGE_OUTPUT)
+    monkeypatch.setattr(config, "STREAM_EXECUTION", False)
+    step_queue._worker_plans.clear()
+
+def test_step_queue_is_abstract():
+    with pytest.raises(TypeError):
+        step_queue.StepQueue()
+
+def test_workers_keep_one_agent_per_recent_plan():
+    for index in range(step_queue.MAX_WORKER_PLANS + 5):
+        task = step_queue.step_task("key", "Search for Rust web frameworks", plan_id=f"plan-{index}")
+        assert asyncio.run(step_queue.run_task(task))["success"]
+    assert len(step_queue._worker_plans) == step_queue.MAX_WORKER_PLANS
+    
+    same_plan = step_queue.step_task("key", "Search again", plan_id=f"plan-{step_queue.MAX_WORKER_PLANS}")
+    agent = step_queue._worker_plans.get(f"plan-{step_queue.MAX_WORKER_PLANS}")
+    asyncio.run(step_queue.run_task(same_plan))
+    assert step_queue._worker_plans.get(f"plan-{step_queue.MAX_WORKER_PLANS}") is agent
+
+def test_worker_artifacts_land_in_the_plan_store():
+    store = ArtifactStore(inline_chars=100, preview_chars=20, spill_chars=100000)
+    settings = store.shared_settings()
+    
+    task = step_queue.step_task("key", "Search for Rust web frameworks", plan_id="plan-a", artifacts=settings)
+    result = asyncio.run(step_queue.run_task(task))
+    assert "artifact:" in result["observation"]
+    assert LARGE_OUTPUT not in result["observation"]
+    
+    store.adopt(result["artifacts"])
+    handle = "artifact:" + result["artifacts"][0]["id"]
+    assert store.read(handle, 0, 50) == LARGE_OUTPUT[:50]
+    assert store.stats()["artifacts"] == 1
+    
+    # Another worker attached to the same plan reads it too
+    assert ArtifactStore.attach(settings).read(handle, 10, 20) == LARGE_OUTPUT[10:30]
+    store.close()
+
+class RecordingQueue(step_queue.StepQueue):
+    name = "recording"
+    
+    def __init__(self):
+        self.tasks = []
+    
+    async def submit(self, task):
+        self.tasks.append(task)
+        return await step_queue.run_task(task)
+
+def test_orchestrator_enforces_rate_limits_for_remote_steps(monkeypatch):
+    queue = RecordingQueue()
+    step_queue.set_step_queue(queue)
+    monkeypatch.setattr(config, "ARTIFACT_STORE_ENABLED", True)
+    try:
+        orchestrator = MasterAgentOrchestrator("remote-step-key")
+        registry = orchestrator.execution_agent.tool_registry
+        registry.start_plan(artifacts=ArtifactStore(100, 20, 100000))
+        requests_before = orchestrator.client.rate_limiter.requests
+        
+        result = asyncio.run(orchestrator._execute_step("Search for Rust web frameworks", ""))
+        assert result["success"]
+        assert "artifacts" not in result
+        assert orchestrator.client.rate_limiter.requests == requests_before + 1
+        assert queue.tasks[0]["plan_id"] == registry.plan_id
+        assert registry.artifacts.stats()["artifacts"] == 1
+        registry.start_plan()
+    finally:
+        step_queue.set_step_queue(None)
+
+def test_unreachable_socket_workers_fail_over():
+    queue = step_queue.SocketStepQueue(["/nonexistent/a.sock", "/nonexistent/b.sock"])
+    with pytest.raises(step_queue.WorkerUnavailable):
+        asyncio.run(queue.submit(step_queue.step_task("key", "step")))
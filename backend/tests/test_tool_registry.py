@@ -0,0 +1,54 @@
+"""
+Tests for per-plan deduplication of pure tool calls.
+"""
+import asyncio
+
+import pytest
+
+from app import config
+from app.agents.master_orchestrator import MasterAgentOrchestrator
+from app.tools import tool_registry
+from app.tools.tool_cache import tool_result_cache
+from app.tools.tool_registry import ToolRegistry
+
+@pytest.fixture(autouse=True)
+def counting_retriever(monkeypatch):
+    calls = []
+    
+    def retriever(query):
+        calls.append(query)
+        return f"principles for {query}"
+    
+    monkeypatch.setattr(config, "TOOL_CACHE_ENABLED", True)
+    monkeypatch.setattr(tool_result_cache, "get", lambda tool_name, key: None)
+    monkeypatch.setattr(tool_registry, "constitution_retriever", retriever)
+    return calls
+
+def test_identical_calls_run_once_per_plan(counting_retriever):
+    registry = ToolRegistry()
+    registry.execute_tool("constitution_retriever", {"query": "privacy"})
+    registry.execute_tool("constitution_retriever", {"query": "privacy"})
+    assert counting_retriever == ["privacy"]
+    
+    registry.start_plan()
+    registry.execute_tool("constitution_retriever", {"query": "privacy"})
+    assert counting_retriever == ["privacy", "privacy"]
+
+def test_orchestrations_reset_the_ethics_registry(monkeypatch):
+    orchestrator = MasterAgentOrchestrator("test-key")
+    registry = orchestrator.ethics_agent.tool_registry
+    registry.execute_tool("constitution_retriever", {"query": "first request"})
+    assert len(registry._plan_results) == 1
+    
+    async def planning_fails(*args, **kwargs):
+        raise RuntimeError("stop after setup")
+    
+    monkeypatch.setattr(config, "PLAN_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "FUSED_PLAN_REVIEW", False)
+    monkeypatch.setattr(orchestrator.planning_agent, "plan_task", planning_fails)
+    
+    async def run():
+        return [event async for event in orchestrator.handle_message("second request")]
+    
+    asyncio.run(run())
+    assert registry._plan_results == {}
@@ -0,0 +1,26 @@
+"""
+Tests for the request trace buffer endpoints.
+"""
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.tracing import trace
+
+def test_debug_requests_are_disabled_without_an_admin_token(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    client = TestClient(app)
+    assert client.get("/debug/requests").status_code == 403
+    assert client.get("/debug/requests/abc").status_code == 403
+
+def test_debug_requests_with_the_admin_token(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    with trace("handle_message", message_chars=5) as root:
+        pass
+    client = TestClient(app)
+    headers = {"X-Admin-Token": "secret"}
+    
+    assert client.get("/debug/requests", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    traces = client.get("/debug/requests", headers=headers).json()
+    assert root.trace_id in [entry["trace_id"] for entry in traces]
+    assert client.get(f"/debug/requests/{root.trace_id}", headers=headers).json()["trace_id"] == root.trace_id